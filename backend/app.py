@@ -4,20 +4,39 @@ from flask_jwt_extended import JWTManager
 import os
 from config import Config
 from models import db
+from utils.logging_pipeline import logging_pipeline
+from utils.metrics import metrics
+from utils.query_stats import query_stats
+from utils.serialization import OrjsonProvider
 
 # Import routes
 from routes.auth import auth_bp
 from routes.employees import employees_bp
 from routes.attendance import attendance_bp
 from routes.teams import teams_bp
+from routes.reports import reports_bp
+from routes.admin import admin_bp
+from commands import rollups_cli, users_cli
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Queue log records for a listener thread and tag them with a request id
+logging_pipeline.init_app(app)
+
+# Time every SQL statement per fingerprint and log slow ones
+query_stats.init_app(app)
+
+# Serialize responses with orjson
+app.json = OrjsonProvider(app)
+
 # Initialize SQLAlchemy with the app
 db.init_app(app)
 
+# Request, database and cache metrics for Prometheus at /metrics
+metrics.init_app(app)
+
 # Initialize JWT Manager
 jwt = JWTManager(app)
 
@@ -52,13 +71,15 @@ CORS(app, resources={
     r"/api/*": {
         "origins": ["http://localhost:5173"],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
+        "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key", "If-None-Match", "X-Request-ID"],
+        "expose_headers": ["ETag", "X-Request-ID"],
         "supports_credentials": True
     },
     r"/api/*/*": {
         "origins": ["http://localhost:5173"],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
+        "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key", "If-None-Match", "X-Request-ID"],
+        "expose_headers": ["ETag", "X-Request-ID"],
         "supports_credentials": True
     }
 })
@@ -68,6 +89,12 @@ app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(employees_bp, url_prefix='/api/employees')
 app.register_blueprint(attendance_bp, url_prefix='/api/attendance')
 app.register_blueprint(teams_bp, url_prefix='/api/teams')
+app.register_blueprint(reports_bp, url_prefix='/api/reports')
+app.register_blueprint(admin_bp, url_prefix='/api/admin')
+
+# Register CLI commands
+app.cli.add_command(rollups_cli)
+app.cli.add_command(users_cli)
 
 # Root route
 @app.route('/')
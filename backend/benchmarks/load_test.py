@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+
+import argparse
+import atexit
+import http.client
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as clock, timedelta
+from itertools import cycle
+from queue import Empty, SimpleQueue
+
+# One log line per request would measure the log listener rather than the routes
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+# Add the backend directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import make_server
+from app import app
+from models import db
+from models.attendance import Attendance
+from models.employee import Employee
+from models.team import Team
+from models.team_member import TeamMember
+from models.user import User
+from models.work_schedule import WorkSchedule
+from utils.identity import identity_claims
+from utils.rollups import iter_months, rebuild_rollups
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'load_test.json')
+CHUNK = 5000
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def _insert(table, rows):
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(insert(table), rows[start:start + CHUNK])
+
+def seed(employees, teams, days):
+    """Employees on weekday shifts spread over teams, with `days` of attendance up to yesterday"""
+    db.drop_all()
+    db.create_all()
+    password_hash = generate_password_hash('password')
+    
+    _insert(User.__table__, [{'username': 'admin', 'password_hash': password_hash, 'role': 'admin'}] + [
+        {'username': f'worker{i}', 'password_hash': password_hash, 'role': 'employee'} for i in range(employees)
+    ])
+    _insert(Employee.__table__, [{
+        'user_id': i + 1,
+        'first_name': f'Nombre{i}',
+        'last_name': f'Apellido{i % 97}',
+        'email': f'user{i}@alich.com',
+        'department': ('IT', 'RRHH', 'Ventas', 'Operaciones')[i % 4],
+        'position': 'Analista',
+        'hire_date': date(2020, 1, 1) + timedelta(days=i % 900),
+        'status': 'active'
+    } for i in range(employees + 1)])
+    
+    # Employee 1 belongs to the admin; workers start at 2
+    workers = range(2, employees + 2)
+    _insert(Team.__table__, [{'name': f'Equipo {i}', 'department': 'IT', 'status': 'active'} for i in range(teams)])
+    _insert(TeamMember.__table__, [
+        {'team_id': i % teams + 1, 'employee_id': employee_id, 'role': 'leader' if i < teams else 'member'}
+        for i, employee_id in enumerate(workers)
+    ] if teams else [])
+    _insert(WorkSchedule.__table__, [
+        {'employee_id': employee_id, 'day_of_week': day, 'start_time': clock(9, 0), 'end_time': clock(17, 0)}
+        for employee_id in workers for day in range(5)
+    ])
+    
+    today = date.today()
+    first_day = today - timedelta(days=days)
+    rows = []
+    for offset in range(days):
+        work_date = first_day + timedelta(days=offset)
+        if work_date.weekday() >= 5:
+            continue
+        for employee_id in workers:
+            check_in = datetime.combine(work_date, clock(8, 45)) + timedelta(minutes=employee_id % 40)
+            rows.append({
+                'employee_id': employee_id,
+                'work_date': work_date,
+                'check_in': check_in,
+                'check_out': check_in + timedelta(hours=8, minutes=employee_id % 30),
+                'status': 'late' if check_in.time() > clock(9, 0) else 'present'
+            })
+        if len(rows) >= CHUNK:
+            _insert(Attendance.__table__, rows)
+            rows = []
+    _insert(Attendance.__table__, rows)
+    db.session.commit()
+    
+    for year, month in iter_months(first_day, today):
+        with db.engine.begin() as conn:
+            rebuild_rollups(conn, year, month)
+
+def issue_tokens():
+    users = db.session.execute(select(User).order_by(User.id)).scalars().all()
+    return [create_access_token(identity=user.id, additional_claims=identity_claims(user)) for user in users]
+
+class Server:
+    """The app behind a threaded werkzeug server on a free local port"""
+    
+    def __init__(self):
+        self._server = make_server('127.0.0.1', 0, app, threaded=True)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self.port = self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._thread.join()
+
+def request(port, method, path, token):
+    """One request on its own connection; returns (latency in seconds, status)"""
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        conn.request(method, path, headers={'Authorization': f'Bearer {token}'})
+        response = conn.getresponse()
+        response.read()
+        status = response.status
+    except (OSError, http.client.HTTPException):
+        status = 0
+    finally:
+        conn.close()
+    return time.perf_counter() - started, status
+
+def run_phase(port, jobs, clients):
+    """Drain (route, method, path, token) jobs with `clients` threads; per-route latencies and wall time"""
+    queue = SimpleQueue()
+    for job in jobs:
+        queue.put(job)
+    samples = []
+    
+    def client():
+        while True:
+            try:
+                route, method, path, token = queue.get_nowait()
+            except Empty:
+                return
+            latency, status = request(port, method, path, token)
+            samples.append((route, latency, status))
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for _ in range(clients):
+            pool.submit(client)
+    return samples, time.perf_counter() - started
+
+def checkin_storm(tokens, requests):
+    """Shift start: every worker checks in, then every worker checks out"""
+    workers = tokens[1:requests + 1]
+    return [
+        [('POST /api/attendance/check-in', 'POST', '/api/attendance/check-in', token) for token in workers],
+        [('POST /api/attendance/check-out', 'POST', '/api/attendance/check-out', token) for token in workers]
+    ]
+
+def dashboard(tokens, requests):
+    """Admins polling the attendance board, employee and team lists and the monthly report"""
+    today = date.today()
+    pages = cycle(range(1, max(1, -(-len(tokens) // 50)) + 1))
+    routes = cycle([
+        ('GET /api/attendance/today', lambda: '/api/attendance/today?limit=50'),
+        ('GET /api/attendance/expected-now', lambda: '/api/attendance/expected-now'),
+        ('GET /api/employees/', lambda: f'/api/employees/?page={next(pages)}&per_page=50'),
+        ('GET /api/attendance/today', lambda: '/api/attendance/today?limit=50'),
+        ('GET /api/teams/', lambda: '/api/teams/?per_page=50'),
+        ('GET /api/reports/monthly', lambda: f'/api/reports/monthly?year={today.year}&month={today.month}')
+    ])
+    return [[(route, 'GET', path(), tokens[0]) for route, path in (next(routes) for _ in range(requests))]]
+
+def exports(tokens, requests):
+    """Month-long attendance exports and timesheets, the heaviest reads"""
+    end = date.today() - timedelta(days=1)
+    start = end - timedelta(days=30)
+    span = f'start_date={start.isoformat()}&end_date={end.isoformat()}'
+    routes = cycle([
+        ('GET /api/attendance/export', f'/api/attendance/export?format=csv&{span}'),
+        ('GET /api/attendance/export', f'/api/attendance/export?format=ndjson&{span}'),
+        ('GET /api/reports/timesheet', f'/api/reports/timesheet?{span}')
+    ])
+    return [[(route, 'GET', path, tokens[0]) for route, path in (next(routes) for _ in range(max(1, requests // 20)))]]
+
+# Each mix is a list of phases; a phase starts once the previous one has drained
+MIXES = {'checkin-storm': checkin_storm, 'dashboard': dashboard, 'exports': exports}
+
+def summarize(samples, elapsed):
+    routes = {}
+    for route, latency, status in samples:
+        entry = routes.setdefault(route, {'latencies': [], 'errors': 0})
+        entry['latencies'].append(latency)
+        entry['errors'] += not 200 <= status < 400
+    return {route: {
+        'requests': len(entry['latencies']),
+        'errors': entry['errors'],
+        'p50_ms': round(percentile(entry['latencies'], 0.50) * 1000, 2),
+        'p95_ms': round(percentile(entry['latencies'], 0.95) * 1000, 2),
+        'p99_ms': round(percentile(entry['latencies'], 0.99) * 1000, 2),
+        'throughput_rps': round(len(entry['latencies']) / elapsed, 1)
+    } for route, entry in sorted(routes.items())}
+
+def compare(results, baseline, tolerance, slack_ms):
+    """Regressions against the baseline: errors, p95 latency and throughput beyond the tolerance"""
+    failures = []
+    for mix, routes in results['mixes'].items():
+        for route, current in routes.items():
+            if current['errors']:
+                failures.append(f'{mix} {route}: {current["errors"]} failed requests')
+            previous = baseline.get('mixes', {}).get(mix, {}).get(route)
+            if previous is None:
+                continue
+            if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance) + slack_ms:
+                failures.append(f'{mix} {route}: p95 {current["p95_ms"]} ms, baseline {previous["p95_ms"]} ms')
+            if current['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+                failures.append(f'{mix} {route}: {current["throughput_rps"]} req/s, baseline {previous["throughput_rps"]} req/s')
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a large dataset and load-test the API over HTTP')
+    parser.add_argument('--employees', type=int, default=300)
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365, help='days of attendance history to seed')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent HTTP clients')
+    parser.add_argument('--requests', type=int, default=300, help='requests per mix (check-ins are capped at --employees)')
+    parser.add_argument('--mix', action='append', choices=sorted(MIXES), help='mixes to run (default: all)')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed relative p95 growth and throughput drop')
+    parser.add_argument('--slack-ms', type=float, default=5.0, help='absolute p95 growth always allowed')
+    parser.add_argument('--database', help='seed this SQLAlchemy URL instead of a throwaway SQLite file')
+    parser.add_argument('--allow-drop', action='store_true', help='confirm that --database may have every table dropped')
+    args = parser.parse_args()
+    
+    # Seeding drops every table, so only an explicitly named and confirmed database is used;
+    # DATABASE_URL and the DB_* settings from .env are ignored
+    if args.database and not args.allow_drop:
+        parser.error('--database drops and recreates every table; pass --allow-drop to confirm')
+    if args.database:
+        app.config['SQLALCHEMY_DATABASE_URI'] = args.database
+    else:
+        database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database.close()
+        atexit.register(os.unlink, database.name)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database.name}'
+    
+    with app.app_context():
+        started = time.perf_counter()
+        seed(args.employees, args.teams, args.days)
+        tokens = issue_tokens()
+        dialect = db.engine.dialect.name
+    print(f'Seeded {args.employees} employees, {args.teams} teams and {args.days} days on {dialect} '
+          f'in {time.perf_counter() - started:.1f} s')
+    
+    results = {
+        'settings': {key: getattr(args, key) for key in ('employees', 'teams', 'days', 'clients', 'requests')},
+        'environment': {'database': dialect, 'python': platform.python_version(), 'machine': platform.machine()},
+        'mixes': {}
+    }
+    with Server() as server:
+        for mix in args.mix or MIXES:
+            results['mixes'][mix] = {}
+            for jobs in MIXES[mix](tokens, args.requests):
+                results['mixes'][mix].update(summarize(*run_phase(server.port, jobs, args.clients)))
+            for route, entry in results['mixes'][mix].items():
+                print(f'{mix:14} {route:32} {entry["requests"]:5} req {entry["errors"]:3} err'
+                      f'  p50 {entry["p50_ms"]:7.1f}  p95 {entry["p95_ms"]:7.1f}  p99 {entry["p99_ms"]:7.1f} ms'
+                      f'  {entry["throughput_rps"]:7.1f} req/s')
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Baseline saved to {args.baseline}')
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}; run with --save-baseline to create one')
+        return 0
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('settings') != results['settings']:
+        print(f'Warning: baseline was recorded with {baseline.get("settings")}')
+    failures = compare(results, baseline, args.tolerance, args.slack_ms)
+    for failure in failures:
+        print(f'REGRESSION {failure}')
+    print('Within baseline' if not failures else f'{len(failures)} regressions')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
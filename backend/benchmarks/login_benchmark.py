@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db
+from utils.user_import import import_users
+
+# Use a throwaway SQLite file shared by every benchmark thread. The URI is set on the app
+# because DB_* settings from .env would take precedence over DATABASE_URL.
+_database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+_database.close()
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{_database.name}'
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def seed_users(count):
+    rows = [{
+        'username': f'bench{i}', 'password': f'password{i}', 'role': 'employee',
+        'first_name': 'Bench', 'last_name': str(i), 'email': f'bench{i}@alich.com'
+    } for i in range(count)]
+    
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as conn:
+            import_users(conn, rows)
+
+def login_storm(users, requests, threads):
+    """Fire `requests` logins from `threads` clients and return per-request latencies"""
+    def login(i):
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.post('/api/auth/login', json={
+            'username': f'bench{i % users}', 'password': f'password{i % users}'
+        })
+        return time.perf_counter() - started, response.status_code
+    
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(login, range(requests)))
+
+def probe(stop, latencies):
+    """Measure a cheap endpoint while the storm runs, standing in for /check-in traffic"""
+    client = app.test_client()
+    while not stop.is_set():
+        started = time.perf_counter()
+        client.get('/')
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.005)
+
+def report(label, latencies, elapsed=None):
+    line = f'{label}: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms'
+    if elapsed:
+        line += f', {len(latencies) / elapsed:.1f} req/s'
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure login throughput and latency under concurrent load')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--verify-workers', type=int, default=2,
+                        help='PASSWORD_VERIFY_WORKERS; set it to --threads to approximate the old unbounded path')
+    args = parser.parse_args()
+    
+    app.config['PASSWORD_VERIFY_WORKERS'] = args.verify_workers
+    app.config['PASSWORD_VERIFY_QUEUE'] = max(args.threads, 1)
+    
+    try:
+        seed_users(args.users)
+        
+        stop, probe_latencies = threading.Event(), []
+        prober = threading.Thread(target=probe, args=(stop, probe_latencies))
+        prober.start()
+        
+        started = time.perf_counter()
+        results = login_storm(args.users, args.requests, args.threads)
+        elapsed = time.perf_counter() - started
+        
+        stop.set()
+        prober.join()
+    finally:
+        os.unlink(_database.name)
+    
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    
+    print(f'{args.requests} logins, {args.threads} client threads, {args.verify_workers} verify workers')
+    print(f'status codes: {statuses}')
+    report('login', [latency for latency, _ in results], elapsed)
+    report('probe during storm', probe_latencies)
+
+if __name__ == '__main__':
+    main()
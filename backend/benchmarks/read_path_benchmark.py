@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+# Add the backend directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+from app import app
+from models import db
+from models.attendance import Attendance
+from models.employee import Employee
+from models.user import User
+from routes.employees import EMPLOYEE_ENCODER, EMPLOYEE_FIELDS
+from utils.export import ATTENDANCE_ENCODER
+from utils.readonly import read_rows, table_columns
+
+# Rows are seeded into a private in-memory database; set on the app since DB_* settings from .env beat DATABASE_URL
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+
+def seed(rows):
+    db.create_all()
+    db.session.execute(insert(User.__table__), [
+        {'username': f'user{i}', 'password_hash': 'x', 'role': 'employee'} for i in range(rows)
+    ])
+    db.session.execute(insert(Employee.__table__), [{
+        'user_id': i + 1,
+        'first_name': f'Nombre{i}',
+        'last_name': f'Apellido{i % 97}',
+        'email': f'user{i}@alich.com',
+        'department': 'IT' if i % 3 else 'RRHH',
+        'position': 'Analista',
+        'hire_date': date(2020, 1, 1) + timedelta(days=i % 900),
+        'status': 'active'
+    } for i in range(rows)])
+    start = datetime(2024, 1, 1, 9, 0)
+    db.session.execute(insert(Attendance.__table__), [{
+        'employee_id': 1,
+        'work_date': (start + timedelta(days=i)).date(),
+        'check_in': start + timedelta(days=i),
+        'check_out': start + timedelta(days=i, hours=8),
+        'status': 'present'
+    } for i in range(rows)])
+    db.session.commit()
+
+def measure(repeat, fn):
+    """Best wall time and peak traced allocation of one page read and encoded"""
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    
+    db.session.expunge_all()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings), peak
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare ORM entity reads with Core row reads on list pages')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    
+    with app.app_context():
+        seed(args.rows)
+        employee_columns = table_columns(Employee, *EMPLOYEE_FIELDS)
+        pages = {
+            'employees': [
+                ('ORM entities + to_dict()', lambda: app.json.dumps(
+                    [e.to_dict() for e in Employee.query.order_by(Employee.last_name).limit(args.rows)]
+                )),
+                ('Core rows + columnar encoder', lambda: EMPLOYEE_ENCODER.encode_list(
+                    read_rows(select(*employee_columns).order_by(Employee.last_name).limit(args.rows))
+                ))
+            ],
+            'attendance': [
+                ('ORM entities + to_dict()', lambda: app.json.dumps(
+                    [a.to_dict() for a in Attendance.query.order_by(Attendance.check_in.desc()).limit(args.rows)]
+                )),
+                ('Core rows + columnar encoder', lambda: ATTENDANCE_ENCODER.encode_list(
+                    read_rows(select(*table_columns(Attendance)).order_by(Attendance.check_in.desc()).limit(args.rows))
+                ))
+            ]
+        }
+        
+        print(f'{args.rows}-row pages, best of {args.repeat}')
+        for name, paths in pages.items():
+            baseline = None
+            for label, fn in paths:
+                elapsed, peak = measure(args.repeat, fn)
+                baseline = baseline or (elapsed, peak)
+                print(f'{name:11} {label:30} {elapsed * 1000:7.1f} ms {baseline[0] / elapsed:5.1f}x'
+                      f'  {peak / 1024:7.0f} KiB peak {baseline[1] / peak:5.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert, select
+from app import app
+from models import db
+from models.attendance import Attendance
+from utils.export import ATTENDANCE_ENCODER
+
+# Rows are seeded into a private in-memory database; set on the app since DB_* settings from .env beat DATABASE_URL
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+
+def seed(rows):
+    start = datetime(2024, 1, 1, 9, 0)
+    values = [{
+        'employee_id': i % 500 + 1,
+        'work_date': (start + timedelta(days=i // 500)).date(),
+        'check_in': start + timedelta(days=i // 500, minutes=i % 60),
+        'check_out': start + timedelta(days=i // 500, hours=8, minutes=i % 45),
+        'status': 'late' if i % 7 == 0 else 'present',
+        'notes': 'Cita médica, salida temprana' if i % 50 == 0 else None
+    } for i in range(rows)]
+    
+    db.create_all()
+    db.session.execute(insert(Attendance.__table__), values)
+    db.session.commit()
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare JSON serialization paths on attendance payloads')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    
+    with app.app_context():
+        seed(args.rows)
+        records = Attendance.query.order_by(Attendance.id).all()
+        rows = db.session.execute(select(Attendance.__table__).order_by(Attendance.id)).all()
+        
+        stdlib = DefaultJSONProvider(app)
+        paths = [
+            ('to_dict() + stdlib json (previous)', lambda: stdlib.dumps({'attendance_records': [r.to_dict() for r in records]})),
+            ('to_dict() + orjson provider', lambda: app.json.dumps({'attendance_records': [r.to_dict() for r in records]})),
+            ('Row results + columnar encoder', lambda: ATTENDANCE_ENCODER.encode_list(rows))
+        ]
+        
+        print(f'{args.rows} attendance rows, best of {args.repeat}')
+        baseline = None
+        for label, fn in paths:
+            elapsed, size = best_of(args.repeat, fn)
+            baseline = baseline or elapsed
+            print(f'{label:40} {elapsed * 1000:8.1f} ms  {size / 1024:8.0f} KiB  {baseline / elapsed:5.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Add the backend directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.timesheet import MISSING, TimesheetInputs, compute_timesheet
+
+def synthetic_inputs(punches, employees, seed=42):
+    """Build timesheet inputs for `punches` random punches spread over a year"""
+    rng = np.random.default_rng(seed)
+    
+    employee_index = rng.integers(0, employees, punches)
+    days = np.datetime64('2024-01-01') + rng.integers(0, 365, punches).astype('timedelta64[D]')
+    day_start = days.astype('datetime64[s]').astype(np.int64)
+    
+    # Check in around 09:00 and stay about eight hours; 2% forget to check out
+    check_in = day_start + 9 * 3600 + rng.normal(0, 900, punches).astype(np.int64)
+    check_out = check_in + 8 * 3600 + rng.normal(0, 1800, punches).astype(np.int64)
+    check_out[rng.random(punches) < 0.02] = MISSING
+    
+    # Monday to Friday 09:00-17:00
+    schedule_start = np.full((employees, 7), MISSING, dtype=np.int32)
+    schedule_end = np.full((employees, 7), MISSING, dtype=np.int32)
+    schedule_start[:, :5] = 9 * 60
+    schedule_end[:, :5] = 17 * 60
+    
+    return TimesheetInputs(
+        employee_ids=np.arange(1, employees + 1),
+        employee_index=employee_index,
+        check_in=check_in,
+        check_out=check_out,
+        day_start=day_start,
+        weekday=(days.astype(np.int64) + 3) % 7,
+        schedule_start=schedule_start,
+        schedule_end=schedule_end
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the vectorized timesheet pass')
+    parser.add_argument('--punches', type=int, default=1_000_000)
+    parser.add_argument('--employees', type=int, default=5_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    inputs = synthetic_inputs(args.punches, args.employees)
+    
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        compute_timesheet(inputs)
+        timings.append(time.perf_counter() - start)
+    
+    best = min(timings)
+    print(f'{args.punches} punches, {args.employees} employees')
+    print(f'best {best * 1000:.1f} ms, median {sorted(timings)[len(timings) // 2] * 1000:.1f} ms')
+    print(f'{args.punches / best / 1e6:.1f}M punches/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from models import db
+from models.employee import Employee
+from utils.response_cache import model_tag, response_cache
+from utils.rollups import iter_months, rebuild_rollups
+from utils.user_import import import_users, parse_import
+
+rollups_cli = AppGroup('rollups', help='Maintain the attendance rollup tables.')
+users_cli = AppGroup('users', help='Manage user accounts.')
+
+@rollups_cli.command('rebuild')
+@click.option('--start', 'start_date', required=True, type=click.DateTime(formats=['%Y-%m-%d']),
+              help='First day to rebuild (YYYY-MM-DD).')
+@click.option('--end', 'end_date', required=True, type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Last day to rebuild (YYYY-MM-DD).')
+def rebuild_rollups_command(start_date, end_date):
+    """Backfill daily and monthly rollups for every month overlapping the range."""
+    if end_date < start_date:
+        raise click.BadParameter('--end must not be before --start')
+    
+    total = 0
+    for year, month in iter_months(start_date.date(), end_date.date()):
+        # One transaction per month keeps locks and memory bounded
+        with db.engine.begin() as conn:
+            written = rebuild_rollups(conn, year, month)
+        total += written
+        click.echo(f'{year}-{month:02d}: {written} daily rows')
+    
+    click.echo(f'Rebuilt {total} daily rows')
+
+
+@users_cli.command('import')
+@click.argument('path', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'import_format', type=click.Choice(['csv', 'json']),
+              help='File format; guessed from the extension when omitted.')
+@click.option('--workers', type=int, help='Processes hashing passwords (default: PASSWORD_HASH_WORKERS or every CPU).')
+def import_users_command(path, import_format, workers):
+    """Create users and employees from a CSV or JSON file."""
+    import_format = import_format or ('json' if path.name.lower().endswith('.json') else 'csv')
+    rows = parse_import(path.read(), import_format)
+    
+    with db.engine.begin() as conn:
+        summary = import_users(conn, rows, workers or current_app.config.get('PASSWORD_HASH_WORKERS'))
+    response_cache.invalidate([model_tag(Employee)])
+    
+    for error in summary['errors']:
+        click.echo(f"Row {error['row']} ({error['username']}): {error['error']}", err=True)
+    click.echo(f"Created {summary['created']} of {summary['received']} users")
@@ -31,8 +31,116 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour
 
+    # Seconds to cache user identities in-process (0 disables the cache); other workers see a role or status change that late
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 0))
+    # Seconds after issue that role/active JWT claims are trusted without a database read (0 always reads).
+    # Changes are only tracked per process, so other workers may act on old claims for up to this long.
+    IDENTITY_CLAIMS_TTL = int(os.environ.get('IDENTITY_CLAIMS_TTL', 0))
+
     # CORS settings
     CORS_HEADERS = 'Content-Type'
 
     # Pagination settings
-    ITEMS_PER_PAGE = 10
\ No newline at end of file
+    ITEMS_PER_PAGE = 10
+    MAX_ITEMS_PER_PAGE = int(os.environ.get('MAX_ITEMS_PER_PAGE', 100))
+
+    # Seconds a cursor-mode total (include_total=true) may be reused
+    COUNT_CACHE_TTL = int(os.environ.get('COUNT_CACHE_TTL', 30))
+
+    # Rows fetched and flushed per chunk by streaming exports
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+
+    # Seconds before the in-memory schedule index reloads changes made by other processes: other workers
+    # may use an old schedule (lateness, expected-now, timesheets) for up to this long after a change
+    SCHEDULE_INDEX_TTL = int(os.environ.get('SCHEDULE_INDEX_TTL', 300))
+
+    # Employee and team search: index reload interval, and the largest match set filtered by id
+    SEARCH_INDEX_TTL = int(os.environ.get('SEARCH_INDEX_TTL', 300))
+    SEARCH_FILTER_MAX_IDS = int(os.environ.get('SEARCH_FILTER_MAX_IDS', 1000))
+    SEARCH_MAX_LIMIT = int(os.environ.get('SEARCH_MAX_LIMIT', 50))
+
+    # Response cache for read-heavy GET endpoints; backend is 'memory' (per process) or 'local' (SQLite file shared by workers)
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_PATH = os.environ.get('RESPONSE_CACHE_PATH')
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 60))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 10000))
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # Weak ETags from the same tag versions, so unchanged lists and details answer 304
+    ETAGS_ENABLED = os.environ.get('ETAGS_ENABLED', 'true').lower() == 'true'
+
+    # Write-behind ingestion: check-ins and check-outs are committed in batches by a writer thread
+    WRITE_BEHIND_ENABLED = os.environ.get('WRITE_BEHIND_ENABLED', 'false').lower() == 'true'
+    WRITE_BEHIND_QUEUE_SIZE = int(os.environ.get('WRITE_BEHIND_QUEUE_SIZE', 10000))
+    WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 500))
+    WRITE_BEHIND_MAX_DELAY_MS = int(os.environ.get('WRITE_BEHIND_MAX_DELAY_MS', 5))
+    # Seconds a check-in/out waits for its batch; later it answers 202 and the queued write still commits
+    WRITE_BEHIND_ACK_TIMEOUT = int(os.environ.get('WRITE_BEHIND_ACK_TIMEOUT', 10))
+
+    # Comma-separated keys accepted in the X-Terminal-Key header of badge terminals
+    TERMINAL_API_KEYS = [key.strip() for key in os.environ.get('TERMINAL_API_KEYS', '').split(',') if key.strip()]
+
+    # Maximum punches accepted by one bulk upload
+    BULK_PUNCH_MAX = int(os.environ.get('BULK_PUNCH_MAX', 20000))
+
+    # Seconds a response is replayed for a repeated Idempotency-Key, and keys kept in memory
+    IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 86400))
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', 10000))
+    # Seconds a key stays claimed by a request that died before storing its response
+    IDEMPOTENCY_PENDING_TTL = int(os.environ.get('IDEMPOTENCY_PENDING_TTL', 60))
+
+    # Password hashing: method and salt length for new hashes (older hashes are upgraded on login)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+
+    # Threads verifying passwords, operations allowed to run or wait, and seconds to wait for one
+    PASSWORD_VERIFY_WORKERS = int(os.environ.get('PASSWORD_VERIFY_WORKERS', 2))
+    PASSWORD_VERIFY_QUEUE = int(os.environ.get('PASSWORD_VERIFY_QUEUE', 64))
+    PASSWORD_VERIFY_TIMEOUT = int(os.environ.get('PASSWORD_VERIFY_TIMEOUT', 10))
+
+    # Failed-login throttling: token buckets per username and per client IP ('memory' or 'database' backend)
+    LOGIN_RATE_LIMIT_ENABLED = os.environ.get('LOGIN_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    LOGIN_RATE_LIMIT_BACKEND = os.environ.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+    LOGIN_RATE_LIMIT_MAX_KEYS = int(os.environ.get('LOGIN_RATE_LIMIT_MAX_KEYS', 100000))
+    LOGIN_USER_BURST = int(os.environ.get('LOGIN_USER_BURST', 5))
+    LOGIN_USER_PER_MINUTE = float(os.environ.get('LOGIN_USER_PER_MINUTE', 1))
+    LOGIN_IP_BURST = int(os.environ.get('LOGIN_IP_BURST', 20))
+    LOGIN_IP_PER_MINUTE = float(os.environ.get('LOGIN_IP_PER_MINUTE', 10))
+
+    # Logging: records are queued by request threads and written by a listener thread ('json' or 'text' format)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_FILE = os.environ.get('LOG_FILE')
+    LOG_FILE_MAX_BYTES = int(os.environ.get('LOG_FILE_MAX_BYTES', 10 * 1024 * 1024))
+    LOG_FILE_BACKUPS = int(os.environ.get('LOG_FILE_BACKUPS', 5))
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+    # Records below WARNING: kept fraction per logger ('requests=0.1,database=0.5') and per-logger records per second (0 disables)
+    LOG_SAMPLE_RATES = {
+        name.strip(): float(rate) for name, _, rate in
+        (item.partition('=') for item in os.environ.get('LOG_SAMPLE_RATES', '').split(',') if item.strip())
+    }
+    LOG_RATE_LIMIT = float(os.environ.get('LOG_RATE_LIMIT', 100))
+    LOG_RATE_BURST = int(os.environ.get('LOG_RATE_BURST', 200))
+
+    # SQL statement statistics per fingerprint, the slow-query threshold and EXPLAIN capture for slow SELECTs
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'true').lower() == 'true'
+    # Record bound parameters of slow calls; off by default since they may hold personal data
+    QUERY_STATS_PARAMS = os.environ.get('QUERY_STATS_PARAMS', 'false').lower() == 'true'
+    QUERY_STATS_MAX_FINGERPRINTS = int(os.environ.get('QUERY_STATS_MAX_FINGERPRINTS', 1000))
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+    QUERY_EXPLAIN_ENABLED = os.environ.get('QUERY_EXPLAIN_ENABLED', 'false').lower() == 'true'
+    
+    # Per-view SQL statement budgets: 'raise', 'warn' or 'off' (unset raises under TESTING and warns under DEBUG)
+    QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE')
+
+    # Prometheus metrics at /metrics; with METRICS_DIR each worker writes its values there and scrapes add them up
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', 10))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Bulk user import: processes hashing passwords (0 uses every CPU) and maximum rows per upload
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+    USER_IMPORT_MAX_ROWS = int(os.environ.get('USER_IMPORT_MAX_ROWS', 10000))
\ No newline at end of file
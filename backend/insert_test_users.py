@@ -2,11 +2,8 @@
 
 import os
 import sys
-from datetime import datetime
 from dotenv import load_dotenv
 from flask import Flask
-from werkzeug.security import generate_password_hash
-from sqlalchemy.exc import IntegrityError
 
 # Add the current directory to the path so we can import our models
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -28,8 +25,7 @@ from models import db
 db.init_app(app)
 
 # Import models after db is initialized to avoid circular imports
-from models.user import User
-from models.employee import Employee
+from utils.user_import import import_users
 
 # Test users data
 users_data = [
@@ -103,51 +99,18 @@ def insert_test_users():
             print(f"❌ Database connection failed: {str(e)}")
             return False
         
-        # Insert each user
-        users_created = 0
-        for user_data in users_data:
-            try:
-                # Check if user already exists
-                existing_user = User.query.filter_by(username=user_data['username']).first()
-                if existing_user:
-                    print(f"⚠️ User '{user_data['username']}' already exists, skipping...")
-                    continue
-                
-                # Create user
-                # Create user with hashed password
-                user = User(
-                    username=user_data['username'],
-                    password=user_data['password'],  # Password will be hashed in User model
-                    role=user_data['role']
-                )
-                db.session.add(user)
-                db.session.flush()  # Flush to get the user ID
-                
-                # Create employee record
-                employee = Employee(
-                    user_id=user.id,
-                    first_name=user_data['first_name'],
-                    last_name=user_data['last_name'],
-                    email=user_data['email'],
-                    phone=user_data.get('phone'),
-                    department=user_data.get('department'),
-                    position=user_data.get('position'),
-                    hire_date=datetime.now().date()
-                )
-                db.session.add(employee)
-                db.session.commit()
-                
-                print(f"✅ Created user: {user_data['username']} ({user_data['role']})")
-                users_created += 1
-                
-            except IntegrityError as e:
-                db.session.rollback()
-                print(f"❌ Error creating user '{user_data['username']}': {str(e)}")
-            except Exception as e:
-                db.session.rollback()
-                print(f"❌ Unexpected error creating user '{user_data['username']}': {str(e)}")
+        # Same path as the bulk import endpoint and `flask users import`
+        try:
+            with db.engine.begin() as conn:
+                summary = import_users(conn, users_data, workers=1)
+        except Exception as e:
+            print(f"❌ Unexpected error creating users: {str(e)}")
+            return False
+        
+        for error in summary['errors']:
+            print(f"⚠️ User '{error['username']}' skipped: {error['error']}")
         
-        print(f"\n✅ Successfully created {users_created} out of {len(users_data)} users")
+        print(f"\n✅ Successfully created {summary['created']} out of {len(users_data)} users")
         return True
 
 if __name__ == '__main__':
@@ -6,14 +6,21 @@ class Attendance(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+    work_date = db.Column(db.Date, nullable=False)
     check_in = db.Column(db.DateTime)
     check_out = db.Column(db.DateTime)
     status = db.Column(db.String(20), default='present')
     notes = db.Column(db.Text)
     
-    def __init__(self, employee_id, check_in=None, check_out=None, status='present', notes=None):
+    # One attendance record per employee and working day
+    __table_args__ = (
+        db.UniqueConstraint('employee_id', 'work_date', name='unique_employee_work_date'),
+    )
+    
+    def __init__(self, employee_id, check_in=None, check_out=None, status='present', notes=None, work_date=None):
         self.employee_id = employee_id
         self.check_in = check_in or datetime.utcnow()
+        self.work_date = work_date or self.check_in.date()
         self.check_out = check_out
         self.status = status
         self.notes = notes
@@ -28,12 +35,19 @@ class Attendance(db.Model):
         return self.check_out is not None
     
     def to_dict(self):
+        return Attendance.row_to_dict(self)
+    
+    @staticmethod
+    def row_to_dict(row):
+        """Serialize anything exposing the attendance columns, such as a query row"""
+        duration = row.check_out - row.check_in if row.check_in and row.check_out else None
         return {
-            'id': self.id,
-            'employee_id': self.employee_id,
-            'check_in': self.check_in.isoformat() if self.check_in else None,
-            'check_out': self.check_out.isoformat() if self.check_out else None,
-            'status': self.status,
-            'notes': self.notes,
-            'duration': str(self.duration) if self.duration else None
+            'id': row.id,
+            'employee_id': row.employee_id,
+            'work_date': row.work_date.isoformat() if row.work_date else None,
+            'check_in': row.check_in.isoformat() if row.check_in else None,
+            'check_out': row.check_out.isoformat() if row.check_out else None,
+            'status': row.status,
+            'notes': row.notes,
+            'duration': str(duration) if duration else None
         }
\ No newline at end of file
@@ -0,0 +1,30 @@
+from . import db
+
+class AttendanceDaily(db.Model):
+    __tablename__ = 'attendance_daily'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+    work_date = db.Column(db.Date, nullable=False)
+    minutes_worked = db.Column(db.Integer, nullable=False, default=0)
+    late = db.Column(db.Boolean, nullable=False, default=False)
+    early_departure = db.Column(db.Boolean, nullable=False, default=False)
+    overtime_minutes = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('employee_id', 'work_date', name='unique_daily_employee_date'),
+    )
+    
+    @property
+    def hours_worked(self):
+        return round((self.minutes_worked or 0) / 60, 2)
+    
+    def to_dict(self):
+        return {
+            'employee_id': self.employee_id,
+            'work_date': self.work_date.isoformat() if self.work_date else None,
+            'hours_worked': self.hours_worked,
+            'late': self.late,
+            'early_departure': self.early_departure,
+            'overtime_minutes': self.overtime_minutes
+        }
@@ -0,0 +1,34 @@
+from . import db
+
+class AttendanceMonthly(db.Model):
+    __tablename__ = 'attendance_monthly'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    days_worked = db.Column(db.Integer, nullable=False, default=0)
+    minutes_worked = db.Column(db.Integer, nullable=False, default=0)
+    late_days = db.Column(db.Integer, nullable=False, default=0)
+    early_departures = db.Column(db.Integer, nullable=False, default=0)
+    overtime_minutes = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('employee_id', 'year', 'month', name='unique_monthly_employee_month'),
+    )
+    
+    @property
+    def hours_worked(self):
+        return round((self.minutes_worked or 0) / 60, 2)
+    
+    def to_dict(self):
+        return {
+            'employee_id': self.employee_id,
+            'year': self.year,
+            'month': self.month,
+            'days_worked': self.days_worked,
+            'hours_worked': self.hours_worked,
+            'late_days': self.late_days,
+            'early_departures': self.early_departures,
+            'overtime_minutes': self.overtime_minutes
+        }
@@ -0,0 +1,8 @@
+from . import db
+
+class RateLimitBucket(db.Model):
+    __tablename__ = 'rate_limit_buckets'
+    
+    bucket_key = db.Column(db.String(200), primary_key=True)  # e.g. login:user:<username>
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)  # Unix time of the last refill
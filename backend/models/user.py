@@ -1,7 +1,40 @@
 from datetime import datetime
+from functools import lru_cache
+from flask import current_app, has_app_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from . import db
 
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256'
+DEFAULT_SALT_LENGTH = 16
+
+def password_hash_settings():
+    """Return the configured (method, salt_length) for new password hashes"""
+    if not has_app_context():
+        return DEFAULT_HASH_METHOD, DEFAULT_SALT_LENGTH
+    return (
+        current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD),
+        current_app.config.get('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH)
+    )
+
+def hash_password(password, method=None, salt_length=None):
+    """Hash a password the way User.set_password does; picklable for process pools"""
+    if method is None:
+        method, salt_length = password_hash_settings()
+    return generate_password_hash(password, method=method, salt_length=salt_length or DEFAULT_SALT_LENGTH)
+
+@lru_cache(maxsize=16)
+def _hash_prefix(method):
+    # Werkzeug fills in default iterations, so compare against what it actually writes
+    return generate_password_hash('', method=method, salt_length=1).split('$', 1)[0]
+
+def hash_is_current(password_hash, method=None, salt_length=None):
+    """Tell whether a stored hash already uses the configured method and salt length"""
+    if method is None:
+        method, salt_length = password_hash_settings()
+    
+    parts = password_hash.split('$')
+    return len(parts) == 3 and parts[0] == _hash_prefix(method) and len(parts[1]) == salt_length
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -20,11 +53,14 @@ class User(db.Model):
         self.role = role
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256', salt_length=16)
+        self.password_hash = hash_password(password)
         
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    def needs_rehash(self):
+        return not hash_is_current(self.password_hash)
+    
     def is_admin(self):
         return self.role == 'admin'
     
@@ -0,0 +1,28 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from utils.identity import admin_required
+from utils.query_stats import SORT_KEYS, query_stats
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/queries', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_query_stats():
+    limit = max(1, min(request.args.get('limit', 20, type=int), 200))
+    sort = request.args.get('sort', 'total_ms')
+    
+    if sort not in SORT_KEYS:
+        return jsonify({'message': 'Parámetros inválidos', 'error': f'sort debe ser uno de: {", ".join(SORT_KEYS)}'}), 400
+    
+    result = query_stats.stats()
+    result['slow_query_ms'] = query_stats.slow_ms
+    result['queries'] = query_stats.top(limit, sort)
+    return jsonify(result), 200
+
+@admin_bp.route('/queries', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def reset_query_stats():
+    query_stats.clear()
+    return jsonify({'message': 'Estadísticas de consultas reiniciadas'}), 200
@@ -1,48 +1,109 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, date, timedelta
-from models.user import User, db
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import datetime, date
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.exc import IntegrityError
+from models.user import db
 from models.employee import Employee
 from models.attendance import Attendance
-from models.work_schedule import WorkSchedule
+from models.team_member import TeamMember
+from utils.idempotency import idempotent
+from utils.identity import admin_required, self_or_admin_required, terminal_required
+from utils.pagination import (
+    cached_total, cursor_requested, get_limit, get_per_page, include_total_requested, paginate_keyset
+)
+from utils.etag import etag
+from utils.export import ATTENDANCE_ENCODER, stream_attendance_export
+from utils.punches import import_punches
+from utils.query_budget import allow_queries, query_budget
+from utils.readonly import paginate_rows, read_rows, table_columns
+from utils.response_cache import cached, invalidate_on_commit, model_tag
+from utils.rollups import (
+    apply_daily_rollups, compute_daily, is_early_departure, is_late, refresh_daily_rollups, scheduled_end
+)
+from utils.schedule_index import schedule_index
+from utils.serialization import RowEncoder, json_response
+from utils.sql import insert_ignore
+from utils.write_behind import QueueFull, write_behind
 
 attendance_bp = Blueprint('attendance', __name__)
 
+# Employee ids per IN list when resolving who is expected on site
+EXPECTED_CHUNK_SIZE = 500
+
+# Everything today's attendance overview is built from
+TODAY_TAGS = [model_tag(Employee), model_tag(Attendance), model_tag(TeamMember)]
+
+_ATTENDANCE_COLUMNS = table_columns(Attendance)
+
+# Rows of today's overview, read from Employee.id, first_name, last_name, ... and the coalesced status
+_TODAY_ENCODER = RowEncoder(
+    ['employee_id', 'employee_name', 'department', 'position', 'present', 'check_in', 'check_out', 'status'],
+    computed={
+        'employee_id': lambda columns: columns['id'],
+        'employee_name': lambda columns: [
+            f'{first_name} {last_name}' for first_name, last_name in zip(columns['first_name'], columns['last_name'])
+        ],
+        'present': lambda columns: [status != 'absent' for status in columns['status']]
+    }
+)
+
+def _today_context(user_id, today):
+    """Load the user's employee, today's attendance and today's schedule"""
+    row = db.session.query(Employee, Attendance).outerjoin(
+        Attendance, and_(Attendance.employee_id == Employee.id, Attendance.work_date == today)
+    ).filter(
+        Employee.user_id == user_id
+    ).first()
+    
+    if not row:
+        return None
+    
+    employee, attendance = row
+    return employee, attendance, schedule_index.get(employee.id, today.weekday())
+
+def _write_behind(kind, values, schedule):
+    """Queue a write for the group-commit writer and wait until its batch commits.
+    
+    Returns (result, None), or (None, response) when the queue is full (503,
+    nothing was written) or the batch did not commit within
+    WRITE_BEHIND_ACK_TIMEOUT. The write is still queued then and will most
+    likely commit, so the answer is 202 rather than an invitation to retry;
+    clients confirm it through /my-status.
+    """
+    # Release the pooled connection while waiting for the writer
+    db.session.rollback()
+    
+    try:
+        future = write_behind.submit(current_app._get_current_object(), kind, values, schedule)
+    except QueueFull:
+        response = jsonify({'message': 'Servicio saturado', 'error': 'Demasiados registros en cola, intente de nuevo'})
+        return None, (response, 503, {'Retry-After': '1'})
+    
+    try:
+        return future.result(timeout=current_app.config.get('WRITE_BEHIND_ACK_TIMEOUT', 10)), None
+    except FutureTimeout:
+        response = jsonify({'message': 'Registro pendiente de confirmación', 'status': 'pending'})
+        return None, (response, 202)
+
 @attendance_bp.route('/check-in', methods=['POST'])
+@query_budget(10)
 @jwt_required()
+@idempotent
 def check_in():
-    # Get current user
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
     
-    if not current_user:
-        return jsonify({'message': 'No autorizado', 'error': 'Usuario no válido'}), 403
+    # Get current time
+    now = datetime.now()
+    today = now.date()
     
-    # Get employee associated with user
-    employee = Employee.query.filter_by(user_id=current_user.id).first()
+    employee = db.session.query(Employee.id, Employee.status).filter(Employee.user_id == current_user_id).first()
     
-    if not employee or not employee.is_active():
+    if not employee or employee.status != 'active':
         return jsonify({'message': 'No autorizado', 'error': 'Empleado no encontrado o inactivo'}), 403
     
-    # Check if already checked in today
-    today = date.today()
-    today_start = datetime.combine(today, datetime.min.time())
-    today_end = datetime.combine(today, datetime.max.time())
-    
-    existing_attendance = Attendance.query.filter(
-        Attendance.employee_id == employee.id,
-        Attendance.check_in >= today_start,
-        Attendance.check_in <= today_end
-    ).first()
-    
-    if existing_attendance:
-        return jsonify({
-            'message': 'Ya has registrado entrada hoy',
-            'attendance': existing_attendance.to_dict()
-        }), 409
-    
-    # Get current time
-    now = datetime.now()
+    schedule = schedule_index.get(employee.id, now.weekday())
     
     # Create attendance record
     attendance = Attendance(
@@ -51,22 +112,65 @@ def check_in():
         status='present'
     )
     
-    # Check if late based on schedule
-    today_weekday = now.weekday()  # 0=Monday, 6=Sunday
-    schedule = WorkSchedule.query.filter_by(
-        employee_id=employee.id,
-        day_of_week=today_weekday
-    ).first()
-    
-    if schedule:
-        scheduled_start = datetime.combine(today, schedule.start_time)
-        # If more than 10 minutes late, mark as late
-        if now > scheduled_start + timedelta(minutes=10):
-            attendance.status = 'late'
-            attendance.notes = f'Llegada tardía. Hora programada: {schedule.start_time.strftime("%H:%M")}'
+    # More than 10 minutes after the scheduled start is late
+    if schedule and is_late(now, schedule.start_time):
+        attendance.status = 'late'
+        attendance.notes = f'Llegada tardía. Hora programada: {schedule.start_time.strftime("%H:%M")}'
+    
+    if current_app.config.get('WRITE_BEHIND_ENABLED'):
+        try:
+            attendance.id, error = _write_behind('check_in', {
+                'employee_id': attendance.employee_id,
+                'work_date': attendance.work_date,
+                'check_in': attendance.check_in,
+                'status': attendance.status,
+                'notes': attendance.notes
+            }, (schedule.start_time, schedule.end_time) if schedule else None)
+        except Exception as e:
+            return jsonify({'message': 'Error al registrar entrada', 'error': str(e)}), 500
+        
+        if error:
+            return error
+        
+        if attendance.id is None:
+            existing_attendance = Attendance.query.filter_by(employee_id=employee.id, work_date=today).first()
+            return jsonify({
+                'message': 'Ya has registrado entrada hoy',
+                'attendance': existing_attendance.to_dict() if existing_attendance else None
+            }), 409
+        
+        return jsonify({
+            'message': 'Entrada registrada exitosamente',
+            'attendance': attendance.to_dict()
+        }), 201
     
     try:
-        db.session.add(attendance)
+        # The unique (employee_id, work_date) key rejects a second check-in for the day
+        statement = insert_ignore(Attendance.__table__, ['employee_id', 'work_date'], db.engine)
+        result = db.session.execute(statement.values(
+            employee_id=attendance.employee_id,
+            work_date=attendance.work_date,
+            check_in=attendance.check_in,
+            status=attendance.status,
+            notes=attendance.notes
+        ))
+        
+        if result.rowcount == 0:
+            db.session.rollback()
+            existing_attendance = Attendance.query.filter_by(employee_id=employee.id, work_date=today).first()
+            return jsonify({
+                'message': 'Ya has registrado entrada hoy',
+                'attendance': existing_attendance.to_dict() if existing_attendance else None
+            }), 409
+        
+        attendance.id = result.inserted_primary_key[0]
+        
+        # Keep the day's rollup in the same transaction
+        apply_daily_rollups(db.session.connection(), [compute_daily(
+            attendance.employee_id, attendance.work_date, attendance.check_in, None, attendance.status,
+            (schedule.start_time, schedule.end_time) if schedule else None
+        )])
+        
         db.session.commit()
         
         return jsonify({
@@ -79,31 +183,23 @@ def check_in():
         return jsonify({'message': 'Error al registrar entrada', 'error': str(e)}), 500
 
 @attendance_bp.route('/check-out', methods=['POST'])
+@query_budget(9)
 @jwt_required()
+@idempotent
 def check_out():
-    # Get current user
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
     
-    if not current_user:
-        return jsonify({'message': 'No autorizado', 'error': 'Usuario no válido'}), 403
+    # Get current time
+    now = datetime.now()
+    today = now.date()
     
-    # Get employee associated with user
-    employee = Employee.query.filter_by(user_id=current_user.id).first()
+    # Resolve employee and today's attendance record in one query, the schedule from the index
+    context = _today_context(current_user_id, today)
     
-    if not employee or not employee.is_active():
+    if not context or not context[0].is_active():
         return jsonify({'message': 'No autorizado', 'error': 'Empleado no encontrado o inactivo'}), 403
     
-    # Find today's attendance record
-    today = date.today()
-    today_start = datetime.combine(today, datetime.min.time())
-    today_end = datetime.combine(today, datetime.max.time())
-    
-    attendance = Attendance.query.filter(
-        Attendance.employee_id == employee.id,
-        Attendance.check_in >= today_start,
-        Attendance.check_in <= today_end
-    ).first()
+    _, attendance, schedule = context
     
     if not attendance:
         return jsonify({'message': 'Error', 'error': 'No has registrado entrada hoy'}), 404
@@ -111,27 +207,62 @@ def check_out():
     if attendance.is_checked_out():
         return jsonify({'message': 'Ya has registrado salida hoy', 'attendance': attendance.to_dict()}), 409
     
-    # Get current time
-    now = datetime.now()
+    # Changes are written with a conditional UPDATE below, not by the unit of work
+    db.session.expunge(attendance)
     
     # Update attendance record
     attendance.check_out = now
     
     # Check if early departure based on schedule
-    today_weekday = now.weekday()  # 0=Monday, 6=Sunday
-    schedule = WorkSchedule.query.filter_by(
-        employee_id=employee.id,
-        day_of_week=today_weekday
-    ).first()
-    
-    if schedule:
-        scheduled_end = datetime.combine(today, schedule.end_time)
-        # If more than 10 minutes early, note early departure
-        if now < scheduled_end - timedelta(minutes=10):
-            attendance.notes = (attendance.notes or '') + '\nSalida temprana. '
-            attendance.notes += f'Hora programada: {schedule.end_time.strftime("%H:%M")}'
+    # More than 10 minutes before the scheduled end is an early departure
+    if schedule and is_early_departure(now, scheduled_end(attendance.work_date, schedule.start_time, schedule.end_time)):
+        attendance.notes = (attendance.notes or '') + '\nSalida temprana. '
+        attendance.notes += f'Hora programada: {schedule.end_time.strftime("%H:%M")}'
+    
+    if current_app.config.get('WRITE_BEHIND_ENABLED'):
+        try:
+            updated, error = _write_behind('check_out', {
+                'id': attendance.id,
+                'employee_id': attendance.employee_id,
+                'work_date': attendance.work_date,
+                'check_in': attendance.check_in,
+                'check_out': attendance.check_out,
+                'status': attendance.status,
+                'notes': attendance.notes
+            }, (schedule.start_time, schedule.end_time) if schedule else None)
+        except Exception as e:
+            return jsonify({'message': 'Error al registrar salida', 'error': str(e)}), 500
+        
+        if error:
+            return error
+        
+        if not updated:
+            return jsonify({'message': 'Ya has registrado salida hoy', 'attendance': attendance.to_dict()}), 409
+        
+        return jsonify({
+            'message': 'Salida registrada exitosamente',
+            'attendance': attendance.to_dict()
+        }), 200
     
     try:
+        # Only the first concurrent check-out for the record wins
+        result = db.session.execute(
+            update(Attendance.__table__).where(
+                Attendance.__table__.c.id == attendance.id,
+                Attendance.__table__.c.check_out.is_(None)
+            ).values(check_out=attendance.check_out, notes=attendance.notes)
+        )
+        
+        if result.rowcount == 0:
+            db.session.rollback()
+            return jsonify({'message': 'Ya has registrado salida hoy', 'attendance': attendance.to_dict()}), 409
+        
+        # Keep the day's rollup in the same transaction
+        apply_daily_rollups(db.session.connection(), [compute_daily(
+            attendance.employee_id, attendance.work_date, attendance.check_in, attendance.check_out,
+            attendance.status, (schedule.start_time, schedule.end_time) if schedule else None
+        )])
+        
         db.session.commit()
         
         return jsonify({
@@ -143,142 +274,274 @@ def check_out():
         db.session.rollback()
         return jsonify({'message': 'Error al registrar salida', 'error': str(e)}), 500
 
+@attendance_bp.route('/punches/bulk', methods=['POST'])
+@query_budget(4)
+@terminal_required
+def upload_punches():
+    data = request.get_json(silent=True)
+    
+    if not data or not isinstance(data.get('punches'), list):
+        return jsonify({'message': 'Datos incompletos', 'error': 'Se requiere una lista de marcaciones'}), 400
+    
+    max_punches = current_app.config.get('BULK_PUNCH_MAX', 20000)
+    if len(data['punches']) > max_punches:
+        return jsonify({
+            'message': 'Demasiadas marcaciones',
+            'error': f'Se permiten como máximo {max_punches} marcaciones por envío'
+        }), 413
+    
+    try:
+        summary = import_punches(db.session.connection(), data['punches'])
+        invalidate_on_commit([model_tag(Attendance)])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Error al registrar marcaciones', 'error': str(e)}), 500
+    
+    summary['message'] = 'Marcaciones procesadas'
+    return jsonify(summary), 200
+
 @attendance_bp.route('/employee/<int:employee_id>', methods=['GET'])
+@query_budget(4)
 @jwt_required()
+@self_or_admin_required('No tiene permisos para ver esta asistencia')
 def get_employee_attendance(employee_id):
-    # Check if user is admin or the employee themselves
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user:
-        return jsonify({'message': 'No autorizado', 'error': 'Usuario no válido'}), 403
-    
     employee = Employee.query.get(employee_id)
     
     if not employee:
         return jsonify({'message': 'Empleado no encontrado', 'error': 'El empleado no existe'}), 404
     
-    # Only admins or the employee themselves can view attendance
-    if not current_user.is_admin() and current_user.id != employee.user_id:
-        return jsonify({'message': 'No autorizado', 'error': 'No tiene permisos para ver esta asistencia'}), 403
-    
     # Get query parameters
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    per_page = get_per_page()
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    # Build query
-    query = Attendance.query.filter_by(employee_id=employee.id)
+    # Build query; plain rows are encoded column by column instead of through to_dict()
+    query = select(*_ATTENDANCE_COLUMNS).where(Attendance.employee_id == employee.id)
     
     if start_date:
         start = datetime.strptime(start_date, '%Y-%m-%d')
-        query = query.filter(Attendance.check_in >= start)
+        query = query.where(Attendance.check_in >= start)
     
     if end_date:
         end = datetime.strptime(end_date, '%Y-%m-%d')
         end = datetime.combine(end, datetime.max.time())
-        query = query.filter(Attendance.check_in <= end)
+        query = query.where(Attendance.check_in <= end)
+    
+    # Cursor mode avoids the OFFSET scan and the COUNT(*) on every page
+    if cursor_requested():
+        try:
+            records, next_cursor = paginate_keyset(
+                query, [Attendance.work_date, Attendance.id], get_limit(),
+                request.args.get('cursor'), descending=True
+            )
+        except ValueError:
+            return jsonify({'message': 'Parámetros inválidos', 'error': 'El cursor no es válido'}), 400
+        
+        result = {
+            'employee_id': employee.id,
+            'employee_name': employee.full_name,
+            'next_cursor': next_cursor
+        }
+        if include_total_requested():
+            result['total'] = cached_total(query)
+        
+        return json_response(result, attendance_records=ATTENDANCE_ENCODER.encode_list(records))
     
     # Execute query with pagination
-    attendance_records = query.order_by(Attendance.check_in.desc()).paginate(page=page, per_page=per_page)
+    attendance_records = paginate_rows(query.order_by(Attendance.work_date.desc(), Attendance.id.desc()), page, per_page)
     
     # Format response
     result = {
         'employee_id': employee.id,
         'employee_name': employee.full_name,
-        'attendance_records': [record.to_dict() for record in attendance_records.items],
         'total': attendance_records.total,
         'pages': attendance_records.pages,
         'current_page': attendance_records.page
     }
     
-    return jsonify(result), 200
+    return json_response(result, attendance_records=ATTENDANCE_ENCODER.encode_list(attendance_records.items))
+
+@attendance_bp.route('/export', methods=['GET'])
+@query_budget(1)
+@jwt_required()
+@admin_required
+def export_attendance():
+    # Get query parameters
+    export_format = request.args.get('format', 'csv')
+    compress = request.args.get('gzip', 'false').lower() in ('1', 'true', 'yes')
+    department = request.args.get('department')
+    
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'message': 'Parámetros inválidos', 'error': 'El formato debe ser csv o ndjson'}), 400
+    
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() if request.args.get('start_date') else None
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() if request.args.get('end_date') else None
+    except ValueError:
+        return jsonify({'message': 'Parámetros inválidos', 'error': 'Las fechas deben tener el formato YYYY-MM-DD'}), 400
+    
+    # Attendance rows joined with the employee columns the export needs
+    attendance = Attendance.__table__
+    employees = Employee.__table__
+    statement = select(
+        attendance.c.id, attendance.c.employee_id, attendance.c.work_date,
+        attendance.c.check_in, attendance.c.check_out, attendance.c.status, attendance.c.notes,
+        employees.c.first_name, employees.c.last_name, employees.c.department
+    ).select_from(
+        attendance.join(employees, employees.c.id == attendance.c.employee_id)
+    ).order_by(attendance.c.work_date, attendance.c.id)
+    
+    if start_date:
+        statement = statement.where(attendance.c.work_date >= start_date)
+    
+    if end_date:
+        statement = statement.where(attendance.c.work_date <= end_date)
+    
+    if department:
+        statement = statement.where(employees.c.department == department)
+    
+    chunks = stream_attendance_export(
+        db.engine, statement, export_format, compress, current_app.config['EXPORT_CHUNK_SIZE']
+    )
+    
+    filename = f'asistencia.{export_format}' + ('.gz' if compress else '')
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    headers = {'Content-Disposition': f'attachment; filename={filename}'}
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    
+    return Response(chunks, mimetype=mimetype, headers=headers)
 
 @attendance_bp.route('/today', methods=['GET'])
+@query_budget(3)
 @jwt_required()
+@admin_required
+@etag(TODAY_TAGS, vary=lambda: date.today().isoformat())
+@cached(TODAY_TAGS, vary=lambda: date.today().isoformat())
 def get_today_attendance():
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    today = date.today()
     
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
+    # Get query parameters
+    limit = get_limit()
+    cursor = request.args.get('cursor')
+    department = request.args.get('department')
+    team_id = request.args.get('team_id', type=int)
+    status = request.args.get('status')
+    
+    # Active employees left-joined with today's attendance record
+    status_column = func.coalesce(Attendance.status, 'absent')
+    joined = Employee.__table__.outerjoin(
+        Attendance.__table__, and_(Attendance.employee_id == Employee.id, Attendance.work_date == today)
+    )
+    conditions = [Employee.status == 'active']
     
-    # Get today's date range
-    today = date.today()
-    today_start = datetime.combine(today, datetime.min.time())
-    today_end = datetime.combine(today, datetime.max.time())
+    if department:
+        conditions.append(Employee.department == department)
+    
+    if team_id:
+        conditions.append(Employee.id.in_(
+            select(TeamMember.employee_id).where(TeamMember.team_id == team_id)
+        ))
+    
+    # Summary counts for the filtered population
+    counts = dict(read_rows(
+        select(status_column, func.count()).select_from(joined).where(*conditions).group_by(status_column)
+    ))
+    total = sum(counts.values())
     
-    # Get all attendance records for today
-    attendance_records = Attendance.query.filter(
-        Attendance.check_in >= today_start,
-        Attendance.check_in <= today_end
-    ).all()
+    # Current page, ordered by employee id
+    page_query = select(
+        Employee.id, Employee.first_name, Employee.last_name, Employee.department, Employee.position,
+        Attendance.check_in, Attendance.check_out, status_column.label('status')
+    ).select_from(joined).where(*conditions)
     
-    # Get all active employees
-    active_employees = Employee.query.filter_by(status='active').all()
+    if status:
+        page_query = page_query.where(status_column == status)
+    
+    try:
+        rows, next_cursor = paginate_keyset(page_query, [Employee.id], limit, cursor)
+    except ValueError:
+        return jsonify({'message': 'Parámetros inválidos', 'error': 'El cursor no es válido'}), 400
+    
+    return json_response({
+        'date': today.isoformat(),
+        'total_employees': total,
+        'present': total - counts.get('absent', 0),
+        'late': counts.get('late', 0),
+        'absent': counts.get('absent', 0),
+        'next_cursor': next_cursor
+    }, attendance=_TODAY_ENCODER.encode_list(rows))
+
+@attendance_bp.route('/expected-now', methods=['GET'])
+@query_budget(2)
+@jwt_required()
+@admin_required
+def get_expected_now():
+    now = datetime.now()
+    today = now.date()
+    department = request.args.get('department')
     
-    # Create a dictionary of employee_id -> attendance record
-    attendance_dict = {record.employee_id: record for record in attendance_records}
+    # Scheduled employees come from the in-memory index in one vectorized pass
+    expected_ids = schedule_index.expected_at(now.weekday(), now.hour * 60 + now.minute).tolist()
     
-    # Create result with attendance status for all employees
     result = []
-    for employee in active_employees:
-        attendance = attendance_dict.get(employee.id)
-        result.append({
-            'employee_id': employee.id,
-            'employee_name': employee.full_name,
-            'department': employee.department,
-            'position': employee.position,
-            'present': attendance is not None,
-            'check_in': attendance.check_in.isoformat() if attendance and attendance.check_in else None,
-            'check_out': attendance.check_out.isoformat() if attendance and attendance.check_out else None,
-            'status': attendance.status if attendance else 'absent'
-        })
+    for i in range(0, len(expected_ids), EXPECTED_CHUNK_SIZE):
+        allow_queries(1)
+        query = db.session.query(
+            Employee.id, Employee.first_name, Employee.last_name, Employee.department,
+            Attendance.check_in, Attendance.check_out, Attendance.status
+        ).outerjoin(
+            Attendance, and_(Attendance.employee_id == Employee.id, Attendance.work_date == today)
+        ).filter(
+            Employee.id.in_(expected_ids[i:i + EXPECTED_CHUNK_SIZE]),
+            Employee.status == 'active'
+        )
+        
+        if department:
+            query = query.filter(Employee.department == department)
+        
+        result.extend({
+            'employee_id': row.id,
+            'employee_name': f'{row.first_name} {row.last_name}',
+            'department': row.department,
+            'on_site': row.check_in is not None and row.check_out is None,
+            'check_in': row.check_in.isoformat() if row.check_in else None,
+            'check_out': row.check_out.isoformat() if row.check_out else None,
+            'status': row.status or 'absent'
+        } for row in query.order_by(Employee.id).all())
     
     return jsonify({
-        'date': today.isoformat(),
-        'total_employees': len(active_employees),
-        'present': len(attendance_records),
-        'absent': len(active_employees) - len(attendance_records),
-        'attendance': result
+        'timestamp': now.isoformat(),
+        'expected': len(result),
+        'on_site': sum(1 for row in result if row['on_site']),
+        'employees': result
     }), 200
 
+@attendance_bp.route('/ingest/stats', methods=['GET'])
+@query_budget(1)
+@jwt_required()
+@admin_required
+def get_ingest_stats():
+    stats = write_behind.stats()
+    stats['enabled'] = bool(current_app.config.get('WRITE_BEHIND_ENABLED'))
+    return jsonify(stats), 200
+
 @attendance_bp.route('/my-status', methods=['GET'])
+@query_budget(1)
 @jwt_required()
 def get_my_attendance_status():
-    # Get current user
     current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user:
-        return jsonify({'message': 'No autorizado', 'error': 'Usuario no válido'}), 403
+    today = date.today()
     
-    # Get employee associated with user
-    employee = Employee.query.filter_by(user_id=current_user.id).first()
+    # Resolve employee and today's attendance record in one query, the schedule from the index
+    context = _today_context(current_user_id, today)
     
-    if not employee or not employee.is_active():
+    if not context or not context[0].is_active():
         return jsonify({'message': 'No autorizado', 'error': 'Empleado no encontrado o inactivo'}), 403
     
-    # Get today's date range
-    today = date.today()
-    today_start = datetime.combine(today, datetime.min.time())
-    today_end = datetime.combine(today, datetime.max.time())
-    
-    # Find today's attendance record
-    attendance = Attendance.query.filter(
-        Attendance.employee_id == employee.id,
-        Attendance.check_in >= today_start,
-        Attendance.check_in <= today_end
-    ).first()
-    
-    # Get today's schedule
-    today_weekday = datetime.now().weekday()  # 0=Monday, 6=Sunday
-    schedule = WorkSchedule.query.filter_by(
-        employee_id=employee.id,
-        day_of_week=today_weekday
-    ).first()
+    employee, attendance, schedule = context
     
     result = {
         'date': today.isoformat(),
@@ -294,15 +557,10 @@ def get_my_attendance_status():
     return jsonify(result), 200
 
 @attendance_bp.route('/<int:attendance_id>', methods=['PUT'])
+@query_budget(12)
 @jwt_required()
+@admin_required
 def update_attendance(attendance_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     attendance = Attendance.query.get(attendance_id)
     
     if not attendance:
@@ -313,10 +571,14 @@ def update_attendance(attendance_id):
     if not data:
         return jsonify({'message': 'Datos incompletos', 'error': 'No se proporcionaron datos para actualizar'}), 400
     
+    # Rollups of the original day must be refreshed too if the record moves
+    affected_days = {(attendance.employee_id, attendance.work_date)}
+    
     try:
         # Update attendance fields
         if 'check_in' in data:
             attendance.check_in = datetime.fromisoformat(data['check_in'])
+            attendance.work_date = attendance.check_in.date()
         if 'check_out' in data:
             attendance.check_out = datetime.fromisoformat(data['check_out']) if data['check_out'] else None
         if 'status' in data:
@@ -324,6 +586,10 @@ def update_attendance(attendance_id):
         if 'notes' in data:
             attendance.notes = data['notes']
         
+        db.session.flush()
+        affected_days.add((attendance.employee_id, attendance.work_date))
+        refresh_daily_rollups(db.session.connection(), affected_days)
+        
         db.session.commit()
         
         return jsonify({
@@ -331,6 +597,9 @@ def update_attendance(attendance_id):
             'attendance': attendance.to_dict()
         }), 200
         
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'Error al actualizar registro', 'error': 'Ya existe un registro de asistencia para ese día'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Error al actualizar registro', 'error': str(e)}), 500
\ No newline at end of file
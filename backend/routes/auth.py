@@ -1,56 +1,98 @@
-from flask import Blueprint, request, jsonify
+import csv
+from flask import Blueprint, current_app, request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from models.user import User, db
 from models.employee import Employee
-from utils.db_logger import log_database_query, log_query_details, log_error
+from sqlalchemy.orm import joinedload
+from utils.db_logger import log_error
+from utils.idempotency import idempotent
+from utils.identity import admin_required, identity_claims
+from utils.passwords import VerifierBusy, password_verifier
+from utils.query_budget import query_budget
+from utils.rate_limit import login_limiter
+from utils.response_cache import invalidate_on_commit, model_tag
+from utils.search_index import employee_search
+from utils.user_import import import_users, parse_import, validate_user
 
 auth_bp = Blueprint('auth', __name__)
 
+def _verifier_busy():
+    return jsonify({
+        'message': 'Servicio saturado',
+        'error': 'Demasiados inicios de sesión en curso, intente de nuevo'
+    }), 503, {'Retry-After': '1'}
+
 @auth_bp.route('/login', methods=['POST'])
+@query_budget(8)
 def login():
     data = request.get_json()
     
     if not data or not data.get('username') or not data.get('password'):
         return jsonify({'message': 'Datos incompletos', 'error': 'Se requiere nombre de usuario y contraseña'}), 400
     
+    # Throttled keys are turned away before any query or password hash
+    client_ip = request.remote_addr or 'unknown'
+    retry_after = login_limiter.reserve(data['username'], client_ip)
+    if retry_after:
+        return jsonify({
+            'message': 'Demasiados intentos',
+            'error': 'Demasiados intentos fallidos, intente más tarde'
+        }), 429, {'Retry-After': str(retry_after)}
+    
+    failed = False
     try:
-        # Log the query details
-        log_query_details("User.query.filter_by(username=?).first()", {"username": data['username']})
-        user = User.query.filter_by(username=data['username']).first()
+        user = User.query.options(joinedload(User.employee)).filter_by(username=data['username']).first()
         
-        if not user or not user.check_password(data['password']):
+        # Verification runs on the bounded password executor, not on the request thread
+        if not user or not password_verifier.verify(user.password_hash, data['password']):
+            failed = True
+            login_limiter.record_failure(data['username'], client_ip)
             return jsonify({'message': 'Credenciales inválidas', 'error': 'Usuario o contraseña incorrectos'}), 401
         
-        # Create access token
-        access_token = create_access_token(identity=user.id)
+        # Upgrade hashes made with older parameters while the plain password is at hand
+        if user.needs_rehash():
+            user.password_hash = password_verifier.hash(data['password'])
+            db.session.commit()
+        
+        # Create access token carrying the claims used for authorization
+        access_token = create_access_token(identity=user.id, additional_claims=identity_claims(user))
         
         return jsonify({
             'message': 'Inicio de sesión exitoso',
             'access_token': access_token,
             'user': user.to_dict()
         }), 200
+    except VerifierBusy:
+        return _verifier_busy()
     except Exception as e:
         log_error(e, "Login attempt failed")
         return jsonify({'message': 'Error en el inicio de sesión', 'error': str(e)}), 500
+    finally:
+        # Only a wrong password keeps the token reserved above
+        if not failed:
+            login_limiter.refund(data['username'], client_ip)
+
+@auth_bp.route('/login/limits', methods=['GET'])
+@query_budget(2)
+@jwt_required()
+@admin_required
+def get_login_limits():
+    return jsonify(login_limiter.stats()), 200
 
 @auth_bp.route('/register', methods=['POST'])
+@query_budget(11)
 @jwt_required()
+@admin_required
+@idempotent
 def register():
-    # Only admins can register new users
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     data = request.get_json()
     
-    required_fields = ['username', 'password', 'role', 'first_name', 'last_name', 'email']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({'message': 'Datos incompletos', 'error': f'Se requiere el campo {field}'}), 400
+    # Same rules as the bulk import
+    error = validate_user(data)
+    if error:
+        return jsonify({'message': 'Datos incompletos', 'error': error}), 400
     
     # Check if username already exists
     if User.query.filter_by(username=data['username']).first():
@@ -61,9 +103,7 @@ def register():
         return jsonify({'message': 'Error de registro', 'error': 'El correo electrónico ya está registrado'}), 409
     
     try:
-        # Start a transaction
-        db.session.begin()
-        
+        # The session is already inside the transaction begun by the checks above
         # Create user
         user = User(username=data['username'], password=data['password'], role=data['role'])
         db.session.add(user)
@@ -78,7 +118,7 @@ def register():
             phone=data.get('phone'),
             department=data.get('department'),
             position=data.get('position'),
-            hire_date=datetime.strptime(data.get('hire_date', datetime.now().strftime('%Y-%m-%d')), '%Y-%m-%d').date()
+            hire_date=datetime.strptime(data.get('hire_date') or datetime.now().strftime('%Y-%m-%d'), '%Y-%m-%d').date()
         )
         db.session.add(employee)
         
@@ -94,7 +134,47 @@ def register():
         db.session.rollback()
         return jsonify({'message': 'Error al registrar usuario', 'error': str(e)}), 500
 
+@auth_bp.route('/register/bulk', methods=['POST'])
+@query_budget(1)
+@jwt_required()
+@admin_required
+def register_bulk():
+    # CSV as an uploaded file or request body, JSON as a list or {"users": [...]}
+    upload = request.files.get('file')
+    if upload:
+        content = upload.read().decode('utf-8-sig')
+        import_format = 'json' if upload.filename.lower().endswith('.json') else 'csv'
+    else:
+        content = request.get_data(as_text=True)
+        import_format = 'csv' if request.mimetype == 'text/csv' else 'json'
+    
+    try:
+        rows = parse_import(content, import_format)
+    except (ValueError, csv.Error) as e:
+        return jsonify({'message': 'Datos inválidos', 'error': str(e)}), 400
+    
+    max_rows = current_app.config.get('USER_IMPORT_MAX_ROWS', 10000)
+    if len(rows) > max_rows:
+        return jsonify({
+            'message': 'Demasiados usuarios',
+            'error': f'Se permiten como máximo {max_rows} usuarios por importación'
+        }), 413
+    
+    try:
+        summary = import_users(db.session.connection(), rows, current_app.config.get('PASSWORD_HASH_WORKERS'))
+        invalidate_on_commit([model_tag(Employee)])
+        db.session.commit()
+        # Core inserts bypass the session events that keep the search index current
+        employee_search.expire()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Error al importar usuarios', 'error': str(e)}), 500
+    
+    summary['message'] = 'Importación completada'
+    return jsonify(summary), 201 if summary['created'] else 200
+
 @auth_bp.route('/profile', methods=['GET'])
+@query_budget(2)
 @jwt_required()
 def get_profile():
     current_user_id = get_jwt_identity()
@@ -114,6 +194,7 @@ def get_profile():
     }), 200
 
 @auth_bp.route('/change-password', methods=['PUT'])
+@query_budget(2)
 @jwt_required()
 def change_password():
     current_user_id = get_jwt_identity()
@@ -127,15 +208,17 @@ def change_password():
     if not data or not data.get('current_password') or not data.get('new_password'):
         return jsonify({'message': 'Datos incompletos', 'error': 'Se requiere la contraseña actual y la nueva'}), 400
     
-    if not user.check_password(data['current_password']):
-        return jsonify({'message': 'Contraseña incorrecta', 'error': 'La contraseña actual es incorrecta'}), 401
-    
     try:
-        user.set_password(data['new_password'])
+        if not password_verifier.verify(user.password_hash, data['current_password']):
+            return jsonify({'message': 'Contraseña incorrecta', 'error': 'La contraseña actual es incorrecta'}), 401
+        
+        user.password_hash = password_verifier.hash(data['new_password'])
         db.session.commit()
         
         return jsonify({'message': 'Contraseña actualizada exitosamente'}), 200
         
+    except VerifierBusy:
+        return _verifier_busy()
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Error al actualizar contraseña', 'error': str(e)}), 500
\ No newline at end of file
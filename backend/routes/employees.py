@@ -1,111 +1,134 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 import logging
-from models.user import User, db
+from models.user import db
 from models.employee import Employee
 from models.work_schedule import WorkSchedule
+from sqlalchemy import select
+from utils.etag import etag
+from utils.identity import current_identity, admin_required, self_or_admin_required
+from utils.pagination import (
+    cached_total, cursor_requested, get_limit, get_per_page, include_total_requested, paginate_keyset
+)
+from utils.query_budget import query_budget
+from utils.readonly import paginate_rows, table_columns
+from utils.response_cache import cached, model_tag
+from utils.schedule_index import schedule_index
+from utils.search_index import employee_search
+from utils.serialization import RowEncoder, json_response
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 employees_bp = Blueprint('employees', __name__)
 
+# The list reads plain rows shaped like Employee.to_dict()
+EMPLOYEE_FIELDS = [
+    'id', 'user_id', 'first_name', 'last_name', 'email', 'phone', 'department', 'position', 'hire_date', 'status'
+]
+_EMPLOYEE_COLUMNS = table_columns(Employee, *EMPLOYEE_FIELDS)
+EMPLOYEE_ENCODER = RowEncoder(EMPLOYEE_FIELDS)
+
+def _employee_tags(employee_id):
+    """Cache tags of the employee detail and schedule views"""
+    return [model_tag(Employee, id=employee_id), model_tag(WorkSchedule, employee_id=employee_id)]
+
 @employees_bp.route('/', methods=['GET'])
+@query_budget(3)
 @jwt_required()
+@etag([model_tag(Employee)])
 def get_employees():
     try:
-        # Log request details
-        logger.info('GET /api/employees - Fetching employees list')
-        logger.info(f'Request args: {request.args}')
-        
         # Check if user is admin
-        current_user_id = get_jwt_identity()
-        logger.info(f'User ID: {current_user_id} attempting to access employees list')
+        identity = current_identity()
         
-        current_user = User.query.get(current_user_id)
-        if not current_user:
-            logger.error(f'User not found for ID: {current_user_id}')
+        if not identity:
+            logger.error('User not found for ID: %s', get_jwt_identity())
             return jsonify({'message': 'No autorizado', 'error': 'Usuario no encontrado'}), 403
         
-        logger.info(f'User role: {current_user.role}')
-        if not current_user.is_admin():
-            logger.warning(f'Non-admin user {current_user_id} attempted to access employees list')
+        if not identity.is_admin:
+            logger.warning('Non-admin user %s attempted to access employees list', identity.user_id)
             return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
         
         # Get query parameters
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        per_page = get_per_page()
         department = request.args.get('department')
         status = request.args.get('status')
         search = request.args.get('search')
         
-        logger.info(f'Query params - page: {page}, per_page: {per_page}, department: {department}, status: {status}, search: {search}')
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Employees list requested by user %s', identity.user_id, extra={'params': request.args.to_dict()})
         
         # Build query
-        query = Employee.query
+        query = select(*_EMPLOYEE_COLUMNS)
         
         if department:
             query = query.filter(Employee.department == department)
-            logger.debug(f'Filtering by department: {department}')
         
         if status:
             query = query.filter(Employee.status == status)
-            logger.debug(f'Filtering by status: {status}')
         
-        if search:
-            search_term = f'%{search}%'
-            query = query.filter(
-                (Employee.first_name.ilike(search_term)) |
-                (Employee.last_name.ilike(search_term)) |
-                (Employee.email.ilike(search_term))
-            )
-            logger.debug(f'Filtering by search term: {search}')
+        if search and search.strip():
+            query = query.filter(employee_search.clause(search))
+        
+        # Cursor mode avoids the OFFSET scan and the COUNT(*) on every page
+        if cursor_requested():
+            try:
+                items, next_cursor = paginate_keyset(query, [Employee.last_name, Employee.id], get_limit(), request.args.get('cursor'))
+            except ValueError:
+                return jsonify({'message': 'Parámetros inválidos', 'error': 'El cursor no es válido'}), 400
+            
+            result = {'next_cursor': next_cursor}
+            if include_total_requested():
+                result['total'] = cached_total(query)
+            
+            logger.debug('Fetched %d employees in cursor mode', len(items))
+            return json_response(result, employees=EMPLOYEE_ENCODER.encode_list(items))
         
         # Execute query with pagination
-        employees = query.order_by(Employee.last_name).paginate(page=page, per_page=per_page)
-        logger.info(f'Query executed, found {employees.total} total employees')
+        employees = paginate_rows(query.order_by(Employee.last_name), page, per_page)
         
         # Format response
         result = {
-            'employees': [employee.to_dict() for employee in employees.items],
             'total': employees.total,
             'pages': employees.pages,
             'current_page': employees.page
         }
         
-        logger.info(f'Successfully fetched {len(employees.items)} employees for page {page}')
-        logger.debug(f'Response data: {result}')
-        return jsonify(result), 200
+        logger.debug('Fetched %d of %d employees for page %d', len(employees.items), employees.total, page)
+        return json_response(result, employees=EMPLOYEE_ENCODER.encode_list(employees.items))
         
     except Exception as e:
-        logger.error(f'Error fetching employees: {str(e)}')
-        logger.exception('Full traceback:')
+        logger.exception('Error fetching employees: %s', e)
         return jsonify({'message': 'Error al obtener empleados', 'error': str(e)}), 500
 
+@employees_bp.route('/search', methods=['GET'])
+@query_budget(2)
+@jwt_required()
+@admin_required
+def search_employees():
+    """Typeahead search over names and emails, served from the in-memory index"""
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', 10, type=int)
+    limit = max(1, min(limit or 10, current_app.config.get('SEARCH_MAX_LIMIT', 50)))
+    
+    return jsonify({'employees': employee_search.search(query, limit)}), 200
+
 @employees_bp.route('/<int:employee_id>', methods=['GET'])
+@query_budget(3)
 @jwt_required()
+@self_or_admin_required('No tiene permisos para ver este empleado')
+@etag(_employee_tags)
+@cached(_employee_tags)
 def get_employee(employee_id):
-    # Check if user is admin or the employee themselves
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user:
-        return jsonify({'message': 'No autorizado', 'error': 'Usuario no válido'}), 403
-    
     employee = Employee.query.get(employee_id)
     
     if not employee:
         return jsonify({'message': 'Empleado no encontrado', 'error': 'El empleado no existe'}), 404
     
-    # Only admins or the employee themselves can view details
-    if not current_user.is_admin() and current_user.id != employee.user_id:
-        return jsonify({'message': 'No autorizado', 'error': 'No tiene permisos para ver este empleado'}), 403
-    
     # Get work schedules
-    schedules = WorkSchedule.query.filter_by(employee_id=employee.id).all()
-    schedules_data = [schedule.to_dict() for schedule in schedules]
+    schedules_data = [schedule.to_dict() for schedule in schedule_index.for_employee(employee.id)]
     
     # Combine employee data with schedules
     employee_data = employee.to_dict()
@@ -114,15 +137,10 @@ def get_employee(employee_id):
     return jsonify(employee_data), 200
 
 @employees_bp.route('/<int:employee_id>', methods=['PUT'])
+@query_budget(4)
 @jwt_required()
+@admin_required
 def update_employee(employee_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     employee = Employee.query.get(employee_id)
     
     if not employee:
@@ -168,15 +186,10 @@ def update_employee(employee_id):
         return jsonify({'message': 'Error al actualizar empleado', 'error': str(e)}), 500
 
 @employees_bp.route('/<int:employee_id>', methods=['DELETE'])
+@query_budget(3)
 @jwt_required()
+@admin_required
 def delete_employee(employee_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     employee = Employee.query.get(employee_id)
     
     if not employee:
@@ -196,26 +209,18 @@ def delete_employee(employee_id):
         return jsonify({'message': 'Error al desactivar empleado', 'error': str(e)}), 500
 
 @employees_bp.route('/<int:employee_id>/schedules', methods=['GET'])
+@query_budget(3)
 @jwt_required()
+@self_or_admin_required('No tiene permisos para ver este horario')
+@etag(_employee_tags)
+@cached(_employee_tags)
 def get_employee_schedules(employee_id):
-    # Check if user is admin or the employee themselves
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user:
-        return jsonify({'message': 'No autorizado', 'error': 'Usuario no válido'}), 403
-    
     employee = Employee.query.get(employee_id)
     
     if not employee:
         return jsonify({'message': 'Empleado no encontrado', 'error': 'El empleado no existe'}), 404
     
-    # Only admins or the employee themselves can view schedules
-    if not current_user.is_admin() and current_user.id != employee.user_id:
-        return jsonify({'message': 'No autorizado', 'error': 'No tiene permisos para ver este horario'}), 403
-    
-    schedules = WorkSchedule.query.filter_by(employee_id=employee.id).all()
-    schedules_data = [schedule.to_dict() for schedule in schedules]
+    schedules_data = [schedule.to_dict() for schedule in schedule_index.for_employee(employee.id)]
     
     return jsonify({
         'employee_id': employee.id,
@@ -224,15 +229,10 @@ def get_employee_schedules(employee_id):
     }), 200
 
 @employees_bp.route('/<int:employee_id>/schedules', methods=['POST'])
+@query_budget(4)
 @jwt_required()
+@admin_required
 def add_employee_schedule(employee_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     employee = Employee.query.get(employee_id)
     
     if not employee:
@@ -269,15 +269,10 @@ def add_employee_schedule(employee_id):
         return jsonify({'message': 'Error al agregar horario', 'error': str(e)}), 500
 
 @employees_bp.route('/<int:employee_id>/schedules/<int:schedule_id>', methods=['DELETE'])
+@query_budget(3)
 @jwt_required()
+@admin_required
 def delete_employee_schedule(employee_id, schedule_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     schedule = WorkSchedule.query.get(schedule_id)
     
     if not schedule or schedule.employee_id != employee_id:
@@ -0,0 +1,132 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from datetime import date, datetime
+from sqlalchemy import select
+from models.user import db
+from models.employee import Employee
+from models.attendance_monthly import AttendanceMonthly
+from utils.identity import admin_required, self_or_admin_required
+from utils.pagination import get_limit, paginate_keyset
+from utils.readonly import table_columns
+from utils.serialization import RowEncoder, json_response
+from utils.timesheet import build_timesheet
+
+reports_bp = Blueprint('reports', __name__)
+
+_MONTHLY_COLUMNS = table_columns(
+    AttendanceMonthly, 'employee_id', 'year', 'month', 'days_worked', 'minutes_worked',
+    'late_days', 'early_departures', 'overtime_minutes'
+) + [Employee.first_name, Employee.last_name, Employee.department]
+
+# Monthly report rows as AttendanceMonthly.to_dict() plus the employee's name and department
+_MONTHLY_ENCODER = RowEncoder(
+    ['employee_id', 'year', 'month', 'days_worked', 'hours_worked', 'late_days', 'early_departures',
+     'overtime_minutes', 'employee_name', 'department'],
+    computed={
+        'hours_worked': lambda columns: [round((minutes or 0) / 60, 2) for minutes in columns['minutes_worked']],
+        'employee_name': lambda columns: [
+            f'{first_name} {last_name}' for first_name, last_name in zip(columns['first_name'], columns['last_name'])
+        ]
+    }
+)
+
+@reports_bp.route('/monthly', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_monthly_report():
+    # Get query parameters
+    today = date.today()
+    year = request.args.get('year', today.year, type=int)
+    month = request.args.get('month', today.month, type=int)
+    department = request.args.get('department')
+    
+    if not 1 <= month <= 12:
+        return jsonify({'message': 'Parámetros inválidos', 'error': 'El mes debe estar entre 1 y 12'}), 400
+    
+    # Served from the monthly rollup, one row per employee
+    query = select(*_MONTHLY_COLUMNS).join(
+        Employee.__table__, Employee.id == AttendanceMonthly.employee_id
+    ).where(
+        AttendanceMonthly.year == year,
+        AttendanceMonthly.month == month
+    )
+    
+    if department:
+        query = query.where(Employee.department == department)
+    
+    try:
+        rows, next_cursor = paginate_keyset(
+            query, [AttendanceMonthly.employee_id], get_limit(), request.args.get('cursor')
+        )
+    except ValueError:
+        return jsonify({'message': 'Parámetros inválidos', 'error': 'El cursor no es válido'}), 400
+    
+    return json_response({
+        'year': year,
+        'month': month,
+        'next_cursor': next_cursor
+    }, employees=_MONTHLY_ENCODER.encode_list(rows))
+
+@reports_bp.route('/employee/<int:employee_id>', methods=['GET'])
+@jwt_required()
+@self_or_admin_required('No tiene permisos para ver este reporte')
+def get_employee_report(employee_id):
+    employee = Employee.query.get(employee_id)
+    
+    if not employee:
+        return jsonify({'message': 'Empleado no encontrado', 'error': 'El empleado no existe'}), 404
+    
+    year = request.args.get('year', date.today().year, type=int)
+    
+    # A year costs at most twelve rollup rows
+    months = AttendanceMonthly.query.filter_by(
+        employee_id=employee.id, year=year
+    ).order_by(AttendanceMonthly.month).all()
+    
+    return jsonify({
+        'employee_id': employee.id,
+        'employee_name': employee.full_name,
+        'year': year,
+        'months': [month.to_dict() for month in months],
+        'totals': {
+            'days_worked': sum(month.days_worked for month in months),
+            'hours_worked': round(sum(month.minutes_worked for month in months) / 60, 2),
+            'late_days': sum(month.late_days for month in months),
+            'early_departures': sum(month.early_departures for month in months),
+            'overtime_minutes': sum(month.overtime_minutes for month in months)
+        }
+    }), 200
+
+@reports_bp.route('/timesheet', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_timesheet():
+    department = request.args.get('department')
+    
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        return jsonify({'message': 'Parámetros inválidos', 'error': 'Se requieren start_date y end_date con el formato YYYY-MM-DD'}), 400
+    
+    if end_date < start_date:
+        return jsonify({'message': 'Parámetros inválidos', 'error': 'end_date no puede ser anterior a start_date'}), 400
+    
+    rows = build_timesheet(db.session.connection(), start_date, end_date, department)
+    
+    # Attach names with one lookup for the employees in the timesheet
+    if rows:
+        names = dict(
+            (row.id, (f'{row.first_name} {row.last_name}', row.department))
+            for row in db.session.query(
+                Employee.id, Employee.first_name, Employee.last_name, Employee.department
+            ).filter(Employee.id.in_([row['employee_id'] for row in rows]))
+        )
+        for row in rows:
+            row['employee_name'], row['department'] = names.get(row['employee_id'], (None, None))
+    
+    return jsonify({
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'employees': rows
+    }), 200
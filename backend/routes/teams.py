@@ -2,89 +2,114 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 import logging
-from models.user import User, db
+from sqlalchemy import select
+from sqlalchemy.orm import load_only, selectinload
+from models.user import db
 from models.employee import Employee
 from models.team import Team
 from models.team_member import TeamMember
+from utils.etag import etag
+from utils.identity import current_identity, identity_required, admin_required, self_or_admin_required
+from utils.pagination import (
+    cached_total, cursor_requested, get_limit, get_per_page, include_total_requested, paginate_keyset
+)
+from utils.query_budget import query_budget
+from utils.readonly import paginate_rows, table_columns
+from utils.response_cache import cached, model_tag
+from utils.search_index import team_search
+from utils.serialization import RowEncoder, json_response
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 teams_bp = Blueprint('teams', __name__)
 
+# The list reads plain rows shaped like Team.to_dict()
+TEAM_FIELDS = ['id', 'name', 'description', 'department', 'status', 'created_at']
+_TEAM_COLUMNS = table_columns(Team, *TEAM_FIELDS)
+TEAM_ENCODER = RowEncoder(TEAM_FIELDS)
+
+def _team_tags(team_id):
+    """Cache tags of the team detail and member views, which embed employee details"""
+    return [model_tag(Team, id=team_id), model_tag(TeamMember, team_id=team_id), model_tag(Employee)]
+
+def _members_with_employees():
+    """Eager-load team members and only the employee columns the responses use"""
+    return selectinload(Team.members).joinedload(TeamMember.employee).load_only(
+        Employee.id, Employee.first_name, Employee.last_name, Employee.email,
+        Employee.position, Employee.department
+    )
+
 @teams_bp.route('/', methods=['GET'])
+@query_budget(3)
 @jwt_required()
+@etag([model_tag(Team)])
+@cached([model_tag(Team)])
 def get_teams():
     try:
-        # Log request details
-        logger.info('GET /api/teams - Fetching teams list')
-        logger.info(f'Request args: {request.args}')
-        
-        # Check if user is admin
-        current_user_id = get_jwt_identity()
-        logger.info(f'User ID: {current_user_id} attempting to access teams list')
+        identity = current_identity()
         
-        current_user = User.query.get(current_user_id)
-        if not current_user:
-            logger.error(f'User not found for ID: {current_user_id}')
+        if not identity:
+            logger.error('User not found for ID: %s', get_jwt_identity())
             return jsonify({'message': 'No autorizado', 'error': 'Usuario no encontrado'}), 403
         
         # Get query parameters
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        per_page = get_per_page()
         department = request.args.get('department')
         status = request.args.get('status')
         search = request.args.get('search')
         
-        logger.info(f'Query params - page: {page}, per_page: {per_page}, department: {department}, status: {status}, search: {search}')
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Teams list requested by user %s', identity.user_id, extra={'params': request.args.to_dict()})
         
         # Build query
-        query = Team.query
+        query = select(*_TEAM_COLUMNS)
         
         if department:
             query = query.filter(Team.department == department)
-            logger.debug(f'Filtering by department: {department}')
         
         if status:
             query = query.filter(Team.status == status)
-            logger.debug(f'Filtering by status: {status}')
         
-        if search:
-            search_term = f'%{search}%'
-            query = query.filter(Team.name.ilike(search_term))
-            logger.debug(f'Filtering by search term: {search}')
+        if search and search.strip():
+            query = query.filter(team_search.clause(search))
+        
+        # Cursor mode avoids the OFFSET scan and the COUNT(*) on every page
+        if cursor_requested():
+            try:
+                items, next_cursor = paginate_keyset(query, [Team.name, Team.id], get_limit(), request.args.get('cursor'))
+            except ValueError:
+                return jsonify({'message': 'Parámetros inválidos', 'error': 'El cursor no es válido'}), 400
+            
+            result = {'next_cursor': next_cursor}
+            if include_total_requested():
+                result['total'] = cached_total(query)
+            
+            logger.debug('Fetched %d teams in cursor mode', len(items))
+            return json_response(result, teams=TEAM_ENCODER.encode_list(items))
         
         # Execute query with pagination
-        teams = query.order_by(Team.name).paginate(page=page, per_page=per_page)
-        logger.info(f'Query executed, found {teams.total} total teams')
+        teams = paginate_rows(query.order_by(Team.name), page, per_page)
         
         # Format response
         result = {
-            'teams': [team.to_dict() for team in teams.items],
             'total': teams.total,
             'pages': teams.pages,
             'current_page': teams.page
         }
         
-        logger.info(f'Successfully fetched {len(teams.items)} teams for page {page}')
-        return jsonify(result), 200
+        logger.debug('Fetched %d of %d teams for page %d', len(teams.items), teams.total, page)
+        return json_response(result, teams=TEAM_ENCODER.encode_list(teams.items))
         
     except Exception as e:
-        logger.error(f'Error fetching teams: {str(e)}')
-        logger.exception('Full traceback:')
+        logger.exception('Error fetching teams: %s', e)
         return jsonify({'message': 'Error al obtener equipos', 'error': str(e)}), 500
 
 @teams_bp.route('/', methods=['POST'])
+@query_budget(4)
 @jwt_required()
+@admin_required
 def create_team():
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     data = request.get_json()
     
     if not data or not data.get('name'):
@@ -130,26 +155,23 @@ def create_team():
         return jsonify({'message': 'Error al crear equipo', 'error': str(e)}), 500
 
 @teams_bp.route('/<int:team_id>', methods=['GET'])
+@query_budget(3)
 @jwt_required()
+@identity_required
+@etag(_team_tags)
+@cached(_team_tags)
 def get_team(team_id):
-    # Get current user
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user:
-        return jsonify({'message': 'No autorizado', 'error': 'Usuario no válido'}), 403
-    
-    team = Team.query.get(team_id)
+    # Load the team with its members and their employees in two queries
+    team = Team.query.options(_members_with_employees()).get(team_id)
     
     if not team:
         return jsonify({'message': 'Equipo no encontrado', 'error': 'El equipo no existe'}), 404
     
     # Get team members
-    team_members = TeamMember.query.filter_by(team_id=team.id).all()
     members_data = []
     
-    for member in team_members:
-        employee = Employee.query.get(member.employee_id)
+    for member in team.members:
+        employee = member.employee
         if employee:
             member_data = member.to_dict()
             member_data['employee'] = {
@@ -167,15 +189,10 @@ def get_team(team_id):
     return jsonify(team_data), 200
 
 @teams_bp.route('/<int:team_id>', methods=['PUT'])
+@query_budget(4)
 @jwt_required()
+@admin_required
 def update_team(team_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     team = Team.query.get(team_id)
     
     if not team:
@@ -213,15 +230,10 @@ def update_team(team_id):
         return jsonify({'message': 'Error al actualizar equipo', 'error': str(e)}), 500
 
 @teams_bp.route('/<int:team_id>', methods=['DELETE'])
+@query_budget(3)
 @jwt_required()
+@admin_required
 def delete_team(team_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     team = Team.query.get(team_id)
     
     if not team:
@@ -241,26 +253,23 @@ def delete_team(team_id):
         return jsonify({'message': 'Error al desactivar equipo', 'error': str(e)}), 500
 
 @teams_bp.route('/<int:team_id>/members', methods=['GET'])
+@query_budget(3)
 @jwt_required()
+@identity_required
+@etag(_team_tags)
+@cached(_team_tags)
 def get_team_members(team_id):
-    # Get current user
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user:
-        return jsonify({'message': 'No autorizado', 'error': 'Usuario no válido'}), 403
-    
-    team = Team.query.get(team_id)
+    # Load the team with its members and their employees in two queries
+    team = Team.query.options(_members_with_employees()).get(team_id)
     
     if not team:
         return jsonify({'message': 'Equipo no encontrado', 'error': 'El equipo no existe'}), 404
     
     # Get team members with employee details
-    team_members = TeamMember.query.filter_by(team_id=team.id).all()
     members_data = []
     
-    for member in team_members:
-        employee = Employee.query.get(member.employee_id)
+    for member in team.members:
+        employee = member.employee
         if employee:
             member_data = member.to_dict()
             member_data['employee'] = {
@@ -279,15 +288,10 @@ def get_team_members(team_id):
     }), 200
 
 @teams_bp.route('/<int:team_id>/members', methods=['POST'])
+@query_budget(6)
 @jwt_required()
+@admin_required
 def add_team_member(team_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     team = Team.query.get(team_id)
     
     if not team:
@@ -331,15 +335,10 @@ def add_team_member(team_id):
         return jsonify({'message': 'Error al agregar miembro', 'error': str(e)}), 500
 
 @teams_bp.route('/<int:team_id>/members/<int:member_id>', methods=['PUT'])
+@query_budget(4)
 @jwt_required()
+@admin_required
 def update_team_member(team_id, member_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     team_member = TeamMember.query.get(member_id)
     
     if not team_member or team_member.team_id != team_id:
@@ -367,15 +366,10 @@ def update_team_member(team_id, member_id):
         return jsonify({'message': 'Error al actualizar miembro', 'error': str(e)}), 500
 
 @teams_bp.route('/<int:team_id>/members/<int:member_id>', methods=['DELETE'])
+@query_budget(3)
 @jwt_required()
+@admin_required
 def remove_team_member(team_id, member_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or not current_user.is_admin():
-        return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
-    
     team_member = TeamMember.query.get(member_id)
     
     if not team_member or team_member.team_id != team_id:
@@ -395,34 +389,30 @@ def remove_team_member(team_id, member_id):
         return jsonify({'message': 'Error al eliminar miembro', 'error': str(e)}), 500
 
 @teams_bp.route('/employee/<int:employee_id>', methods=['GET'])
+@query_budget(3)
 @jwt_required()
+@self_or_admin_required('No tiene permisos para ver estos equipos')
 def get_employee_teams(employee_id):
-    # Check if user is admin or the employee themselves
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user:
-        return jsonify({'message': 'No autorizado', 'error': 'Usuario no válido'}), 403
-    
-    employee = Employee.query.get(employee_id)
+    employee = Employee.query.options(
+        load_only(Employee.id, Employee.first_name, Employee.last_name)
+    ).get(employee_id)
     
     if not employee:
         return jsonify({'message': 'Empleado no encontrado', 'error': 'El empleado no existe'}), 404
     
-    # Only admins or the employee themselves can view teams
-    if not current_user.is_admin() and current_user.id != employee.user_id:
-        return jsonify({'message': 'No autorizado', 'error': 'No tiene permisos para ver estos equipos'}), 403
-    
-    # Get teams the employee is a member of
-    team_memberships = TeamMember.query.filter_by(employee_id=employee.id).all()
+    # Get active teams the employee is a member of in one query
+    team_memberships = db.session.query(TeamMember.role, Team).join(
+        Team, Team.id == TeamMember.team_id
+    ).filter(
+        TeamMember.employee_id == employee.id,
+        Team.status == 'active'
+    ).all()
     teams_data = []
     
-    for membership in team_memberships:
-        team = Team.query.get(membership.team_id)
-        if team and team.is_active():
-            team_data = team.to_dict()
-            team_data['role'] = membership.role
-            teams_data.append(team_data)
+    for role, team in team_memberships:
+        team_data = team.to_dict()
+        team_data['role'] = role
+        teams_data.append(team_data)
     
     return jsonify({
         'employee_id': employee.id,
@@ -0,0 +1,131 @@
+import os
+import sys
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+# Make the backend modules importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app
+from models import db
+from models.user import User
+from models.employee import Employee
+from models.team import Team
+from models.team_member import TeamMember
+from utils.idempotency import idempotency_store
+from utils.identity import identity_cache, identity_claims
+from utils.pagination import count_cache
+from utils.query_stats import query_stats
+from utils.rate_limit import login_limiter
+from utils.response_cache import response_cache
+from utils.schedule_index import schedule_index
+from utils.search_index import employee_search, team_search
+from utils.write_behind import write_behind
+
+# Use an in-memory database. Set on the app, not through DATABASE_URL: config.py prefers the
+# DB_* settings from .env, and the fixtures below create and drop every table.
+flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    # Cheap hashes keep user fixtures fast; login tests exercise upgrades explicitly
+    flask_app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    
+    # Requests push their own app context so `g` is not shared between them
+    with flask_app.app_context():
+        assert db.engine.url.get_backend_name() == 'sqlite', 'tests must never run against a configured database'
+        db.create_all()
+    
+    yield flask_app
+    
+    with flask_app.app_context():
+        db.session.remove()
+        assert db.engine.url.get_backend_name() == 'sqlite'
+        db.drop_all()
+    identity_cache.clear()
+    count_cache.clear()
+    schedule_index.clear()
+    employee_search.clear()
+    team_search.clear()
+    write_behind.stop()
+    idempotency_store.clear()
+    login_limiter.clear()
+    response_cache.clear()
+    query_stats.clear()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+class QueryCounter:
+    """Count the SQL statements sent to the database while active"""
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+    
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+    
+    @property
+    def count(self):
+        return len(self.statements)
+
+@pytest.fixture
+def count_queries(app):
+    with app.app_context():
+        engine = db.engine
+    return lambda: QueryCounter(engine)
+
+def create_employee(username, role='employee', **fields):
+    """Create a user with its employee record and return (user_id, employee_id)"""
+    user = User(username=username, password='secret', role=role)
+    db.session.add(user)
+    db.session.flush()
+    
+    employee = Employee(
+        user_id=user.id,
+        first_name=fields.get('first_name', username.title()),
+        last_name=fields.get('last_name', 'Test'),
+        email=fields.get('email', f'{username}@alich.com'),
+        department=fields.get('department'),
+        position=fields.get('position')
+    )
+    db.session.add(employee)
+    db.session.flush()
+    
+    return user.id, employee.id
+
+def create_team(name, employee_ids):
+    team = Team(name=name, department='IT')
+    db.session.add(team)
+    db.session.flush()
+    
+    for employee_id in employee_ids:
+        db.session.add(TeamMember(team_id=team.id, employee_id=employee_id))
+    db.session.flush()
+    
+    return team.id
+
+def auth_headers(app, user_id):
+    """Issue an access token the same way login does, without hashing a password"""
+    with app.app_context():
+        user = User.query.get(user_id)
+        token = create_access_token(identity=user.id, additional_claims=identity_claims(user))
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def admin_headers(app):
+    with app.app_context():
+        user_id, _ = create_employee('admin', role='admin')
+        db.session.commit()
+    return auth_headers(app, user_id)
@@ -0,0 +1,153 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.attendance import Attendance
+from models.employee import Employee
+from utils.schedule_index import schedule_index
+from utils.sql import insert_ignore
+from tests.conftest import auth_headers, create_employee, create_team
+
+@pytest.fixture
+def employee(app):
+    with app.app_context():
+        user_id, employee_id = create_employee('worker', department='Sales')
+        db.session.commit()
+    return employee_id, auth_headers(app, user_id)
+
+def test_second_check_in_same_day_conflicts(app, client, employee):
+    employee_id, headers = employee
+    
+    first = client.post('/api/attendance/check-in', headers=headers)
+    second = client.post('/api/attendance/check-in', headers=headers)
+    
+    assert first.status_code == 201
+    assert second.status_code == 409
+    assert second.get_json()['attendance']['id'] == first.get_json()['attendance']['id']
+    with app.app_context():
+        assert Attendance.query.filter_by(employee_id=employee_id).count() == 1
+
+def test_check_in_losing_a_race_conflicts(app, client, employee, monkeypatch):
+    employee_id, headers = employee
+    lookup = schedule_index.get
+    
+    # Another request commits today's row after the employee lookup, before our INSERT
+    def racing_lookup(*args):
+        db.session.add(Attendance(employee_id, check_in=datetime.now()))
+        db.session.commit()
+        return lookup(*args)
+    
+    monkeypatch.setattr(schedule_index, 'get', racing_lookup)
+    response = client.post('/api/attendance/check-in', headers=headers)
+    
+    assert response.status_code == 409
+    with app.app_context():
+        winner = Attendance.query.filter_by(employee_id=employee_id).one()
+    assert response.get_json()['attendance']['id'] == winner.id
+
+def test_insert_ignore_only_skips_the_unique_conflict(app, employee):
+    employee_id, _ = employee
+    values = {'employee_id': employee_id, 'work_date': datetime(2024, 3, 4).date(), 'check_in': datetime(2024, 3, 4, 9, 0)}
+    
+    with app.app_context():
+        statement = insert_ignore(Attendance.__table__, ['employee_id', 'work_date'], db.engine)
+        assert db.session.execute(statement.values(**values)).rowcount == 1
+        assert db.session.execute(statement.values(**values)).rowcount == 0
+        with pytest.raises(IntegrityError):
+            db.session.execute(statement.values(employee_id=employee_id, check_in=values['check_in']))
+        db.session.rollback()
+
+def test_check_out_only_once(client, employee):
+    _, headers = employee
+    
+    assert client.post('/api/attendance/check-out', headers=headers).status_code == 404
+    client.post('/api/attendance/check-in', headers=headers)
+    
+    first = client.post('/api/attendance/check-out', headers=headers)
+    second = client.post('/api/attendance/check-out', headers=headers)
+    
+    assert first.status_code == 200
+    assert first.get_json()['attendance']['check_out'] is not None
+    assert second.status_code == 409
+
+def _seed_history(app, employee_id, days):
+    start = datetime(2024, 1, 1, 9, 0)
+    with app.app_context():
+        for day in range(days):
+            check_in = start + timedelta(days=day)
+            db.session.add(Attendance(employee_id, check_in=check_in, check_out=check_in + timedelta(hours=8)))
+        db.session.commit()
+
+def test_export_streams_csv_rows(app, client, admin_headers, employee):
+    employee_id, _ = employee
+    _seed_history(app, employee_id, 5)
+    
+    response = client.get('/api/attendance/export?start_date=2024-01-02&end_date=2024-01-04', headers=admin_headers)
+    
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['work_date'] for row in rows] == ['2024-01-02', '2024-01-03', '2024-01-04']
+    assert rows[0]['employee_name'] == 'Worker Test'
+    assert rows[0]['department'] == 'Sales'
+    assert rows[0]['duration'] == '8:00:00'
+
+def test_export_ndjson_gzip(app, client, admin_headers, employee):
+    employee_id, _ = employee
+    _seed_history(app, employee_id, 3)
+    app.config['EXPORT_CHUNK_SIZE'] = 2
+    try:
+        response = client.get('/api/attendance/export?format=ndjson&gzip=true', headers=admin_headers)
+    finally:
+        app.config['EXPORT_CHUNK_SIZE'] = 1000
+    
+    assert response.headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(response.data).decode('utf-8').splitlines()
+    assert [json.loads(line)['employee_id'] for line in lines] == [employee_id] * 3
+
+def test_today_counts_and_filters_in_sql(app, client, admin_headers):
+    now = datetime.now()
+    with app.app_context():
+        sales = [create_employee(f'sales{i}', department='Sales')[1] for i in range(3)]
+        support = [create_employee(f'support{i}', department='Support')[1] for i in range(2)]
+        gone = create_employee('gone', department='Sales')[1]
+        Employee.query.get(gone).status = 'inactive'
+        team_id = create_team('Turno', [sales[0], support[0]])
+        db.session.add_all([
+            Attendance(sales[0], check_in=now, status='present'),
+            Attendance(sales[1], check_in=now, status='late'),
+            Attendance(support[0], check_in=now - timedelta(days=1), status='present'),
+            Attendance(gone, check_in=now, status='present')
+        ])
+        db.session.commit()
+    
+    def today(query=''):
+        response = client.get(f'/api/attendance/today?{query}', headers=admin_headers)
+        assert response.status_code == 200
+        return response.get_json()
+    
+    # The admin and yesterday's check-in count as absent; inactive employees are left out
+    body = today()
+    assert (body['total_employees'], body['present'], body['late'], body['absent']) == (6, 2, 1, 4)
+    
+    sales_only = today('department=Sales')
+    assert sorted(row['employee_id'] for row in sales_only['attendance']) == sales
+    assert sales_only['present'] == 2 and sales_only['absent'] == 1
+    
+    team = today(f'team_id={team_id}')
+    assert {row['employee_id']: row['status'] for row in team['attendance']} == {sales[0]: 'present', support[0]: 'absent'}
+    
+    assert [row['employee_id'] for row in today('status=late')['attendance']] == [sales[1]]
+    
+    # Keyset pages cover every row once, in employee id order
+    seen, cursor = [], ''
+    while cursor is not None:
+        page = today(f'department=Sales&limit=1&cursor={cursor}')
+        seen += [row['employee_id'] for row in page['attendance']]
+        cursor = page['next_cursor']
+    assert seen == sorted(sales)
+    
+    assert client.get('/api/attendance/today?cursor=nope', headers=admin_headers).status_code == 400
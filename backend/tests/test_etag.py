@@ -0,0 +1,51 @@
+from models import db
+from tests.conftest import auth_headers, create_employee
+
+def test_unchanged_list_answers_304_without_queries(app, client, admin_headers, count_queries):
+    with app.app_context():
+        create_employee('worker')
+        db.session.commit()
+    
+    first = client.get('/api/employees/', headers=admin_headers)
+    assert first.headers['ETag'].startswith('W/')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    
+    headers = dict(admin_headers, **{'If-None-Match': first.headers['ETag']})
+    with count_queries() as counter:
+        second = client.get('/api/employees/', headers=headers)
+    
+    # Only the caller's identity is read; trusting fresh JWT claims skips that too
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert counter.count == 1
+    
+    app.config['IDENTITY_CLAIMS_TTL'] = 60
+    try:
+        with count_queries() as counter:
+            assert client.get('/api/employees/', headers=headers).status_code == 304
+    finally:
+        app.config['IDENTITY_CLAIMS_TTL'] = 0
+    assert counter.count == 0
+    
+    # Another page is another representation
+    assert client.get('/api/employees/?per_page=1', headers=headers).status_code == 200
+
+def test_changes_and_scope_produce_new_etags(app, client, admin_headers):
+    with app.app_context():
+        user_id, employee_id = create_employee('worker')
+        db.session.commit()
+    
+    path = f'/api/employees/{employee_id}/schedules'
+    etag = client.get(path, headers=admin_headers).headers['ETag']
+    
+    client.post(path, headers=admin_headers, json={'day_of_week': 1, 'start_time': '09:00', 'end_time': '17:00'})
+    
+    response = client.get(path, headers=dict(admin_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert len(response.get_json()['schedules']) == 1
+    assert response.headers['ETag'] != etag
+    
+    # The employee sees the same data under a different role and must not share the validator
+    own = client.get(path, headers=auth_headers(app, user_id))
+    assert own.status_code == 200
+    assert own.headers['ETag'] != response.headers['ETag']
@@ -0,0 +1,90 @@
+import pytest
+from models import db
+from models.attendance import Attendance
+from models.team import Team
+from models.idempotency_key import IdempotencyKey
+from utils.idempotency import _request_hash, idempotency_store
+from utils.schedule_index import schedule_index
+from tests.conftest import auth_headers, create_employee
+
+def test_retried_check_in_replays_the_first_response(app, client, count_queries):
+    with app.app_context():
+        user_id, employee_id = create_employee('worker')
+        db.session.commit()
+    headers = dict(auth_headers(app, user_id), **{'Idempotency-Key': 'kiosk-7-0001'})
+    
+    first = client.post('/api/attendance/check-in', headers=headers)
+    with count_queries() as counter:
+        retry = client.post('/api/attendance/check-in', headers=headers)
+    
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert counter.count == 0
+    
+    # Another process only has the table
+    idempotency_store.clear()
+    assert client.post('/api/attendance/check-in', headers=headers).status_code == 201
+    with app.app_context():
+        assert Attendance.query.filter_by(employee_id=employee_id).count() == 1
+        assert IdempotencyKey.query.count() == 1
+
+def test_key_reused_for_another_request_is_rejected(app, client, admin_headers):
+    headers = dict(admin_headers, **{'Idempotency-Key': 'register-1'})
+    payload = {
+        'username': 'nuevo', 'password': 'secret', 'role': 'employee',
+        'first_name': 'Nuevo', 'last_name': 'Test', 'email': 'nuevo@alich.com'
+    }
+    
+    assert client.post('/api/auth/register', headers=headers, json=payload).status_code == 201
+    assert client.post('/api/auth/register', headers=headers, json=payload).status_code == 201
+    assert client.post('/api/auth/register', headers=headers, json=dict(payload, username='otro')).status_code == 422
+
+def test_key_in_flight_answers_conflict(app, client):
+    with app.app_context():
+        user_id, employee_id = create_employee('worker')
+        db.session.commit()
+    headers = dict(auth_headers(app, user_id), **{'Idempotency-Key': 'kiosk-7-0002'})
+    
+    # Another worker claimed the key and is still running the check-in
+    with app.test_request_context('/api/attendance/check-in', method='POST'):
+        assert idempotency_store.claim(f'attendance.check_in:{user_id}', 'kiosk-7-0002', _request_hash())
+    
+    busy = client.post('/api/attendance/check-in', headers=headers)
+    assert busy.status_code == 409
+    assert busy.headers['Retry-After'] == '1'
+    
+    with app.app_context():
+        idempotency_store.release(f'attendance.check_in:{user_id}', 'kiosk-7-0002')
+    assert client.post('/api/attendance/check-in', headers=headers).status_code == 201
+    with app.app_context():
+        assert Attendance.query.filter_by(employee_id=employee_id).count() == 1
+        assert IdempotencyKey.query.one().status_code == 201
+
+def test_failed_request_releases_its_key(app, client, monkeypatch):
+    with app.app_context():
+        user_id, employee_id = create_employee('worker')
+        db.session.commit()
+    headers = dict(auth_headers(app, user_id), **{'Idempotency-Key': 'kiosk-7-0003'})
+    
+    def broken(*args, **kwargs):
+        raise RuntimeError('schedule lookup failed')
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(schedule_index, 'get', broken)
+        with pytest.raises(RuntimeError):
+            client.post('/api/attendance/check-in', headers=headers)
+    
+    with app.app_context():
+        assert IdempotencyKey.query.count() == 0
+    assert client.post('/api/attendance/check-in', headers=headers).status_code == 201
+
+def test_storing_a_response_leaves_the_session_alone(app):
+    with app.test_request_context():
+        db.session.add(Team('Sin guardar'))
+        assert idempotency_store.claim('scope', 'key', 'hash')
+        idempotency_store.save('scope', 'key', 'hash', 201, '{}')
+        db.session.rollback()
+        
+        assert Team.query.filter_by(name='Sin guardar').count() == 0
+        assert IdempotencyKey.query.one().status_code == 201
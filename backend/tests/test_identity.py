@@ -0,0 +1,47 @@
+from sqlalchemy import update
+from models import db
+from models.employee import Employee
+from models.user import User
+from tests.conftest import auth_headers, create_employee
+
+def test_role_change_in_another_worker_applies_to_old_tokens(app, client):
+    with app.app_context():
+        user_id, _ = create_employee('boss', role='admin')
+        db.session.commit()
+    headers = auth_headers(app, user_id)
+    assert client.get('/api/employees/search?q=boss', headers=headers).status_code == 200
+    
+    # A Core UPDATE stands in for another process: no session events reach this one
+    with app.app_context():
+        db.session.execute(update(User).where(User.id == user_id).values(role='employee'))
+        db.session.commit()
+    
+    assert client.get('/api/employees/search?q=boss', headers=headers).status_code == 403
+
+def test_trusted_claims_still_follow_changes_made_here(app, client):
+    with app.app_context():
+        user_id, _ = create_employee('boss', role='admin')
+        db.session.commit()
+    headers = auth_headers(app, user_id)
+    
+    app.config['IDENTITY_CLAIMS_TTL'] = 60
+    try:
+        assert client.get('/api/employees/search?q=boss', headers=headers).status_code == 200
+        with app.app_context():
+            User.query.get(user_id).role = 'employee'
+            db.session.commit()
+        assert client.get('/api/employees/search?q=boss', headers=headers).status_code == 403
+    finally:
+        app.config['IDENTITY_CLAIMS_TTL'] = 0
+
+def test_deactivated_admin_is_rejected(app, client):
+    with app.app_context():
+        user_id, employee_id = create_employee('boss', role='admin')
+        db.session.commit()
+    headers = auth_headers(app, user_id)
+    
+    with app.app_context():
+        db.session.execute(update(Employee).where(Employee.id == employee_id).values(status='inactive'))
+        db.session.commit()
+    
+    assert client.get('/api/employees/search?q=boss', headers=headers).status_code == 403
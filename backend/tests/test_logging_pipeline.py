@@ -0,0 +1,53 @@
+import json
+import logging
+from utils.logging_pipeline import JsonFormatter, NonBlockingQueueHandler, RequestContextFilter, SamplingFilter
+
+def _record(name='routes.test', level=logging.INFO, msg='hello %s', args=('world',), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_records_carry_the_request_id(app, client):
+    response = client.get('/', headers={'X-Request-ID': 'abc-123'})
+    assert response.headers['X-Request-ID'] == 'abc-123'
+    
+    # Malformed ids are replaced
+    assert client.get('/', headers={'X-Request-ID': 'bad id'}).headers['X-Request-ID'] != 'bad id'
+    
+    with app.test_request_context('/', headers={'X-Request-ID': 'abc-123'}):
+        app.preprocess_request()
+        record = _record(department='IT')
+        RequestContextFilter().filter(record)
+    
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == 'hello world'
+    assert entry['request_id'] == 'abc-123' and entry['department'] == 'IT'
+    assert entry['level'] == 'INFO' and entry['logger'] == 'routes.test'
+
+def test_queue_handler_formats_lazily_and_never_blocks():
+    handler = NonBlockingQueueHandler(1)
+    params = {'page': 1}
+    
+    handler.handle(_record(args=('world',)))
+    assert handler.queue.get_nowait().args == ('world',)
+    
+    # Mutable arguments are rendered before the caller can change them
+    handler.handle(_record(msg='params %s', args=(params,)))
+    params['page'] = 2
+    assert handler.queue.get_nowait().msg == "params {'page': 1}"
+    
+    handler.handle(_record())
+    handler.handle(_record())
+    assert handler.dropped == 1
+
+def test_sampling_and_rate_limits_spare_warnings():
+    sampler = SamplingFilter({'requests': 0.0}, per_second=0.001, burst=2)
+    
+    assert not sampler.filter(_record(name='requests'))
+    assert sampler.filter(_record(name='requests', level=logging.WARNING))
+    assert sampler.sampled_out == 1
+    
+    passed = [sampler.filter(_record()) for _ in range(4)]
+    assert passed == [True, True, False, False]
+    assert sampler.rate_limited == 2
+    assert sampler.filter(_record(level=logging.ERROR))
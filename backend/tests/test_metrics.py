@@ -0,0 +1,55 @@
+import threading
+import orjson
+from utils.metrics import Registry, metrics
+
+LIST = (('blueprint', 'employees'), ('endpoint', 'employees.get_employees'))
+
+def test_requests_record_latency_status_and_queries(app, client, admin_headers):
+    before = metrics.values()
+    client.get('/api/employees/', headers=admin_headers)
+    client.get('/api/employees/', headers=admin_headers)
+    after = metrics.values()
+    
+    requests = ('alich_http_requests_total', LIST + (('method', 'GET'), ('status', '200')))
+    assert after[requests] - before.get(requests, 0) == 2
+    
+    # Histogram slots are the buckets, +Inf, then the sum
+    queries = after[('alich_http_request_db_queries', LIST)]
+    previous = before.get(('alich_http_request_db_queries', LIST), [0] * len(queries))
+    assert sum(queries[:-1]) - sum(previous[:-1]) == 2
+    assert queries[-1] > previous[-1]
+    
+    body = client.get('/metrics').data.decode()
+    assert '# TYPE alich_http_request_duration_seconds histogram' in body
+    assert 'alich_http_request_duration_seconds_bucket{blueprint="employees",endpoint="employees.get_employees",le="+Inf"}' in body
+    assert 'alich_cache_requests_total{cache="response",result="hits"}' in body
+
+def test_worker_files_are_added_up(app, client, tmp_path):
+    # A worker that has exited: its counters still count, its gauges do not
+    (tmp_path / 'metrics-999999999.json').write_bytes(orjson.dumps([
+        ['alich_db_queries_total', [], 5],
+        ['alich_write_behind_queue_depth', [], 7]
+    ]))
+    
+    metrics.directory = str(tmp_path)
+    try:
+        with app.app_context():
+            own = metrics.values()
+            merged = metrics.merged()
+    finally:
+        metrics.directory = None
+    
+    assert merged[('alich_db_queries_total', ())] == own[('alich_db_queries_total', ())] + 5
+    assert merged[('alich_write_behind_queue_depth', ())] == own[('alich_write_behind_queue_depth', ())]
+    assert any(path.name.startswith('metrics-') and path.name != 'metrics-999999999.json' for path in tmp_path.iterdir())
+
+def test_finished_threads_are_folded_into_one_shard():
+    registry = Registry()
+    threads = [threading.Thread(target=registry.inc, args=('alich_db_queries_total',)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    
+    registry.inc('alich_db_queries_total')
+    assert registry.snapshot().counters[('alich_db_queries_total', ())] == 6
+    assert len(registry._shards) == 1
@@ -0,0 +1,74 @@
+from datetime import datetime
+from models import db
+from models.attendance import Attendance
+from utils.pagination import encode_cursor
+from tests.conftest import create_employee
+
+def _seed_employees(app, count):
+    with app.app_context():
+        for i in range(count):
+            create_employee(f'user{i}', last_name=f'Last{i % 4}')
+        db.session.commit()
+
+def test_employees_cursor_mode_walks_every_row_once(app, client, admin_headers):
+    _seed_employees(app, 11)
+    
+    seen = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(f'/api/employees/?cursor={cursor}&limit=4&include_total=true', headers=admin_headers)
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data['total'] == 12
+        seen.extend((employee['last_name'], employee['id']) for employee in data['employees'])
+        cursor = data['next_cursor']
+    
+    assert seen == sorted(seen)
+    assert len(set(seen)) == 12
+
+def test_invalid_cursor_is_rejected(app, client, admin_headers):
+    response = client.get('/api/employees/?cursor=not-a-cursor', headers=admin_headers)
+    
+    assert response.status_code == 400
+
+def test_tampered_cursor_values_are_rejected(app, client, admin_headers):
+    with app.app_context():
+        user_id, employee_id = create_employee('worker')
+        db.session.commit()
+    
+    for values in ([['x'], 1], [{'a': 1}, 1], [None, 1], ['2024-01-01', 'one']):
+        cursor = encode_cursor(values)
+        assert client.get(f'/api/employees/?cursor={cursor}', headers=admin_headers).status_code == 400
+        assert client.get(f'/api/attendance/employee/{employee_id}?cursor={cursor}', headers=admin_headers).status_code == 400
+    
+    # Dates must come back as ISO strings
+    cursor = encode_cursor([20240101, 1])
+    assert client.get(f'/api/attendance/employee/{employee_id}?cursor={cursor}', headers=admin_headers).status_code == 400
+
+def test_attendance_cursor_includes_rows_without_check_in(app, client, admin_headers):
+    with app.app_context():
+        _, employee_id = create_employee('worker')
+        for day in range(1, 6):
+            record = Attendance(employee_id, check_in=datetime(2024, 3, day, 9, 0))
+            if day == 3:
+                record.check_in, record.status = None, 'absent'
+            db.session.add(record)
+        db.session.commit()
+    
+    seen, cursor = [], ''
+    while cursor is not None:
+        data = client.get(f'/api/attendance/employee/{employee_id}?cursor={cursor}&limit=2', headers=admin_headers).get_json()
+        seen += [record['work_date'] for record in data['attendance_records']]
+        cursor = data['next_cursor']
+    
+    assert seen == [f'2024-03-0{day}' for day in range(5, 0, -1)]
+
+def test_per_page_is_capped(app, client, admin_headers):
+    app.config['MAX_ITEMS_PER_PAGE'] = 5
+    try:
+        _seed_employees(app, 8)
+        response = client.get('/api/employees/?per_page=1000', headers=admin_headers)
+    finally:
+        app.config['MAX_ITEMS_PER_PAGE'] = 100
+    
+    assert len(response.get_json()['employees']) == 5
@@ -0,0 +1,61 @@
+import threading
+import time
+import pytest
+from models import db
+from models.user import User
+from utils import passwords
+from utils.passwords import PasswordVerifier, VerifierBusy, password_verifier
+from tests.conftest import create_employee
+
+def test_login_upgrades_outdated_hashes(app, client):
+    with app.app_context():
+        create_employee('worker')
+        db.session.commit()
+    
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    response = client.post('/api/auth/login', json={'username': 'worker', 'password': 'secret'})
+    
+    assert response.status_code == 200
+    with app.app_context():
+        user = User.query.filter_by(username='worker').one()
+        assert user.password_hash.startswith('pbkdf2:sha256:2000$')
+        assert not user.needs_rehash()
+    
+    assert client.post('/api/auth/login', json={'username': 'worker', 'password': 'wrong'}).status_code == 401
+    assert client.post('/api/auth/login', json={'username': 'worker', 'password': 'secret'}).status_code == 200
+
+def test_verifier_rejects_work_beyond_its_queue(app):
+    verifier = PasswordVerifier()
+    started, release = threading.Event(), threading.Event()
+    app.config['PASSWORD_VERIFY_QUEUE'] = 1
+    
+    def occupy():
+        with app.app_context():
+            verifier._run(lambda: started.set() or release.wait(5))
+    
+    worker = threading.Thread(target=occupy)
+    worker.start()
+    started.wait(5)
+    try:
+        with app.app_context(), pytest.raises(VerifierBusy):
+            verifier.verify('pbkdf2:sha256:1000$salt$hash', 'secret')
+    finally:
+        release.set()
+        worker.join()
+        app.config['PASSWORD_VERIFY_QUEUE'] = 64
+        verifier.shutdown()
+    
+    assert verifier.stats() == {'completed': 1, 'rejected': 1, 'timed_out': 0}
+
+def test_slow_verification_answers_service_unavailable(app, client, monkeypatch):
+    with app.app_context():
+        create_employee('worker')
+        db.session.commit()
+        password_verifier._ensure_started(app.config)
+    monkeypatch.setattr(password_verifier, '_timeout', 0.01)
+    monkeypatch.setattr(passwords, 'check_password_hash', lambda *args: time.sleep(0.2) or True)
+    
+    response = client.post('/api/auth/login', json={'username': 'worker', 'password': 'secret'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert password_verifier.stats()['timed_out'] >= 1
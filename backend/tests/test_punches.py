@@ -0,0 +1,99 @@
+from datetime import datetime, time, timedelta, timezone
+import pytest
+from models import db
+from models.attendance import Attendance
+from models.attendance_daily import AttendanceDaily
+from models.work_schedule import WorkSchedule
+from tests.conftest import create_employee
+
+TERMINAL_HEADERS = {'X-Terminal-Key': 'kiosk-secret'}
+
+@pytest.fixture
+def terminal_key(app):
+    app.config['TERMINAL_API_KEYS'] = ['kiosk-secret']
+    yield
+    app.config['TERMINAL_API_KEYS'] = []
+
+def test_bulk_upload_requires_terminal_key(client, terminal_key):
+    response = client.post('/api/attendance/punches/bulk', json={'punches': []}, headers={'X-Terminal-Key': 'nope'})
+    assert response.status_code == 401
+
+def test_bulk_upload_pairs_punches_per_day(app, client, terminal_key, count_queries):
+    with app.app_context():
+        _, worker = create_employee('worker')
+        _, other = create_employee('other', email='other@alich.com')
+        # 2024-03-04 is a Monday
+        db.session.add(WorkSchedule(worker, 0, time(9, 0), time(17, 0)))
+        db.session.commit()
+    
+    punches = [
+        {'employee_id': worker, 'timestamp': '2024-03-04T17:05:00'},
+        {'employee_id': worker, 'timestamp': '2024-03-04T09:20:00'},
+        {'employee_id': worker, 'timestamp': '2024-03-04T12:00:00'},
+        {'email': 'other@alich.com', 'timestamp': '2024-03-04T08:00:00', 'type': 'in'},
+        {'employee_id': worker, 'timestamp': '2024-03-05T18:00:00', 'type': 'out'},
+        {'employee_id': 9999, 'timestamp': '2024-03-04T08:00:00'},
+        {'employee_id': worker, 'timestamp': 'yesterday'}
+    ]
+    
+    with count_queries() as counter:
+        response = client.post('/api/attendance/punches/bulk', json={'punches': punches}, headers=TERMINAL_HEADERS)
+    
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [result['result'] for result in body['results']] == [
+        'check_out', 'check_in', 'duplicate', 'check_in', 'error', 'error', 'error'
+    ]
+    assert (body['created'], body['updated'], body['rejected']) == (2, 0, 3)
+    assert counter.count < 20
+    
+    with app.app_context():
+        record = Attendance.query.filter_by(employee_id=worker).one()
+        assert record.status == 'late'
+        assert record.check_out.hour == 17
+        assert AttendanceDaily.query.filter_by(employee_id=worker).one().minutes_worked == 465
+    
+    # Replaying a later check-out extends the existing day
+    response = client.post('/api/attendance/punches/bulk', headers=TERMINAL_HEADERS, json={'punches': [
+        {'employee_id': worker, 'timestamp': '2024-03-04T18:00:00'},
+        {'employee_id': worker, 'timestamp': '2024-03-04T09:20:00'}
+    ]})
+    assert [result['result'] for result in response.get_json()['results']] == ['check_out', 'duplicate']
+    with app.app_context():
+        assert Attendance.query.filter_by(employee_id=worker).one().check_out.hour == 18
+
+def test_aware_timestamps_convert_to_local_time(app, client, terminal_key):
+    with app.app_context():
+        _, worker = create_employee('worker')
+        db.session.commit()
+    
+    aware = datetime(2024, 3, 4, 9, 0, tzinfo=timezone(timedelta(hours=-5)))
+    response = client.post('/api/attendance/punches/bulk', headers=TERMINAL_HEADERS, json={'punches': [
+        {'employee_id': worker, 'timestamp': aware.isoformat()}
+    ]})
+    assert response.status_code == 200
+    
+    with app.app_context():
+        record = Attendance.query.filter_by(employee_id=worker).one()
+        assert record.check_in == aware.astimezone().replace(tzinfo=None)
+
+def test_later_early_check_out_replaces_the_note(app, client, terminal_key):
+    with app.app_context():
+        _, worker = create_employee('worker')
+        db.session.add(WorkSchedule(worker, 0, time(9, 0), time(17, 0)))
+        db.session.commit()
+    
+    for hour in ('15', '16', '18'):
+        response = client.post('/api/attendance/punches/bulk', headers=TERMINAL_HEADERS, json={'punches': [
+            {'employee_id': worker, 'timestamp': '2024-03-04T09:30:00'},
+            {'employee_id': worker, 'timestamp': f'2024-03-04T{hour}:00:00'}
+        ]})
+        assert response.status_code == 200
+        with app.app_context():
+            notes = Attendance.query.filter_by(employee_id=worker).one().notes
+        if hour == '18':
+            # No longer an early departure: only the lateness note is left
+            assert notes == 'Llegada tardía. Hora programada: 09:00'
+        else:
+            assert notes.count('Salida temprana') == 1
+            assert notes.startswith('Llegada tardía')
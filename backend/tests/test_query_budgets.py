@@ -0,0 +1,207 @@
+import logging
+from datetime import date, datetime, time, timedelta
+import numpy as np
+import pytest
+from sqlalchemy import insert, select
+from models import db
+from models.attendance import Attendance
+from models.employee import Employee
+from models.team_member import TeamMember
+from models.user import User
+from models.work_schedule import WorkSchedule
+from utils.pagination import count_cache
+from utils.query_budget import QueryBudgetExceeded, budget_mode, query_budget
+from utils.response_cache import response_cache
+from utils.schedule_index import schedule_index
+from utils.search_index import employee_search, team_search
+from tests.conftest import auth_headers, create_employee, create_team
+
+TERMINAL_HEADERS = {'X-Terminal-Key': 'kiosk-secret'}
+
+# (view, method, path, request kwargs, caller); reads first, then writes, then deletes.
+# Bulk payloads are built from the seeded ids so they grow with the data too.
+ROUTES = [
+    ('auth.login', 'POST', '/api/auth/login', {'json': {'username': 'worker0', 'password': 'secret'}}, None),
+    ('auth.get_login_limits', 'GET', '/api/auth/login/limits', {}, 'admin'),
+    ('auth.get_profile', 'GET', '/api/auth/profile', {}, 'worker'),
+    ('employees.get_employees', 'GET', '/api/employees/?per_page=100', {}, 'admin'),
+    ('employees.get_employees cursor', 'GET', '/api/employees/?cursor=&include_total=true', {}, 'admin'),
+    ('employees.search_employees', 'GET', '/api/employees/search?q=worker', {}, 'admin'),
+    ('employees.get_employee', 'GET', '/api/employees/{worker}', {}, 'admin'),
+    ('employees.get_employee_schedules', 'GET', '/api/employees/{worker}/schedules', {}, 'worker'),
+    ('attendance.get_employee_attendance', 'GET', '/api/attendance/employee/{worker}', {}, 'admin'),
+    ('attendance.export_attendance', 'GET', '/api/attendance/export?format=ndjson', {}, 'admin'),
+    ('attendance.get_today_attendance', 'GET', '/api/attendance/today', {}, 'admin'),
+    ('attendance.get_expected_now', 'GET', '/api/attendance/expected-now', {}, 'admin'),
+    ('attendance.get_ingest_stats', 'GET', '/api/attendance/ingest/stats', {}, 'admin'),
+    ('attendance.get_my_attendance_status', 'GET', '/api/attendance/my-status', {}, 'worker'),
+    ('teams.get_teams', 'GET', '/api/teams/?per_page=100', {}, 'admin'),
+    ('teams.get_team', 'GET', '/api/teams/{team}', {}, 'admin'),
+    ('teams.get_team_members', 'GET', '/api/teams/{team}/members', {}, 'admin'),
+    ('teams.get_employee_teams', 'GET', '/api/teams/employee/{worker}', {}, 'worker'),
+    ('attendance.check_in', 'POST', '/api/attendance/check-in', {}, 'worker'),
+    ('attendance.check_out', 'POST', '/api/attendance/check-out', {}, 'worker'),
+    ('attendance.update_attendance', 'PUT', '/api/attendance/{attendance}', {'json': {'notes': 'Revisado'}}, 'admin'),
+    ('attendance.upload_punches', 'POST', '/api/attendance/punches/bulk', lambda ids: {'json': {'punches': [
+        {'employee_id': employee_id, 'timestamp': f'2024-03-04T{hour}:00:00'}
+        for employee_id in ids['workers'] for hour in (9, 17)
+    ]}}, 'terminal'),
+    ('auth.register', 'POST', '/api/auth/register', {'json': {
+        'username': 'nuevo', 'password': 'secret', 'role': 'employee',
+        'first_name': 'Nuevo', 'last_name': 'Test', 'email': 'nuevo@alich.com'
+    }}, 'admin'),
+    ('auth.register_bulk', 'POST', '/api/auth/register/bulk', lambda ids: {'json': {'users': [{
+        'username': f'temp{i}', 'password': 'secret', 'role': 'employee',
+        'first_name': 'Temp', 'last_name': str(i), 'email': f'temp{i}@alich.com'
+    } for i in range(len(ids['workers']))]}}, 'admin'),
+    ('auth.change_password', 'PUT', '/api/auth/change-password', {'json': {
+        'current_password': 'secret', 'new_password': 'secret2'
+    }}, 'worker'),
+    ('employees.update_employee', 'PUT', '/api/employees/{worker}', {'json': {'position': 'Lead'}}, 'admin'),
+    ('employees.add_employee_schedule', 'POST', '/api/employees/{worker}/schedules', {'json': {
+        'day_of_week': 6, 'start_time': '09:00', 'end_time': '13:00'
+    }}, 'admin'),
+    ('employees.delete_employee_schedule', 'DELETE', '/api/employees/{worker}/schedules/{schedule}', {}, 'admin'),
+    ('teams.create_team', 'POST', '/api/teams/', {'json': {'name': 'Nuevo equipo', 'department': 'IT'}}, 'admin'),
+    ('teams.update_team', 'PUT', '/api/teams/{team}', {'json': {'description': 'Soporte'}}, 'admin'),
+    ('teams.add_team_member', 'POST', '/api/teams/{team}/members', {'json': {'employee_id': '{outsider}'}}, 'admin'),
+    ('teams.update_team_member', 'PUT', '/api/teams/{team}/members/{member}', {'json': {'role': 'leader'}}, 'admin'),
+    ('teams.remove_team_member', 'DELETE', '/api/teams/{team}/members/{member}', {}, 'admin'),
+    ('employees.delete_employee', 'DELETE', '/api/employees/{leaver}', {}, 'admin'),
+    ('teams.delete_team', 'DELETE', '/api/teams/{team}', {}, 'admin')
+]
+
+def _seed(scale):
+    """`scale` employees in one team, each with a weekday schedule and last week's attendance"""
+    user_id, worker = create_employee('worker0', department='IT')
+    employee_ids = [worker] + [create_employee(f'worker{i}', department='IT')[1] for i in range(1, scale)]
+    team_id = create_team('Soporte', employee_ids)
+    
+    monday = date.today() - timedelta(days=date.today().weekday() + 7)
+    for employee_id in employee_ids:
+        for day in range(5):
+            check_in = datetime.combine(monday + timedelta(days=day), time(9, 0))
+            db.session.add(WorkSchedule(employee_id, day, time(9, 0), time(17, 0)))
+            db.session.add(Attendance(employee_id, check_in=check_in, check_out=check_in + timedelta(hours=8)))
+    db.session.commit()
+    
+    return user_id, {
+        'worker': worker,
+        'workers': employee_ids[:20],
+        'team': team_id,
+        'member': TeamMember.query.filter_by(team_id=team_id, employee_id=employee_ids[-1]).one().id,
+        'attendance': Attendance.query.filter_by(employee_id=worker).first().id,
+        'schedule': WorkSchedule.query.filter_by(employee_id=worker).first().id,
+        'outsider': create_employee('outsider')[1],
+        'leaver': create_employee('leaver')[1]
+    }
+
+def _fill(value, ids):
+    if callable(value):
+        return value(ids)
+    if isinstance(value, str):
+        filled = value.format(**ids)
+        return int(filled) if filled != value and filled.isdigit() else filled
+    if isinstance(value, dict):
+        return {key: _fill(item, ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, ids) for item in value]
+    return value
+
+def _measure(app, client, count_queries, scale):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user_id, ids = _seed(scale)
+        admin_id = create_employee('budget-admin', role='admin')[0]
+        db.session.commit()
+    for index in (count_cache, schedule_index, employee_search, team_search):
+        index.clear()
+    
+    headers = {'admin': auth_headers(app, admin_id), 'worker': auth_headers(app, user_id), 'terminal': TERMINAL_HEADERS, None: {}}
+    counts = {}
+    for name, method, path, kwargs, caller in ROUTES:
+        with count_queries() as counter:
+            response = client.open(path.format(**ids), method=method, headers=headers[caller], **_fill(kwargs, ids))
+            response.get_data()
+        assert response.status_code < 400, (name, response.status_code, response.get_data(as_text=True))
+        counts[name] = counter.count
+    return counts
+
+@pytest.fixture
+def budget_app(app):
+    # Every request runs its queries: no cached responses, 304s or write-behind
+    saved = {key: app.config.get(key) for key in ('RESPONSE_CACHE_ENABLED', 'ETAGS_ENABLED', 'TERMINAL_API_KEYS', 'QUERY_BUDGET_MODE')}
+    app.config.update(RESPONSE_CACHE_ENABLED=False, ETAGS_ENABLED=False, TERMINAL_API_KEYS=['kiosk-secret'], QUERY_BUDGET_MODE='raise')
+    yield app
+    app.config.update(saved)
+    response_cache.clear()
+
+def test_routes_stay_within_budget_as_data_grows(budget_app, client, count_queries):
+    # Each view raises QueryBudgetExceeded past its budget; twenty times the rows must not add statements
+    small = _measure(budget_app, client, count_queries, 3)
+    large = _measure(budget_app, client, count_queries, 60)
+    
+    assert {name: count for name, count in large.items() if count != small[name]} == {}
+    
+    # A new route in these blueprints needs a budget and a row in ROUTES
+    views = {view for view in budget_app.view_functions if view.split('.')[0] in ('auth', 'employees', 'attendance', 'teams')}
+    assert views == {name.split()[0] for name, *_ in ROUTES}
+
+def test_chunked_views_pay_per_chunk(budget_app, client, admin_headers, monkeypatch):
+    # More rows than one IN list or upsert chunk takes; fixed budgets would fail here
+    with budget_app.app_context():
+        users, employees = User.__table__, Employee.__table__
+        db.session.execute(insert(users), [
+            {'username': f'bulk{i}', 'password_hash': 'unused', 'role': 'employee'} for i in range(1100)
+        ])
+        user_ids = db.session.execute(select(users.c.id).where(users.c.username.like('bulk%'))).scalars().all()
+        db.session.execute(insert(employees), [{
+            'user_id': user_id, 'first_name': 'Bulk', 'last_name': str(user_id),
+            'email': f'bulk{user_id}@alich.com', 'hire_date': date(2024, 1, 1), 'status': 'active'
+        } for user_id in user_ids])
+        employee_ids = db.session.execute(select(employees.c.id).where(employees.c.first_name == 'Bulk')).scalars().all()
+        db.session.commit()
+    
+    monkeypatch.setattr(schedule_index, 'expected_at', lambda day, minute: np.array(employee_ids))
+    response = client.get('/api/attendance/expected-now', headers=admin_headers)
+    assert response.status_code == 200 and response.get_json()['expected'] == 1100
+    
+    response = client.post('/api/attendance/punches/bulk', headers=TERMINAL_HEADERS, json={'punches': [
+        {'employee_id': employee_id, 'timestamp': '2024-03-04T09:00:00'} for employee_id in employee_ids
+    ]})
+    assert response.status_code == 200 and response.get_json()['created'] == 1100
+
+def test_budget_mode_warns_in_debug_and_is_off_otherwise(app):
+    with app.app_context():
+        app.config.update(TESTING=False)
+        try:
+            app.debug = True
+            assert budget_mode() == 'warn'
+            app.debug = False
+            assert budget_mode() == 'off'
+        finally:
+            app.config.update(TESTING=True)
+
+def test_budget_raises_under_testing_and_warns_when_asked(app, caplog):
+    @query_budget(1)
+    def two_queries():
+        db.session.execute(select(1)).all()
+        db.session.execute(select(2)).all()
+    
+    with app.app_context():
+        with pytest.raises(QueryBudgetExceeded, match='two_queries ran 2 SQL statements, budget is 1'):
+            two_queries()
+        
+        app.config['QUERY_BUDGET_MODE'] = 'warn'
+        try:
+            with caplog.at_level(logging.WARNING, logger='utils.query_budget'):
+                two_queries()
+                with query_budget(2, name='block'):
+                    db.session.execute(select(1)).all()
+                    db.session.execute(select(2)).all()
+        finally:
+            app.config['QUERY_BUDGET_MODE'] = None
+    
+    assert [record.used for record in caplog.records if record.name == 'utils.query_budget'] == [2]
+    assert 'two_queries ran 2 SQL statements' in caplog.records[-1].getMessage()
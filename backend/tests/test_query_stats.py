@@ -0,0 +1,61 @@
+import logging
+from sqlalchemy import select
+from models import db
+from models.employee import Employee
+from utils.query_stats import query_stats
+from tests.conftest import create_employee
+
+def test_fingerprints_fold_literals_and_in_lists():
+    first = query_stats.fingerprint("SELECT * FROM employees WHERE id IN (?, ?, ?) AND status = 'active' LIMIT 10")
+    second = query_stats.fingerprint('SELECT *  FROM employees\nWHERE id IN (?, ?) AND status = \'on leave\' LIMIT 20')
+    
+    assert first == second == 'SELECT * FROM employees WHERE id IN (?+) AND status = ? LIMIT ?'
+
+def test_admin_endpoint_lists_top_fingerprints(app, client, admin_headers):
+    for _ in range(3):
+        client.get('/api/employees/', headers=admin_headers)
+    
+    body = client.get('/api/admin/queries?sort=calls&limit=5', headers=admin_headers).get_json()
+    assert body['calls'] > 0 and len(body['queries']) <= 5
+    assert [entry['calls'] for entry in body['queries']] == sorted((entry['calls'] for entry in body['queries']), reverse=True)
+    assert all(entry['mean_ms'] <= entry['max_ms'] for entry in body['queries'])
+    
+    assert client.get('/api/admin/queries?sort=nope', headers=admin_headers).status_code == 400
+    assert client.delete('/api/admin/queries', headers=admin_headers).status_code == 200
+
+def test_slow_queries_are_logged_and_explained(app, caplog):
+    slow_ms, explain = query_stats.slow_ms, query_stats.explain
+    with app.app_context():
+        create_employee('worker')
+        db.session.commit()
+        
+        query_stats.slow_ms, query_stats.explain, query_stats.record_params = 1e-9, True, True
+        try:
+            with caplog.at_level(logging.WARNING, logger='sql.slow'):
+                db.session.execute(select(Employee.id).where(Employee.last_name == 'Test')).all()
+        finally:
+            query_stats.slow_ms, query_stats.explain, query_stats.record_params = slow_ms, explain, False
+    
+    assert any(record.name == 'sql.slow' for record in caplog.records)
+    entry = next(entry for entry in query_stats.top(50) if entry['fingerprint'].startswith('SELECT employees.id'))
+    assert entry['slow_calls'] == 1 and entry['slowest_params'] == "('Test',)"
+    assert entry['plan'] and 'employees' in str(entry['plan'])
+
+def test_sensitive_parameters_are_never_recorded(app, client, caplog):
+    with app.app_context():
+        create_employee('worker')
+        db.session.commit()
+    
+    # Off by default; when turned on, password hashes still stay out of stats and logs
+    assert query_stats.record_params is False
+    query_stats.record_params, slow_ms = True, query_stats.slow_ms
+    query_stats.slow_ms = 1e-9
+    try:
+        with caplog.at_level(logging.WARNING, logger='sql.slow'):
+            client.post('/api/auth/login', json={'username': 'worker', 'password': 'secret'})
+    finally:
+        query_stats.record_params, query_stats.slow_ms = False, slow_ms
+    
+    recorded = [entry['slowest_params'] for entry in query_stats.top(100) if 'password_hash' in entry['fingerprint']]
+    assert '<redacted>' in recorded and set(recorded) <= {'<redacted>', None}
+    assert all('pbkdf2' not in str(record.__dict__.get('params')) for record in caplog.records)
@@ -0,0 +1,71 @@
+import threading
+import pytest
+from models import db
+from utils.rate_limit import Budget, MemoryBackend, login_limiter
+from tests.conftest import create_employee
+
+@pytest.fixture(params=['memory', 'database'])
+def limiter_backend(app, request):
+    app.config.update(LOGIN_RATE_LIMIT_BACKEND=request.param, LOGIN_USER_BURST=3)
+    yield request.param
+    app.config.update(LOGIN_RATE_LIMIT_BACKEND='memory', LOGIN_USER_BURST=5)
+
+def test_failed_logins_are_throttled_before_hashing(app, client, admin_headers, count_queries, limiter_backend):
+    with app.app_context():
+        create_employee('worker')
+        db.session.commit()
+    
+    for _ in range(3):
+        assert client.post('/api/auth/login', json={'username': 'worker', 'password': 'wrong'}).status_code == 401
+    
+    with count_queries() as counter:
+        blocked = client.post('/api/auth/login', json={'username': 'Worker', 'password': 'secret'})
+    
+    assert blocked.status_code == 429
+    assert int(blocked.headers['Retry-After']) > 0
+    # Only the bucket lookups of the database backend may touch the database
+    assert all('users' not in statement for statement in counter.statements)
+    
+    # Other usernames from the same address still get through
+    assert client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'}).status_code == 200
+    
+    stats = client.get('/api/auth/login/limits', headers=admin_headers).get_json()
+    assert (stats['failures'], stats['rejected'], stats['hashes_avoided']) == (3, 1, 1)
+    assert stats['backend'] == limiter_backend and stats['tracked_keys'] == 2
+
+def test_attempts_in_flight_hold_their_token(app, limiter_backend):
+    # Three concurrent guesses take the whole burst before any of them is verified
+    with app.app_context():
+        assert [login_limiter.reserve('worker', '10.0.0.1') for _ in range(3)] == [0, 0, 0]
+        assert login_limiter.reserve('worker', '10.0.0.1') > 0
+        
+        login_limiter.refund('worker', '10.0.0.1')
+        assert login_limiter.reserve('worker', '10.0.0.1') == 0
+        
+        # A successful attempt leaves no bucket behind
+        assert login_limiter.reserve('someone', '10.0.0.2') == 0
+        login_limiter.refund('someone', '10.0.0.2')
+        assert len(login_limiter.backend()) == 2
+
+def test_memory_backend_survives_concurrent_eviction():
+    backend = MemoryBackend(max_keys=8)
+    budget = Budget(5, 1)
+    errors = []
+    
+    def hammer(offset):
+        try:
+            for i in range(2000):
+                key = f'key{(offset + i) % 50}'
+                backend.take([(key, budget)], float(i))
+                backend.give_back([(key, budget)], float(i))
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=hammer, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert len(backend) <= 8
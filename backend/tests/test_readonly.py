@@ -0,0 +1,52 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import select
+from werkzeug.exceptions import NotFound
+from models import db
+from models.attendance import Attendance
+from models.employee import Employee
+from models.team import Team
+from utils.readonly import paginate_rows
+from tests.conftest import create_employee, create_team
+
+def test_lists_keep_the_to_dict_shape(app, client, admin_headers):
+    with app.app_context():
+        _, employee_id = create_employee('worker', department='IT', position='Dev, backend')
+        create_team('Backend', [employee_id])
+        db.session.commit()
+        employees = [employee.to_dict() for employee in Employee.query.order_by(Employee.last_name)]
+        teams = [team.to_dict() for team in Team.query.all()]
+    
+    body = client.get('/api/employees/', headers=admin_headers).get_json()
+    assert body['employees'] == employees
+    assert (body['total'], body['pages'], body['current_page']) == (2, 1, 1)
+    
+    body = client.get('/api/teams/?cursor=', headers=admin_headers).get_json()
+    assert body['teams'] == teams and body['next_cursor'] is None
+
+def test_today_rows_are_read_without_entities(app, client, admin_headers):
+    with app.app_context():
+        _, employee_id = create_employee('worker')
+        db.session.add(Attendance(employee_id, check_in=datetime.now()))
+        db.session.commit()
+    
+    body = client.get('/api/attendance/today?status=absent', headers=admin_headers).get_json()
+    assert body['total_employees'] == 2 and body['absent'] == 1
+    assert body['attendance'] == [{
+        'employee_id': 1, 'employee_name': 'Admin Test', 'department': None, 'position': None,
+        'present': False, 'check_in': None, 'check_out': None, 'status': 'absent'
+    }]
+
+def test_paginate_rows_matches_flask_sqlalchemy(app):
+    with app.app_context():
+        for name in ('ana', 'bea', 'carla'):
+            create_employee(name)
+        db.session.commit()
+        
+        statement = select(Employee.id).order_by(Employee.id)
+        page = paginate_rows(statement, 2, 2)
+        assert [row.id for row in page.items] == [3]
+        assert (page.total, page.pages, page.page) == (3, 2, 2)
+        
+        with pytest.raises(NotFound):
+            paginate_rows(statement, 3, 2)
@@ -0,0 +1,99 @@
+import threading
+import time
+from models import db
+from models.employee import Employee
+from utils.response_cache import CachedResponse, LocalBackend, MemoryBackend, model_tag, response_cache
+from tests.conftest import auth_headers, create_employee, create_team
+
+def test_team_members_are_cached_until_membership_changes(app, client, admin_headers):
+    with app.app_context():
+        _, first = create_employee('first')
+        _, second = create_employee('second')
+        team_id = create_team('Platform', [first])
+        db.session.commit()
+    
+    path = f'/api/teams/{team_id}/members'
+    assert client.get(path, headers=admin_headers).headers['X-Cache'] == 'MISS'
+    assert client.get(path, headers=admin_headers).headers['X-Cache'] == 'HIT'
+    
+    client.post(path, headers=admin_headers, json={'employee_id': second})
+    
+    response = client.get(path, headers=admin_headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert len(response.get_json()['members']) == 2
+    
+    with app.app_context():
+        stats = response_cache.stats()
+    assert stats['hits'] == 1 and stats['stale'] == 1
+
+def test_row_changes_only_invalidate_their_own_entries(app, client, admin_headers):
+    with app.app_context():
+        _, changed = create_employee('changed')
+        _, untouched = create_employee('untouched')
+        db.session.commit()
+    
+    for employee_id in (changed, untouched):
+        client.get(f'/api/employees/{employee_id}', headers=admin_headers)
+    
+    client.put(f'/api/employees/{changed}', headers=admin_headers, json={'position': 'Lead'})
+    
+    response = client.get(f'/api/employees/{changed}', headers=admin_headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()['position'] == 'Lead'
+    assert client.get(f'/api/employees/{untouched}', headers=admin_headers).headers['X-Cache'] == 'HIT'
+
+def test_statements_run_through_the_session_invalidate(app, client, admin_headers):
+    with app.app_context():
+        user_id, employee_id = create_employee('worker')
+        db.session.commit()
+    
+    client.get('/api/attendance/today', headers=admin_headers)
+    assert client.get('/api/attendance/today', headers=admin_headers).headers['X-Cache'] == 'HIT'
+    
+    # Check-in inserts with a Core statement instead of the ORM unit of work
+    client.post('/api/attendance/check-in', headers=auth_headers(app, user_id))
+    
+    response = client.get('/api/attendance/today', headers=admin_headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    row = next(row for row in response.get_json()['attendance'] if row['employee_id'] == employee_id)
+    assert row['present']
+
+def test_memory_backend_evicts_by_entries_and_bytes():
+    backend = MemoryBackend(max_entries=3, max_bytes=10)
+    entry = lambda body: CachedResponse(200, 'application/json', body, {}, time.time() + 60)
+    
+    for key in 'abc':
+        backend.set(key, entry(b'12'))
+    backend.get('a')
+    backend.set('d', entry(b'12'))
+    assert len(backend) == 3 and backend.get('b') is None
+    
+    backend.set('e', entry(b'12345678'))
+    assert len(backend) == 2 and backend.evictions == 3
+
+def test_local_backend_shares_invalidations_between_processes(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    writer, reader = LocalBackend(path, 100), LocalBackend(path, 100)
+    tag = model_tag(Employee, id=1)
+    
+    versions = writer.versions([tag])
+    writer.set('key', CachedResponse(200, 'application/json', b'{}', versions, time.time() + 60))
+    assert reader.get('key').versions == reader.versions([tag])
+    
+    reader.bump([tag])
+    assert writer.versions([tag]) != writer.get('key').versions
+
+def test_stats_count_every_lookup_across_threads(app):
+    def lookups():
+        with app.app_context():
+            for i in range(2000):
+                response_cache.get(f'missing:{i}')
+    
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    with app.app_context():
+        assert response_cache.stats()['misses'] == 16000
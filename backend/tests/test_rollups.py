@@ -0,0 +1,84 @@
+from datetime import date, datetime, time
+from models import db
+from models.attendance import Attendance
+from models.attendance_daily import AttendanceDaily
+from models.attendance_monthly import AttendanceMonthly
+from models.work_schedule import WorkSchedule
+from utils.rollups import compute_daily
+from tests.conftest import auth_headers, create_employee
+
+def test_check_in_and_out_maintain_rollups(app, client):
+    with app.app_context():
+        user_id, employee_id = create_employee('worker')
+        db.session.commit()
+    headers = auth_headers(app, user_id)
+    
+    client.post('/api/attendance/check-in', headers=headers)
+    client.post('/api/attendance/check-out', headers=headers)
+    
+    with app.app_context():
+        daily = AttendanceDaily.query.filter_by(employee_id=employee_id).one()
+        monthly = AttendanceMonthly.query.filter_by(employee_id=employee_id).one()
+        assert daily.work_date == datetime.now().date()
+        assert monthly.days_worked == 1
+        assert monthly.minutes_worked == daily.minutes_worked
+
+def test_update_attendance_moves_rollup_to_new_day(app, client, admin_headers):
+    with app.app_context():
+        _, employee_id = create_employee('worker')
+        db.session.add(WorkSchedule(employee_id, 0, time(9, 0), time(17, 0)))
+        record = Attendance(employee_id, check_in=datetime(2024, 1, 31, 9, 0), check_out=datetime(2024, 1, 31, 19, 0))
+        db.session.add(record)
+        db.session.commit()
+        attendance_id = record.id
+    
+    response = client.put(f'/api/attendance/{attendance_id}', headers=admin_headers, json={
+        'check_in': '2024-02-05T09:00:00', 'check_out': '2024-02-05T18:30:00'
+    })
+    
+    assert response.status_code == 200
+    with app.app_context():
+        daily = AttendanceDaily.query.filter_by(employee_id=employee_id).one()
+        assert daily.work_date.isoformat() == '2024-02-05'
+        assert daily.minutes_worked == 570
+        assert daily.overtime_minutes == 90
+        months = AttendanceMonthly.query.filter_by(employee_id=employee_id).all()
+        assert [(m.year, m.month, m.days_worked) for m in months] == [(2024, 2, 1)]
+
+def test_rebuild_command_backfills_history(app, client, admin_headers):
+    with app.app_context():
+        _, employee_id = create_employee('worker')
+        db.session.add(WorkSchedule(employee_id, 1, time(9, 0), time(17, 0)))
+        for day in (2, 3, 4):
+            check_in = datetime(2024, 1, day, 9, 30)
+            db.session.add(Attendance(employee_id, check_in=check_in, check_out=check_in.replace(hour=16, minute=0),
+                                      status='late' if day == 2 else 'present'))
+        db.session.commit()
+    
+    result = app.test_cli_runner().invoke(args=['rollups', 'rebuild', '--start', '2024-01-01', '--end', '2024-01-31'])
+    
+    assert result.exit_code == 0, result.output
+    response = client.get(f'/api/reports/employee/{employee_id}?year=2024', headers=admin_headers)
+    totals = response.get_json()['totals']
+    assert totals == {
+        'days_worked': 3,
+        'hours_worked': 19.5,
+        'late_days': 1,
+        'early_departures': 1,
+        'overtime_minutes': 0
+    }
+    
+    report = client.get('/api/reports/monthly?year=2024&month=1', headers=admin_headers).get_json()
+    assert [row['employee_id'] for row in report['employees']] == [employee_id]
+
+def test_overnight_shift_ends_the_next_day():
+    # 22:00-06:00 shift worked in full, then one left two hours early
+    night = (time(22, 0), time(6, 0))
+    full = compute_daily(1, date(2024, 3, 4), datetime(2024, 3, 4, 22, 0), datetime(2024, 3, 5, 6, 30), 'present', night)
+    assert (full['minutes_worked'], full['overtime_minutes'], full['early_departure']) == (510, 30, False)
+    
+    early = compute_daily(1, date(2024, 3, 4), datetime(2024, 3, 4, 22, 0), datetime(2024, 3, 5, 4, 0), 'present', night)
+    assert (early['overtime_minutes'], early['early_departure']) == (0, True)
+    
+    before_midnight = compute_daily(1, date(2024, 3, 4), datetime(2024, 3, 4, 22, 0), datetime(2024, 3, 4, 23, 0), 'present', night)
+    assert before_midnight['early_departure']
@@ -0,0 +1,80 @@
+from datetime import datetime, time
+from models import db
+from models.work_schedule import WorkSchedule
+from utils.schedule_index import schedule_index
+from tests.conftest import create_employee
+
+def test_index_lookups_and_overnight_shifts(app):
+    with app.app_context():
+        _, day_worker = create_employee('day')
+        _, night_worker = create_employee('night')
+        db.session.add(WorkSchedule(day_worker, 0, time(9, 0), time(17, 0)))
+        db.session.add(WorkSchedule(day_worker, 0, time(6, 0), time(7, 0)))
+        db.session.add(WorkSchedule(night_worker, 0, time(22, 0), time(6, 0)))
+        db.session.commit()
+        
+        assert schedule_index.get(day_worker, 0).start_time == time(9, 0)
+        assert schedule_index.get(day_worker, 1) is None
+        assert [s.day_of_week for s in schedule_index.for_employee(night_worker)] == [0]
+        
+        assert schedule_index.expected_at(0, 10 * 60).tolist() == [day_worker]
+        assert schedule_index.expected_at(0, 23 * 60).tolist() == [night_worker]
+        assert schedule_index.expected_at(1, 3 * 60).tolist() == [night_worker]
+        assert schedule_index.expected_at(1, 10 * 60).tolist() == []
+        
+        start, end = schedule_index.matrix([day_worker, 999])
+        assert start[0, 0] == 9 * 60 and end[0, 0] == 17 * 60
+        assert (start[1] == -1).all()
+
+def test_stale_employees_reload_in_one_query(app, count_queries):
+    with app.app_context():
+        employee_ids = [create_employee(f'worker{i}')[1] for i in range(5)]
+        db.session.add(WorkSchedule(employee_ids[0], 0, time(9, 0), time(17, 0)))
+        db.session.commit()
+        schedule_index.load()
+        
+        for employee_id in employee_ids[1:]:
+            db.session.add(WorkSchedule(employee_id, 0, time(7, 0), time(15, 0)))
+        WorkSchedule.query.filter_by(employee_id=employee_ids[0]).one().start_time = time(10, 0)
+        db.session.commit()
+        
+        with count_queries() as counter:
+            start, _ = schedule_index.matrix(employee_ids)
+        
+        assert counter.count == 1
+        assert start[:, 0].tolist() == [600] + [420] * 4
+        assert schedule_index.expected_at(0, 8 * 60).tolist() == employee_ids[1:]
+
+def test_schedule_changes_refresh_the_index(app, client, admin_headers):
+    with app.app_context():
+        _, employee_id = create_employee('worker')
+        db.session.commit()
+        assert schedule_index.for_employee(employee_id) == []
+    
+    response = client.post(f'/api/employees/{employee_id}/schedules', headers=admin_headers, json={
+        'day_of_week': 2, 'start_time': '08:00', 'end_time': '16:00'
+    })
+    schedule_id = response.get_json()['schedule']['id']
+    
+    schedules = client.get(f'/api/employees/{employee_id}/schedules', headers=admin_headers).get_json()['schedules']
+    assert [(s['id'], s['start_time']) for s in schedules] == [(schedule_id, '08:00')]
+    
+    client.delete(f'/api/employees/{employee_id}/schedules/{schedule_id}', headers=admin_headers)
+    
+    schedules = client.get(f'/api/employees/{employee_id}/schedules', headers=admin_headers).get_json()['schedules']
+    assert schedules == []
+
+def test_expected_now_lists_scheduled_employees(app, client, admin_headers):
+    now = datetime.now()
+    with app.app_context():
+        _, expected = create_employee('expected')
+        _, off_duty = create_employee('offduty')
+        db.session.add(WorkSchedule(expected, now.weekday(), time(0, 0), time(23, 59)))
+        db.session.add(WorkSchedule(off_duty, (now.weekday() + 1) % 7, time(0, 0), time(23, 59)))
+        db.session.commit()
+    
+    body = client.get('/api/attendance/expected-now', headers=admin_headers).get_json()
+    
+    if now.hour * 60 + now.minute < 23 * 60 + 59:
+        assert [row['employee_id'] for row in body['employees']] == [expected]
+        assert body['on_site'] == 0
@@ -0,0 +1,91 @@
+import time
+from models import db
+from utils.search_index import _State, _grams, employee_search
+from tests.conftest import create_employee, create_team
+
+def test_search_ranks_prefix_matches_and_folds_accents(app):
+    with app.app_context():
+        create_employee('ana', first_name='Ana', last_name='Núñez', email='ana@alich.com')
+        create_employee('mariana', first_name='Mariana', last_name='Lopez', email='mlopez@alich.com')
+        create_employee('juan', first_name='Juan', last_name='Anaya', email='juan@alich.com')
+        db.session.commit()
+        
+        names = [row['first_name'] for row in employee_search.search('ana')]
+        assert names == ['Ana', 'Juan', 'Mariana']
+        
+        assert [row['last_name'] for row in employee_search.search('nunez')] == ['Núñez']
+        assert [row['first_name'] for row in employee_search.search('juan anay')] == ['Juan']
+        assert len(employee_search.search('a', limit=2)) == 2
+        assert employee_search.search('zzz') == []
+        assert employee_search.search('   ') == []
+
+def test_search_endpoint_follows_updates(app, client, admin_headers):
+    with app.app_context():
+        _, employee_id = create_employee('pedro', first_name='Pedro', last_name='Gomez')
+        db.session.commit()
+    
+    body = client.get('/api/employees/search?q=gom', headers=admin_headers).get_json()
+    assert [row['id'] for row in body['employees']] == [employee_id]
+    
+    client.put(f'/api/employees/{employee_id}', headers=admin_headers, json={'last_name': 'Ruiz'})
+    
+    assert client.get('/api/employees/search?q=gom', headers=admin_headers).get_json()['employees'] == []
+    body = client.get('/api/employees/search?q=ruiz', headers=admin_headers).get_json()
+    assert [row['last_name'] for row in body['employees']] == ['Ruiz']
+
+def test_list_search_matches_substrings(app, client, admin_headers):
+    with app.app_context():
+        _, first = create_employee('sofia', first_name='Sofia', last_name='Martinez')
+        create_employee('carlos', first_name='Carlos', last_name='Perez')
+        members = create_employee('lucia', first_name='Lucia', last_name='Diaz')[1:]
+        create_team('Backend Platform', members)
+        create_team('Sales', members)
+        db.session.commit()
+    
+    body = client.get('/api/employees/?search=tin', headers=admin_headers).get_json()
+    assert [row['id'] for row in body['employees']] == [first]
+    
+    body = client.get('/api/teams/?search=PLAT', headers=admin_headers).get_json()
+    assert [team['name'] for team in body['teams']] == ['Backend Platform']
+    
+    # A term matching more rows than the id filter allows falls back to ilike
+    app.config['SEARCH_FILTER_MAX_IDS'] = 1
+    try:
+        body = client.get('/api/employees/?search=a', headers=admin_headers).get_json()
+        assert body['total'] == 4
+    finally:
+        app.config['SEARCH_FILTER_MAX_IDS'] = 1000
+
+def test_ilike_fallback_escapes_wildcards_and_keeps_accents(app, client, admin_headers):
+    with app.app_context():
+        create_employee('ana', first_name='Ana', last_name='Núñez', email='a_n@alich.com')
+        create_employee('eva', first_name='Eva', last_name='Núñez', email='e_n@alich.com')
+        create_employee('ines', first_name='Ines', last_name='Ruiz', email='ixr@alich.com')
+        db.session.commit()
+    
+    app.config['SEARCH_FILTER_MAX_IDS'] = 1
+    try:
+        # '_' is a literal underscore, not LIKE's any-character wildcard
+        assert client.get('/api/employees/?search=_', headers=admin_headers).get_json()['total'] == 2
+        assert client.get('/api/employees/?search=Núñez', headers=admin_headers).get_json()['total'] == 2
+    finally:
+        app.config['SEARCH_FILTER_MAX_IDS'] = 1000
+
+def test_search_is_fast_on_a_large_index(app):
+    # Fill the index directly; inserting 20k employees would only slow the test down
+    documents, grams = {}, {}
+    for i in range(20000):
+        values = (f'name{i}', f'surname{i % 500}', f'user{i}@alich.com')
+        documents[i] = {'row': {'id': i}, 'values': values}
+        for gram in _grams(' '.join(values)):
+            grams.setdefault(gram, set()).add(i)
+    employee_search._state = _State(documents, grams, time.monotonic())
+    
+    with app.app_context():
+        started = time.perf_counter()
+        for _ in range(100):
+            results = employee_search.search('surname42', limit=10)
+        elapsed = (time.perf_counter() - started) / 100
+    
+    assert len(results) == 10
+    assert elapsed < 0.005
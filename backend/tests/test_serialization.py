@@ -0,0 +1,49 @@
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from sqlalchemy import select
+from models import db
+from models.attendance import Attendance
+from utils.export import ATTENDANCE_ENCODER
+from utils.serialization import dumps
+from tests.conftest import create_employee
+
+def test_row_encoder_matches_to_dict(app):
+    with app.app_context():
+        _, employee_id = create_employee('worker')
+        start = datetime(2024, 1, 1, 9, 0, 0, 250000)
+        records = [
+            Attendance(employee_id, check_in=start, check_out=start + timedelta(hours=8), notes='tarde, "tráfico"'),
+            Attendance(employee_id, check_in=start + timedelta(days=1), check_out=start + timedelta(days=1)),
+            Attendance(employee_id, check_in=start + timedelta(days=2))
+        ]
+        db.session.add_all(records)
+        db.session.commit()
+        
+        expected = [record.to_dict() for record in Attendance.query.order_by(Attendance.id)]
+        rows = db.session.execute(select(Attendance.__table__).order_by(Attendance.id)).all()
+        
+        assert json.loads(ATTENDANCE_ENCODER.encode_list(rows)) == expected
+        assert [json.loads(line) for line in ATTENDANCE_ENCODER.encode_lines(rows).splitlines()] == expected
+        assert ATTENDANCE_ENCODER.encode_list([]) == b'[]'
+
+def test_provider_encodes_dates_natively(app):
+    with app.app_context():
+        body = app.json.dumps({1: date(2024, 1, 2), 'at': datetime(2024, 1, 2, 9, 30), 't': time(8, 0), 'n': Decimal('1.5')})
+    assert json.loads(body) == {'1': '2024-01-02', 'at': '2024-01-02T09:30:00', 't': '08:00:00', 'n': 1.5}
+    assert dumps(timedelta(hours=8)) == b'"8:00:00"'
+
+def test_attendance_history_keeps_its_shape(app, client, admin_headers):
+    with app.app_context():
+        _, employee_id = create_employee('worker')
+        db.session.add(Attendance(employee_id, check_in=datetime(2024, 1, 1, 9), check_out=datetime(2024, 1, 1, 17)))
+        db.session.commit()
+        expected = [record.to_dict() for record in Attendance.query.all()]
+    
+    body = client.get(f'/api/attendance/employee/{employee_id}', headers=admin_headers).get_json()
+    assert body['attendance_records'] == expected
+    assert body['total'] == 1 and body['employee_name'] == 'Worker Test'
+    
+    body = client.get(f'/api/attendance/employee/{employee_id}?cursor=&include_total=true', headers=admin_headers).get_json()
+    assert body['attendance_records'] == expected
+    assert body['next_cursor'] is None and body['total'] == 1
@@ -0,0 +1,63 @@
+import pytest
+from models import db
+from tests.conftest import create_employee, create_team
+
+def _seed_team(app, size):
+    with app.app_context():
+        employee_ids = [create_employee(f'member{size}_{i}')[1] for i in range(size)]
+        team_id = create_team(f'Team {size}', employee_ids)
+        db.session.commit()
+    return team_id, employee_ids
+
+@pytest.mark.parametrize('path', ['/api/teams/{}', '/api/teams/{}/members'])
+def test_team_members_query_count_is_constant(app, client, admin_headers, count_queries, path):
+    counts = []
+    
+    for size in (1, 40):
+        team_id, _ = _seed_team(app, size)
+        
+        with count_queries() as counter:
+            response = client.get(path.format(team_id), headers=admin_headers)
+        
+        assert response.status_code == 200
+        assert len(response.get_json()['members']) == size
+        counts.append(counter.count)
+    
+    assert counts[0] == counts[1]
+
+def test_team_members_include_employee_details(app, client, admin_headers):
+    team_id, employee_ids = _seed_team(app, 2)
+    
+    response = client.get(f'/api/teams/{team_id}/members', headers=admin_headers)
+    
+    member = response.get_json()['members'][0]
+    assert member['employee'] == {
+        'id': employee_ids[0],
+        'name': 'Member2_0 Test',
+        'position': None,
+        'department': None,
+        'email': 'member2_0@alich.com'
+    }
+
+def test_employee_teams_query_count_is_constant(app, client, admin_headers, count_queries):
+    with app.app_context():
+        _, employee_id = create_employee('worker')
+        for i in range(30):
+            create_team(f'Team {i}', [employee_id])
+        db.session.commit()
+    
+    with count_queries() as counter:
+        response = client.get(f'/api/teams/employee/{employee_id}', headers=admin_headers)
+    many_teams = counter.count
+    
+    with app.app_context():
+        _, other_id = create_employee('other')
+        create_team('Solo', [other_id])
+        db.session.commit()
+    
+    with count_queries() as counter:
+        client.get(f'/api/teams/employee/{other_id}', headers=admin_headers)
+    
+    assert response.status_code == 200
+    assert len(response.get_json()['teams']) == 30
+    assert counter.count == many_teams
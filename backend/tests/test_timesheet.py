@@ -0,0 +1,80 @@
+from datetime import date, datetime, time
+from models import db
+from models.attendance import Attendance
+from models.work_schedule import WorkSchedule
+from tests.conftest import create_employee
+from utils.rollups import compute_daily, is_late
+from utils.timesheet import build_inputs, compute_timesheet
+
+def test_compute_timesheet_totals():
+    punches = [
+        # Monday 2024-01-01, scheduled 09:00-17:00: 30 minutes late, one hour overtime
+        (7, date(2024, 1, 1), datetime(2024, 1, 1, 9, 30), datetime(2024, 1, 1, 18, 30)),
+        # Tuesday, within tolerance, leaves an hour early
+        (7, date(2024, 1, 2), datetime(2024, 1, 2, 9, 5), datetime(2024, 1, 2, 16, 0)),
+        # Unscheduled Saturday, never checked out
+        (7, date(2024, 1, 6), datetime(2024, 1, 6, 10, 0), None),
+        (3, date(2024, 1, 1), datetime(2024, 1, 1, 8, 0), datetime(2024, 1, 1, 12, 0)),
+    ]
+    schedules = [(7, 0, time(9, 0), time(17, 0)), (7, 1, time(9, 0), time(17, 0))]
+    
+    inputs = build_inputs(punches, schedules)
+    totals = compute_timesheet(inputs)
+    
+    assert inputs.employee_ids.tolist() == [3, 7]
+    assert totals['days_worked'].tolist() == [1, 3]
+    assert totals['minutes_worked'].tolist() == [240, 540 + 415]
+    assert totals['late_days'].tolist() == [0, 1]
+    assert totals['lateness_minutes'].tolist() == [0, 30]
+    assert totals['early_departures'].tolist() == [0, 1]
+    assert totals['early_departure_minutes'].tolist() == [0, 60]
+    assert totals['overtime_minutes'].tolist() == [0, 60]
+
+def test_lateness_matches_the_check_in_rule():
+    # 09:10:00 is on time; 09:10:30 is late by 10 minutes, as check-in would record it
+    arrivals = [time(9, 10), time(9, 10, 30), time(9, 11)]
+    punches = [(i + 1, date(2024, 1, 1), datetime.combine(date(2024, 1, 1), arrival), None) for i, arrival in enumerate(arrivals)]
+    schedules = [(i + 1, 0, time(9, 0), time(17, 0)) for i in range(len(arrivals))]
+    
+    totals = compute_timesheet(build_inputs(punches, schedules))
+    
+    assert totals['late_days'].tolist() == [is_late(punch[2], time(9, 0)) for punch in punches] == [False, True, True]
+    assert totals['lateness_minutes'].tolist() == [0, 10, 11]
+
+def test_overnight_shift_matches_the_daily_rollup():
+    # Monday 22:00-06:00: a full night with 30 minutes overtime, then one leaving two hours early
+    punches = [
+        (1, date(2024, 1, 1), datetime(2024, 1, 1, 22, 0), datetime(2024, 1, 2, 6, 30)),
+        (2, date(2024, 1, 1), datetime(2024, 1, 1, 22, 0), datetime(2024, 1, 2, 4, 0)),
+    ]
+    schedules = [(employee_id, 0, time(22, 0), time(6, 0)) for employee_id in (1, 2)]
+    
+    totals = compute_timesheet(build_inputs(punches, schedules))
+    daily = [compute_daily(*punch, 'present', (time(22, 0), time(6, 0))) for punch in punches]
+    
+    assert totals['overtime_minutes'].tolist() == [row['overtime_minutes'] for row in daily] == [30, 0]
+    assert totals['early_departures'].tolist() == [row['early_departure'] for row in daily] == [0, 1]
+    assert totals['early_departure_minutes'].tolist() == [0, 120]
+    assert totals['late_days'].tolist() == [0, 0]
+
+def test_compute_timesheet_without_punches():
+    totals = compute_timesheet(build_inputs([], []))
+    
+    assert totals['days_worked'].tolist() == []
+
+def test_timesheet_endpoint(app, client, admin_headers):
+    with app.app_context():
+        _, employee_id = create_employee('worker', department='Sales')
+        db.session.add(WorkSchedule(employee_id, 0, time(9, 0), time(17, 0)))
+        db.session.add(Attendance(employee_id, check_in=datetime(2024, 1, 1, 9, 45), check_out=datetime(2024, 1, 1, 17, 0)))
+        db.session.commit()
+    
+    response = client.get('/api/reports/timesheet?start_date=2024-01-01&end_date=2024-01-31', headers=admin_headers)
+    
+    assert response.status_code == 200
+    row = response.get_json()['employees'][0]
+    assert row['employee_name'] == 'Worker Test'
+    assert row['hours_worked'] == 7.25
+    assert row['lateness_minutes'] == 45
+    
+    assert client.get('/api/reports/timesheet', headers=admin_headers).status_code == 400
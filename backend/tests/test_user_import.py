@@ -0,0 +1,89 @@
+from models import db
+from models.employee import Employee
+from models.user import User
+from utils.user_import import hash_passwords
+from tests.conftest import create_employee
+
+CSV_IMPORT = """username,password,role,first_name,last_name,email,department,hire_date
+ana,secret1,employee,Ana,Ruiz,ana@alich.com,Sales,2024-01-15
+taken,secret2,employee,Taken,User,other@alich.com,,
+luis,secret3,manager,Luis,Gil,luis@alich.com,,
+ana,secret4,employee,Ana,Dup,ana2@alich.com,,
+bea,secret5,employee,Bea,Paz,bea@alich.com,IT,15/01/2024
+"""
+
+def test_bulk_register_reports_per_row_errors(app, client, admin_headers):
+    with app.app_context():
+        create_employee('taken')
+        db.session.commit()
+    
+    response = client.post('/api/auth/register/bulk', data=CSV_IMPORT, content_type='text/csv', headers=admin_headers)
+    
+    body = response.get_json()
+    assert response.status_code == 201
+    assert (body['received'], body['created'], body['failed']) == (5, 1, 4)
+    assert [(error['row'], error['username']) for error in body['errors']] == [
+        (2, 'taken'), (3, 'luis'), (4, 'ana'), (5, 'bea')
+    ]
+    
+    with app.app_context():
+        user = User.query.filter_by(username='ana').one()
+        assert user.check_password('secret1')
+        employee = Employee.query.filter_by(user_id=user.id).one()
+        assert (employee.department, employee.hire_date.isoformat()) == ('Sales', '2024-01-15')
+
+def test_bulk_register_accepts_json(client, admin_headers):
+    users = [{
+        'username': f'temp{i}', 'password': 'secret', 'role': 'employee',
+        'first_name': 'Temp', 'last_name': str(i), 'email': f'temp{i}@alich.com'
+    } for i in range(3)]
+    
+    response = client.post('/api/auth/register/bulk', json={'users': users}, headers=admin_headers)
+    
+    assert response.status_code == 201
+    assert response.get_json()['created'] == 3
+
+def test_password_hashes_across_processes():
+    hashes = hash_passwords([f'password{i}' for i in range(40)], workers=2)
+    
+    assert len(set(hashes)) == 40
+    assert all(value.startswith('pbkdf2:sha256') for value in hashes)
+
+def test_bulk_register_reports_rows_taken_mid_import(app, client, admin_headers, monkeypatch):
+    with app.app_context():
+        create_employee('taken')
+        db.session.commit()
+    
+    # Pretend another request created 'taken' after the existence check ran
+    monkeypatch.setattr('utils.user_import._existing', lambda conn, column, values: set())
+    users = [{
+        'username': username, 'password': 'secret', 'role': 'employee',
+        'first_name': 'Temp', 'last_name': username, 'email': f'{username}@example.com'
+    } for username in ('uno', 'taken', 'dos')]
+    
+    response = client.post('/api/auth/register/bulk', json={'users': users}, headers=admin_headers)
+    
+    body = response.get_json()
+    assert response.status_code == 201
+    assert (body['created'], body['failed']) == (2, 1)
+    assert [(error['row'], error['username']) for error in body['errors']] == [(2, 'taken')]
+    
+    with app.app_context():
+        assert User.query.filter(User.username.in_(['uno', 'dos'])).count() == 2
+        assert Employee.query.filter_by(email='taken@example.com').count() == 0
+
+def test_register_shares_import_validation(client, admin_headers):
+    payload = {
+        'username': 'luis', 'password': 'secret', 'role': 'manager',
+        'first_name': 'Luis', 'last_name': 'Gil', 'email': 'luis@alich.com'
+    }
+    
+    response = client.post('/api/auth/register', json=payload, headers=admin_headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'El rol debe ser admin o employee'
+    
+    response = client.post('/api/auth/register', json=dict(payload, role='employee', hire_date='15/01/2024'), headers=admin_headers)
+    assert response.status_code == 400
+    
+    response = client.post('/api/auth/register', json=dict(payload, role='employee'), headers=admin_headers)
+    assert response.status_code == 201
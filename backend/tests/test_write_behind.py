@@ -0,0 +1,121 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime
+import pytest
+from models import db
+from models.attendance import Attendance
+from models.attendance_daily import AttendanceDaily
+from utils.write_behind import PendingWrite, write_attendance_batch, write_behind
+from tests.conftest import auth_headers, create_employee
+
+@pytest.fixture
+def write_behind_enabled(app):
+    app.config['WRITE_BEHIND_ENABLED'] = True
+    yield
+    app.config['WRITE_BEHIND_ENABLED'] = False
+
+def test_batch_keeps_first_check_in_per_day(app):
+    with app.app_context():
+        _, employee_id = create_employee('worker')
+        db.session.commit()
+        
+        first = datetime(2024, 3, 4, 9, 0)
+        values = {'employee_id': employee_id, 'work_date': date(2024, 3, 4), 'status': 'present', 'notes': None}
+        batch = [
+            PendingWrite('check_in', dict(values, check_in=first), None, None),
+            PendingWrite('check_in', dict(values, check_in=first.replace(minute=5)), None, None)
+        ]
+        
+        with db.engine.begin() as conn:
+            results = write_attendance_batch(conn, batch)
+        
+        assert results[0] is not None and results[1] is None
+        assert Attendance.query.get(results[0]).check_in == first
+        assert AttendanceDaily.query.filter_by(employee_id=employee_id).count() == 1
+
+def test_concurrent_writes_share_batches(app):
+    with app.app_context():
+        employee_ids = [create_employee(f'worker{i}')[1] for i in range(20)]
+        db.session.commit()
+    
+    app.config['WRITE_BEHIND_MAX_DELAY_MS'] = 50
+    before = write_behind.stats()
+    check_in = datetime(2024, 3, 4, 9, 0)
+    
+    # Only the writer thread touches the database, the in-memory test engine has a single connection
+    def submit(employee_id):
+        return write_behind.submit(app, 'check_in', {
+            'employee_id': employee_id, 'work_date': check_in.date(), 'check_in': check_in,
+            'status': 'present', 'notes': None
+        }).result(timeout=5)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            ids = list(pool.map(submit, employee_ids))
+    finally:
+        app.config['WRITE_BEHIND_MAX_DELAY_MS'] = 5
+    
+    stats = write_behind.stats()
+    assert None not in ids and len(set(ids)) == 20
+    assert stats['committed'] - before['committed'] == 20
+    assert stats['batches'] - before['batches'] < 20
+    with app.app_context():
+        assert AttendanceDaily.query.count() == 20
+
+def test_check_in_and_out_through_the_queue(app, client, admin_headers, write_behind_enabled):
+    with app.app_context():
+        user_id, _ = create_employee('worker')
+        db.session.commit()
+    headers = auth_headers(app, user_id)
+    committed = write_behind.stats()['committed']
+    
+    assert client.post('/api/attendance/check-in', headers=headers).status_code == 201
+    assert client.post('/api/attendance/check-in', headers=headers).status_code == 409
+    assert client.post('/api/attendance/check-out', headers=headers).status_code == 200
+    assert client.post('/api/attendance/check-out', headers=headers).status_code == 409
+    
+    stats = client.get('/api/attendance/ingest/stats', headers=admin_headers).get_json()
+    assert stats['enabled'] and stats['committed'] - committed == 3 and stats['depth'] == 0
+    with app.app_context():
+        assert Attendance.query.count() == 1
+        assert AttendanceDaily.query.one().minutes_worked >= 0
+
+def test_bad_item_only_fails_its_own_write(app):
+    with app.app_context():
+        employee_ids = [create_employee(f'worker{i}')[1] for i in range(3)]
+        db.session.commit()
+    
+    check_in = datetime(2024, 3, 4, 9, 0)
+    values = {'work_date': check_in.date(), 'check_in': check_in, 'status': 'present', 'notes': None}
+    before = write_behind.stats()
+    
+    app.config['WRITE_BEHIND_MAX_DELAY_MS'] = 50
+    try:
+        # employee_id is NOT NULL, so the middle write fails the batch it lands in
+        futures = [write_behind.submit(app, 'check_in', dict(values, employee_id=employee_id))
+                   for employee_id in (employee_ids[0], None, employee_ids[1], employee_ids[2])]
+        outcomes = [future.exception(timeout=5) for future in futures]
+    finally:
+        app.config['WRITE_BEHIND_MAX_DELAY_MS'] = 5
+    
+    assert [outcome is None for outcome in outcomes] == [True, False, True, True]
+    after = write_behind.stats()
+    assert after['failed'] - before['failed'] == 1
+    assert after['batch_retries'] - before['batch_retries'] == 1
+    with app.app_context():
+        assert Attendance.query.count() == 3
+
+def test_unacknowledged_check_in_answers_accepted(app, client, write_behind_enabled, monkeypatch):
+    with app.app_context():
+        user_id, _ = create_employee('worker')
+        db.session.commit()
+    
+    # A writer that never gets to the batch
+    monkeypatch.setattr(write_behind, 'submit', lambda *args: Future())
+    app.config['WRITE_BEHIND_ACK_TIMEOUT'] = 0.01
+    try:
+        response = client.post('/api/attendance/check-in', headers=auth_headers(app, user_id))
+    finally:
+        app.config['WRITE_BEHIND_ACK_TIMEOUT'] = 10
+    
+    assert response.status_code == 202
+    assert response.get_json()['status'] == 'pending'
@@ -0,0 +1,40 @@
+from functools import wraps
+from flask import Response, current_app, make_response, request
+from utils.response_cache import cache_scope, response_cache
+
+def etag(tags, scope='role', vary=None):
+    """Answer conditional GETs from table and row versions instead of the response body.
+    
+    The weak ETag digests the current versions of `tags` (a list, or a
+    callable taking the view arguments), the caller's scope, the query
+    string and `vary()`. A matching If-None-Match gets a 304 before the
+    view runs, so nothing is loaded or serialized. Apply it after the
+    authorization decorators and above `cached`.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_app.config.get('ETAGS_ENABLED', True):
+                return f(*args, **kwargs)
+            
+            value = response_cache.fingerprint(
+                tags(**kwargs) if callable(tags) else tags,
+                cache_scope(scope), request.path, sorted(request.args.items(multi=True)), vary() if vary else ''
+            )
+            
+            if request.if_none_match.contains_weak(value):
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            # Browsers keep the private copy and revalidate it on every use
+            response.set_etag(value, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Authorization')
+            return response
+        
+        return decorated_function
+    
+    return decorator
@@ -0,0 +1,81 @@
+import csv
+import io
+import zlib
+from models.attendance import Attendance
+from utils.serialization import RowEncoder
+
+EXPORT_FIELDS = [
+    'id', 'employee_id', 'employee_name', 'department', 'work_date',
+    'check_in', 'check_out', 'status', 'notes', 'duration'
+]
+
+def attendance_durations(columns):
+    """Columnar version of the `duration` Attendance.row_to_dict computes"""
+    return [
+        (str(check_out - check_in) if check_out != check_in else None) if check_in and check_out else None
+        for check_in, check_out in zip(columns['check_in'], columns['check_out'])
+    ]
+
+# Attendance rows as Attendance.to_dict() shapes them
+ATTENDANCE_ENCODER = RowEncoder(
+    ['id', 'employee_id', 'work_date', 'check_in', 'check_out', 'status', 'notes', 'duration'],
+    computed={'duration': attendance_durations}
+)
+
+_NDJSON_ENCODER = RowEncoder(EXPORT_FIELDS, computed={
+    'employee_name': lambda columns: [
+        f'{first_name} {last_name}' for first_name, last_name in zip(columns['first_name'], columns['last_name'])
+    ],
+    'duration': attendance_durations
+})
+
+def _export_record(row):
+    record = Attendance.row_to_dict(row)
+    record['employee_name'] = f'{row.first_name} {row.last_name}'
+    record['department'] = row.department
+    return record
+
+def _csv_chunks(partitions):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    
+    for partition in partitions:
+        for row in partition:
+            writer.writerow(_export_record(row))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    # Header only when the export is empty
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _ndjson_chunks(partitions):
+    for partition in partitions:
+        yield _NDJSON_ENCODER.encode_lines(partition)
+
+def stream_attendance_export(engine, statement, export_format='csv', compress=False, chunk_size=1000):
+    """Yield an attendance export as encoded chunks while holding one chunk of rows in memory.
+    
+    The statement runs with a server-side cursor where the driver supports
+    it and rows are serialized straight from the result tuples. With
+    `compress`, each chunk is gzip-compressed and sync-flushed so clients
+    receive data as it is produced.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(statement)
+        partitions = result.partitions(chunk_size)
+        chunks = _csv_chunks(partitions) if export_format == 'csv' else _ndjson_chunks(partitions)
+        
+        for chunk in chunks:
+            data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+            if compressor:
+                data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+    
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,204 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import Response, current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, select, update
+from models import db
+from models.idempotency_key import IdempotencyKey
+from utils.sql import insert_ignore
+
+StoredResponse = namedtuple('StoredResponse', ['request_hash', 'status_code', 'body', 'expires_at'])
+
+# Seconds between purges of expired keys from the table
+PURGE_INTERVAL = 300
+
+MAX_KEY_LENGTH = 255
+
+# status_code of a key whose first request is still running
+PENDING = 0
+
+class IdempotencyStore:
+    """Responses remembered per (scope, Idempotency-Key).
+    
+    An in-process LRU answers repeated keys without a query; the
+    idempotency_keys table shares them between worker processes and
+    restarts. Both expire entries after IDEMPOTENCY_TTL seconds. A key is
+    claimed with a pending row before its request runs, so concurrent
+    repeats see it in flight instead of running the request twice. The
+    table is written on its own connection and never commits the
+    caller's session.
+    """
+    
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._purged_at = 0
+    
+    def _remember(self, cache_key, stored):
+        with self._lock:
+            self._entries[cache_key] = stored
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > current_app.config.get('IDEMPOTENCY_CACHE_SIZE', 10000):
+                self._entries.popitem(last=False)
+    
+    def get(self, scope, key):
+        now = datetime.utcnow()
+        with self._lock:
+            stored = self._entries.get((scope, key))
+            if stored is not None:
+                if stored.expires_at > now:
+                    self._entries.move_to_end((scope, key))
+                    return stored
+                del self._entries[(scope, key)]
+        
+        table = IdempotencyKey.__table__
+        row = db.session.execute(select(
+            table.c.request_hash, table.c.status_code, table.c.response_body, table.c.expires_at
+        ).where(
+            table.c.scope == scope, table.c.key == key, table.c.expires_at > now
+        )).first()
+        
+        if row is None:
+            return None
+        
+        stored = StoredResponse(*row)
+        if stored.status_code != PENDING:
+            self._remember((scope, key), stored)
+        return stored
+    
+    def claim(self, scope, key, request_hash):
+        """Insert the pending row for a key; False when another request already holds it"""
+        table = IdempotencyKey.__table__
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=current_app.config.get('IDEMPOTENCY_PENDING_TTL', 60))
+        
+        with db.engine.begin() as conn:
+            # An expired row would block the unique key until the next purge
+            conn.execute(delete(table).where(table.c.scope == scope, table.c.key == key, table.c.expires_at <= now))
+            result = conn.execute(insert_ignore(table, ['scope', 'key'], db.engine).values(
+                scope=scope, key=key, request_hash=request_hash, status_code=PENDING,
+                response_body='', created_at=now, expires_at=expires_at
+            ))
+        return result.rowcount == 1
+    
+    def save(self, scope, key, request_hash, status_code, body):
+        """Store the final response of a claimed key"""
+        table = IdempotencyKey.__table__
+        expires_at = datetime.utcnow() + timedelta(seconds=current_app.config.get('IDEMPOTENCY_TTL', 86400))
+        stored = StoredResponse(request_hash, status_code, body, expires_at)
+        
+        with db.engine.begin() as conn:
+            conn.execute(update(table).where(table.c.scope == scope, table.c.key == key).values(
+                status_code=status_code, response_body=body, expires_at=expires_at
+            ))
+            self._purge_expired(conn)
+        
+        self._remember((scope, key), stored)
+    
+    def release(self, scope, key):
+        """Drop a pending claim so the request can be retried with the same key"""
+        table = IdempotencyKey.__table__
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(delete(table).where(
+                    table.c.scope == scope, table.c.key == key, table.c.status_code == PENDING
+                ))
+        except Exception as e:
+            # The claim still expires after IDEMPOTENCY_PENDING_TTL
+            current_app.logger.warning('Could not release idempotency key: %s', e)
+    
+    def _purge_expired(self, conn):
+        if time.monotonic() - self._purged_at < PURGE_INTERVAL:
+            return
+        
+        self._purged_at = time.monotonic()
+        conn.execute(delete(IdempotencyKey.__table__).where(
+            IdempotencyKey.__table__.c.expires_at <= datetime.utcnow()
+        ))
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._purged_at = 0
+
+idempotency_store = IdempotencyStore()
+
+def _request_hash():
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+def _replay(stored, request_hash):
+    if stored.request_hash != request_hash:
+        return jsonify({
+            'message': 'Clave de idempotencia reutilizada',
+            'error': 'La clave ya se usó con una solicitud diferente'
+        }), 422
+    
+    if stored.status_code == PENDING:
+        response = jsonify({
+            'message': 'Solicitud en curso',
+            'error': 'Otra solicitud con la misma clave aún se está procesando'
+        })
+        response.status_code = 409
+        response.headers['Retry-After'] = '1'
+        return response
+    
+    response = Response(stored.body, status=stored.status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotent(f):
+    """Replay the stored response when a request repeats its Idempotency-Key.
+    
+    Keys are scoped to the endpoint and the authenticated user, so apply it
+    after jwt_required. A repeat that arrives while the first request is
+    still running gets 409. Responses with a 5xx or 202 status are not
+    stored and the request can be retried with the same key.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return f(*args, **kwargs)
+        
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({
+                'message': 'Clave de idempotencia inválida',
+                'error': f'La clave no puede superar {MAX_KEY_LENGTH} caracteres'
+            }), 400
+        
+        scope = f'{request.endpoint}:{get_jwt_identity()}'
+        request_hash = _request_hash()
+        
+        stored = idempotency_store.get(scope, key)
+        if stored is None and not idempotency_store.claim(scope, key, request_hash):
+            # Lost the race for the key; answer with whatever the winner left
+            stored = idempotency_store.get(scope, key) or StoredResponse(request_hash, PENDING, '', None)
+        if stored is not None:
+            return _replay(stored, request_hash)
+        
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            idempotency_store.release(scope, key)
+            raise
+        
+        # 202 is not final: the write-behind queue may still commit or reject the write
+        if response.status_code < 500 and response.status_code != 202 and not response.is_streamed:
+            try:
+                idempotency_store.save(scope, key, request_hash, response.status_code, response.get_data(as_text=True))
+            except Exception as e:
+                # The request itself succeeded; a retry will simply run it again
+                current_app.logger.warning('Could not store idempotency key: %s', e)
+                idempotency_store.release(scope, key)
+        else:
+            idempotency_store.release(scope, key)
+        return response
+    
+    return decorated_function
@@ -0,0 +1,195 @@
+import hmac
+import threading
+import time
+from collections import namedtuple
+from functools import wraps
+from flask import g, current_app, jsonify, request
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event, inspect
+from models import db
+from models.user import User
+from models.employee import Employee
+
+class Identity(namedtuple('Identity', ['user_id', 'role', 'employee_id', 'active'])):
+    """Authorization facts about the authenticated user"""
+    __slots__ = ()
+    
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+    
+    @property
+    def deactivated(self):
+        """The user's employee record exists but is no longer active"""
+        return self.employee_id is not None and not self.active
+
+class IdentityCache:
+    """Process-local TTL cache of identities keyed by user id.
+    
+    It also remembers when each user's identity last changed, so JWT claims
+    issued before that moment are no longer trusted.
+    """
+    
+    def __init__(self):
+        self._entries = {}
+        self._changed_at = {}
+        self._lock = threading.Lock()
+    
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        identity, expires_at = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+        return identity
+    
+    def set(self, user_id, identity, ttl):
+        self._entries[user_id] = (identity, time.monotonic() + ttl)
+    
+    def invalidate(self, user_id, max_token_age=None):
+        now = time.time()
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._changed_at[user_id] = now
+            # Tokens older than their lifetime are rejected by JWT anyway
+            if max_token_age:
+                cutoff = now - max_token_age
+                for stale_id in [uid for uid, changed in self._changed_at.items() if changed < cutoff]:
+                    del self._changed_at[stale_id]
+    
+    def changed_since(self, user_id, issued_at):
+        changed_at = self._changed_at.get(user_id)
+        return changed_at is not None and issued_at <= changed_at
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._changed_at.clear()
+
+identity_cache = IdentityCache()
+
+def identity_claims(user):
+    """Build the JWT claims carried by access tokens issued at login"""
+    employee = user.employee
+    return {
+        'role': user.role,
+        'employee_id': employee.id if employee else None,
+        'active': employee.is_active() if employee else False
+    }
+
+def _load_identity(user_id):
+    row = db.session.query(
+        User.id, User.role, Employee.id, Employee.status
+    ).outerjoin(Employee, Employee.user_id == User.id).filter(User.id == user_id).first()
+    
+    if not row:
+        return None
+    
+    return Identity(row[0], row[1], row[2], row[3] == 'active')
+
+def current_identity():
+    """Return the identity of the authenticated user, or None if the user no longer exists.
+    
+    Lookup order is the request-local cache, the optional TTL cache, the JWT
+    claims (only for tokens younger than IDENTITY_CLAIMS_TTL, and unless this
+    process saw the user change after the token was issued) and finally the
+    database.
+    """
+    if 'identity' in g:
+        return g.identity
+    
+    user_id = get_jwt_identity()
+    ttl = current_app.config.get('IDENTITY_CACHE_TTL', 0)
+    claims_ttl = current_app.config.get('IDENTITY_CLAIMS_TTL', 0)
+    
+    identity = identity_cache.get(user_id) if ttl else None
+    
+    if identity is None and claims_ttl:
+        claims = get_jwt()
+        if ('role' in claims and time.time() - claims['iat'] < claims_ttl
+                and not identity_cache.changed_since(user_id, claims['iat'])):
+            identity = Identity(user_id, claims['role'], claims.get('employee_id'), claims.get('active', False))
+    
+    if identity is None:
+        identity = _load_identity(user_id)
+        if identity and ttl:
+            identity_cache.set(user_id, identity, ttl)
+    
+    g.identity = identity
+    return identity
+
+def invalidate_identity(user_id):
+    identity_cache.invalidate(user_id, current_app.config.get('JWT_ACCESS_TOKEN_EXPIRES'))
+    if g.get('identity') and g.identity.user_id == user_id:
+        g.pop('identity')
+
+def identity_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_identity():
+            return jsonify({'message': 'No autorizado', 'error': 'Usuario no válido'}), 403
+        return f(*args, **kwargs)
+    
+    return decorated_function
+
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        identity = current_identity()
+        if not identity or not identity.is_admin or identity.deactivated:
+            return jsonify({'message': 'No autorizado', 'error': 'Se requieren privilegios de administrador'}), 403
+        return f(*args, **kwargs)
+    
+    return decorated_function
+
+def self_or_admin_required(error):
+    """Allow admins, or the employee identified by the `employee_id` route argument"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            identity = current_identity()
+            if not identity:
+                return jsonify({'message': 'No autorizado', 'error': 'Usuario no válido'}), 403
+            if not identity.is_admin and identity.employee_id != kwargs.get('employee_id'):
+                return jsonify({'message': 'No autorizado', 'error': error}), 403
+            return f(*args, **kwargs)
+        
+        return decorated_function
+    
+    return decorator
+
+def terminal_required(f):
+    """Allow requests carrying one of the configured TERMINAL_API_KEYS in X-Terminal-Key"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get('X-Terminal-Key', '')
+        keys = current_app.config.get('TERMINAL_API_KEYS', [])
+        if not key or not any(hmac.compare_digest(key, valid) for valid in keys):
+            return jsonify({'message': 'No autorizado', 'error': 'Clave de terminal inválida'}), 401
+        return f(*args, **kwargs)
+    
+    return decorated_function
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_identity_changes(session, flush_context):
+    # Attribute history is still available here, unlike in after_commit
+    changed = session.info.setdefault('identity_invalidations', set())
+    
+    for obj in session.dirty:
+        if isinstance(obj, User) and inspect(obj).attrs.role.history.has_changes():
+            changed.add(obj.id)
+        elif isinstance(obj, Employee):
+            state = inspect(obj).attrs
+            if state.status.history.has_changes() or state.user_id.history.has_changes():
+                changed.update(uid for uid in state.user_id.history.sum() if uid is not None)
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_identity_changes(session):
+    for user_id in session.info.pop('identity_invalidations', ()):
+        invalidate_identity(user_id)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_identity_changes(session):
+    session.info.pop('identity_invalidations', None)
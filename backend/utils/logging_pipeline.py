@@ -0,0 +1,272 @@
+import atexit
+import copy
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import orjson
+from flask import g, has_request_context, request
+from utils.serialization import ORJSON_OPTIONS
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id'}
+
+# Argument types that cannot change between the logging call and the listener formatting it
+_IMMUTABLE = (str, int, float, bool, type(None), bytes, Decimal, date, datetime, uuid.UUID)
+
+# Accepted incoming X-Request-ID values; anything else gets a fresh id
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+request_logger = logging.getLogger('requests')
+
+def current_request_id():
+    """Correlation id of the request being handled, or None outside a request"""
+    return g.get('request_id') if has_request_context() else None
+
+class StderrHandler(logging.StreamHandler):
+    """Stream handler writing to whatever sys.stderr is at the time of each record"""
+    
+    def __init__(self):
+        super().__init__(sys.stderr)
+    
+    @property
+    def stream(self):
+        return sys.stderr
+    
+    @stream.setter
+    def stream(self, value):
+        pass
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the time, level, logger, message, request id and `extra` fields"""
+    
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RESERVED)
+        
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        
+        return orjson.dumps(entry, default=str, option=ORJSON_OPTIONS).decode('utf-8')
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the id of the request that emitted them"""
+    
+    def filter(self, record):
+        record.request_id = current_request_id()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Sample and rate-limit records below WARNING per logger; warnings and errors always pass.
+    
+    `rates` maps logger names to the fraction of their records kept, and
+    applies to child loggers too. Each logger also gets a token bucket of
+    `burst` records refilled at `per_second`; records it rejects are counted
+    and reported as `suppressed` on that logger's next record.
+    """
+    
+    def __init__(self, rates=None, per_second=0, burst=0):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.per_second = per_second
+        self.burst = max(burst, 1)
+        self._resolved = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.sampled_out = 0
+        self.rate_limited = 0
+    
+    def _rate(self, name):
+        rate = self._resolved.get(name)
+        if rate is None:
+            parts = name.split('.')
+            prefixes = ('.'.join(parts[:i]) for i in range(len(parts), 0, -1))
+            rate = next((self.rates[prefix] for prefix in prefixes if prefix in self.rates), 1.0)
+            self._resolved[name] = rate
+        return rate
+    
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        
+        rate = self._rate(record.name)
+        if rate < 1.0 and random.random() >= rate:
+            self.sampled_out += 1
+            return False
+        
+        if self.per_second <= 0:
+            return True
+        
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, suppressed = self._buckets.get(record.name, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.per_second)
+            if tokens < 1:
+                self._buckets[record.name] = (tokens, now, suppressed + 1)
+                self.rate_limited += 1
+                return False
+            self._buckets[record.name] = (tokens - 1, now, 0)
+        
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Queue records for the listener thread, dropping them when the queue is full instead of waiting"""
+    
+    def __init__(self, capacity):
+        super().__init__(queue.Queue(capacity))
+        self.dropped = 0
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+    
+    def prepare(self, record):
+        """Copy the record for the listener, formatting now only what could change before it runs.
+        
+        The base class renders every message on the calling thread. Here the
+        %-formatting is left to the listener when all arguments are
+        immutable; mutable arguments and tracebacks are rendered immediately
+        because they may change or be released once the call returns.
+        """
+        record = copy.copy(record)
+        if record.args and not (
+            isinstance(record.args, tuple) and all(isinstance(arg, _IMMUTABLE) for arg in record.args)
+        ):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class LoggingPipeline:
+    """Root logging through a bounded queue drained by a QueueListener thread.
+    
+    Request threads only filter a record and put it on the queue; the
+    listener formats it and does the stream and file I/O. Each request gets
+    an id, taken from a well-formed X-Request-ID header or generated, that
+    is attached to its records and echoed in the response.
+    """
+    
+    def __init__(self):
+        self.handler = None
+        self.listener = None
+        self.sampler = SamplingFilter()
+        self._targets = []
+        self._capacity = 0
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        self.configure(app.config)
+        
+        @app.before_request
+        def assign_request_id():
+            incoming = request.headers.get('X-Request-ID', '')
+            g.request_id = incoming if _REQUEST_ID.match(incoming) else uuid.uuid4().hex
+            g.request_started = time.perf_counter()
+        
+        @app.after_request
+        def log_request(response):
+            request_id = g.get('request_id')
+            if request_id:
+                response.headers['X-Request-ID'] = request_id
+                request_logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+                    'status': response.status_code,
+                    'duration_ms': round((time.perf_counter() - g.request_started) * 1000, 2)
+                })
+            return response
+    
+    def configure(self, config):
+        """Install the queue handler on the root logger and start the listener"""
+        formatter = JsonFormatter() if config.get('LOG_FORMAT', 'json') == 'json' else logging.Formatter(TEXT_FORMAT)
+        targets = [StderrHandler()]
+        if config.get('LOG_FILE'):
+            targets.append(RotatingFileHandler(
+                config['LOG_FILE'], maxBytes=config.get('LOG_FILE_MAX_BYTES', 10 * 1024 * 1024),
+                backupCount=config.get('LOG_FILE_BACKUPS', 5), encoding='utf-8', delay=True
+            ))
+        for target in targets:
+            target.setFormatter(formatter)
+        
+        self.stop()
+        with self._lock:
+            root = logging.getLogger()
+            if self.handler is not None:
+                root.removeHandler(self.handler)
+            
+            self._targets = targets
+            self._capacity = config.get('LOG_QUEUE_SIZE', 10000)
+            self.sampler = SamplingFilter(
+                config.get('LOG_SAMPLE_RATES'), config.get('LOG_RATE_LIMIT', 0), config.get('LOG_RATE_BURST', 0)
+            )
+            self.handler = NonBlockingQueueHandler(self._capacity)
+            self.handler.addFilter(RequestContextFilter())
+            self.handler.addFilter(self.sampler)
+            root.addHandler(self.handler)
+            root.setLevel(config.get('LOG_LEVEL', 'INFO'))
+            self._start()
+    
+    def _start(self):
+        self.handler.queue = queue.Queue(self._capacity)
+        self.listener = QueueListener(self.handler.queue, *self._targets, respect_handler_level=True)
+        self.listener.start()
+        self._pid = os.getpid()
+    
+    def _after_fork(self):
+        # A forked worker inherits the handler but not the listener thread
+        if self.handler is not None:
+            self._lock = threading.Lock()
+            self._start()
+    
+    def stats(self):
+        """Return queue depth and the records dropped, sampled out and rate limited"""
+        handler = self.handler
+        return {
+            'depth': handler.queue.qsize() if handler else 0,
+            'capacity': self._capacity,
+            'dropped': handler.dropped if handler else 0,
+            'sampled_out': self.sampler.sampled_out,
+            'rate_limited': self.sampler.rate_limited
+        }
+    
+    def stop(self):
+        """Write out every queued record and stop the listener thread"""
+        listener = self.listener
+        if listener is None or self._pid != os.getpid():
+            return
+        
+        self.listener = None
+        listener.stop()
+        for target in self._targets:
+            target.close()
+
+logging_pipeline = LoggingPipeline()
+
+os.register_at_fork(after_in_child=logging_pipeline._after_fork)
+atexit.register(logging_pipeline.stop)
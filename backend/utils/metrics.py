@@ -0,0 +1,413 @@
+import atexit
+import glob
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+import orjson
+from flask import current_app, g, request
+from models import db
+from utils.logging_pipeline import logging_pipeline
+from utils.passwords import password_verifier
+from utils.query_stats import query_stats, thread_query_totals
+from utils.rate_limit import login_limiter
+from utils.response_cache import response_cache
+from utils.write_behind import write_behind
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name: (type, help, buckets)
+FAMILIES = {
+    'alich_http_requests_total': ('counter', 'HTTP requests by endpoint, method and status code', None),
+    'alich_http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint', LATENCY_BUCKETS),
+    'alich_http_request_db_queries': ('histogram', 'SQL statements run per HTTP request', QUERY_COUNT_BUCKETS),
+    'alich_http_request_db_seconds': ('histogram', 'Time spent in SQL statements per HTTP request', LATENCY_BUCKETS),
+    'alich_db_pool_checkout_seconds': ('histogram', 'Time to obtain a connection from the pool, including waits', LATENCY_BUCKETS),
+    'alich_db_pool_connections': ('gauge', 'Pool connections by state', None),
+    'alich_db_queries_total': ('counter', 'SQL statements recorded by the query statistics', None),
+    'alich_db_slow_queries_total': ('counter', 'SQL statements slower than SLOW_QUERY_MS', None),
+    'alich_cache_requests_total': ('counter', 'Cache lookups by cache and result', None),
+    'alich_cache_entries': ('gauge', 'Entries held by each cache', None),
+    'alich_login_attempts_total': ('counter', 'Login throttle checks, rejections and recorded failures', None),
+    'alich_password_operations_total': ('counter', 'Password hash operations by outcome', None),
+    'alich_write_behind_items_total': ('counter', 'Write-behind attendance writes by outcome', None),
+    'alich_write_behind_queue_depth': ('gauge', 'Attendance writes waiting for the writer thread', None),
+    'alich_log_records_total': ('counter', 'Log records not written, by reason', None),
+    'alich_log_queue_depth': ('gauge', 'Log records waiting for the listener thread', None)
+}
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(pairs, extra=None):
+    pairs = list(pairs) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Shard:
+    """Counters and histograms written by one thread only, so updates take no lock"""
+    
+    __slots__ = ('thread', 'counters', 'histograms')
+    
+    def __init__(self, thread):
+        self.thread = thread
+        self.counters = {}
+        self.histograms = {}
+    
+    def merge(self, other):
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, values in other.histograms.items():
+            mine = self.histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                mine[i] += value
+
+class Registry:
+    """In-process counters and histograms sharded per thread.
+    
+    Each thread increments its own dicts, so the request path never takes a
+    lock; scrapes copy the shards and add them up. Shards of finished
+    threads are folded into one retired shard so thread-per-request servers
+    do not grow the list.
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard(None)
+    
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._fold_finished()
+                self._shards.append(shard)
+        return shard
+    
+    def _fold_finished(self):
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                self._retired.merge(shard)
+        self._shards = alive
+    
+    def inc(self, name, labels=(), value=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+    
+    def observe(self, name, labels, value):
+        buckets = FAMILIES[name][2]
+        histograms = self._shard().histograms
+        key = (name, labels)
+        counts = histograms.get(key)
+        if counts is None:
+            # One slot per bucket, one for +Inf, then the sum
+            counts = histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+        counts[bisect_left(buckets, value)] += 1
+        counts[-1] += value
+    
+    def snapshot(self):
+        """Sum of every shard as {(name, labels): value or histogram slots}"""
+        total = _Shard(None)
+        with self._lock:
+            self._fold_finished()
+            shards = [self._retired] + self._shards
+        for shard in shards:
+            # dict() copies in one step, safe against the owning thread adding keys
+            copy = _Shard(None)
+            copy.counters = dict(shard.counters)
+            copy.histograms = {key: list(values) for key, values in dict(shard.histograms).items()}
+            total.merge(copy)
+        return total
+
+def _pool_samples(engine):
+    pool = engine.pool
+    samples = []
+    for state, method in (('size', 'size'), ('checked_out', 'checkedout'), ('overflow', 'overflow'), ('idle', 'checkedin')):
+        if hasattr(pool, method):
+            samples.append(((('state', state),), getattr(pool, method)()))
+    return samples
+
+class Metrics:
+    """Prometheus metrics for requests, the database, caches and background queues.
+    
+    Request hooks record latency, status codes and the SQL statements and
+    time each request spent, labelled by blueprint and endpoint so N+1
+    patterns stand out. Module counters (response cache, login throttle,
+    password executor, write-behind queue, logging pipeline, query stats)
+    are read at scrape time.
+    
+    With METRICS_DIR set, each worker process writes its values to its own
+    file there every METRICS_FLUSH_INTERVAL seconds and when it exits, and
+    a scrape of any worker adds up every file. Counters of workers that
+    have exited are kept so totals never go backwards; their gauges are
+    dropped.
+    """
+    
+    def __init__(self):
+        self.registry = Registry()
+        self.directory = None
+        self._engine = None
+        self._app = None
+        self._flusher = None
+        self._pid = None
+        self._stop = threading.Event()
+    
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        
+        self._app = app
+        self.directory = app.config.get('METRICS_DIR')
+        self._interval = app.config.get('METRICS_FLUSH_INTERVAL', 10)
+        
+        with app.app_context():
+            self.instrument_engine(db.engine)
+        
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', self.render_response)
+    
+    def instrument_engine(self, engine):
+        """Time pool checkouts by wrapping the pool's connect(), which the engine looks up per call"""
+        self._engine = engine
+        pool = engine.pool
+        if getattr(pool, '_metrics_wrapped', False):
+            return
+        
+        connect = pool.connect
+        registry = self.registry
+        
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            finally:
+                registry.observe('alich_db_pool_checkout_seconds', (), time.perf_counter() - started)
+        
+        pool.connect = timed_connect
+        pool._metrics_wrapped = True
+    
+    def _before_request(self):
+        if self.directory and (self._flusher is None or self._pid != os.getpid()):
+            self.start_flusher()
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = thread_query_totals()
+    
+    def _after_request(self, response):
+        started = g.get('metrics_started')
+        if started is None or request.endpoint == 'metrics':
+            return response
+        
+        duration = time.perf_counter() - started
+        queries, db_ms = thread_query_totals()
+        queries_before, db_ms_before = g.metrics_queries
+        
+        # Unmatched URLs share one label instead of one series per path
+        endpoint = (('blueprint', request.blueprint or ''), ('endpoint', request.endpoint or 'unmatched'))
+        registry = self.registry
+        registry.inc('alich_http_requests_total', endpoint + (('method', request.method), ('status', str(response.status_code))))
+        registry.observe('alich_http_request_duration_seconds', endpoint, duration)
+        registry.observe('alich_http_request_db_queries', endpoint, queries - queries_before)
+        registry.observe('alich_http_request_db_seconds', endpoint, (db_ms - db_ms_before) / 1000)
+        return response
+    
+    def _collected(self):
+        """Values owned by other modules, read now: {(name, labels): value}"""
+        values = {}
+        
+        def add(name, labels, value):
+            values[(name, tuple(labels))] = value
+        
+        collectors = [self._collect_pool, self._collect_caches, self._collect_queues]
+        for collect in collectors:
+            try:
+                collect(add)
+            except Exception as e:
+                logger.debug('Metrics collector %s failed: %s', collect.__name__, e)
+        return values
+    
+    def _collect_pool(self, add):
+        if self._engine is not None:
+            for labels, value in _pool_samples(self._engine):
+                add('alich_db_pool_connections', labels, value)
+        
+        stats = query_stats.stats()
+        add('alich_db_queries_total', (), stats['calls'])
+        add('alich_db_slow_queries_total', (), stats['slow_calls'])
+    
+    def _collect_caches(self, add):
+        stats = response_cache.stats()
+        for result in ('hits', 'misses', 'stale'):
+            add('alich_cache_requests_total', (('cache', 'response'), ('result', result)), stats[result])
+        add('alich_cache_entries', (('cache', 'response'),), stats['entries'])
+        
+        stats = login_limiter.stats()
+        for outcome in ('checked', 'rejected', 'failures'):
+            add('alich_login_attempts_total', (('outcome', outcome),), stats[outcome])
+        
+        for outcome, value in password_verifier.stats().items():
+            add('alich_password_operations_total', (('outcome', outcome),), value)
+    
+    def _collect_queues(self, add):
+        stats = write_behind.stats()
+        for outcome in ('submitted', 'rejected', 'committed', 'failed'):
+            add('alich_write_behind_items_total', (('outcome', outcome),), stats[outcome])
+        add('alich_write_behind_queue_depth', (), stats['depth'])
+        
+        stats = logging_pipeline.stats()
+        for reason in ('dropped', 'sampled_out', 'rate_limited'):
+            add('alich_log_records_total', (('reason', reason),), stats[reason])
+        add('alich_log_queue_depth', (), stats['depth'])
+    
+    def values(self):
+        """Every value of this process: {(name, labels): number or histogram slots}"""
+        total = self.registry.snapshot()
+        values = dict(total.counters)
+        values.update(total.histograms)
+        values.update(self._collected())
+        return values
+    
+    def _path(self, pid):
+        return os.path.join(self.directory, f'metrics-{pid}.json')
+    
+    def write(self):
+        """Write this process's values to its file in METRICS_DIR"""
+        if not self.directory:
+            return
+        
+        os.makedirs(self.directory, exist_ok=True)
+        payload = orjson.dumps([[name, labels, value] for (name, labels), value in self.values().items()])
+        path = self._path(os.getpid())
+        with open(f'{path}.tmp', 'wb') as f:
+            f.write(payload)
+        os.replace(f'{path}.tmp', path)
+    
+    def merged(self):
+        """Values of every worker that wrote to METRICS_DIR, or of this process alone without one"""
+        if not self.directory:
+            return self.values()
+        
+        self.write()
+        merged = {}
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            pid = int(os.path.basename(path)[len('metrics-'):-len('.json')])
+            try:
+                with open(path, 'rb') as f:
+                    entries = orjson.loads(f.read())
+            except (OSError, ValueError):
+                continue
+            
+            alive = _alive(pid)
+            for name, labels, value in entries:
+                kind = FAMILIES.get(name, ('gauge',))[0]
+                if kind == 'gauge' and not alive:
+                    continue
+                key = (name, tuple(tuple(pair) for pair in labels))
+                if isinstance(value, list):
+                    current = merged.setdefault(key, [0] * len(value))
+                    merged[key] = [a + b for a, b in zip(current, value)]
+                else:
+                    merged[key] = merged.get(key, 0) + value
+        return merged
+    
+    def render(self):
+        """The Prometheus text exposition of every metric"""
+        by_family = {}
+        for (name, labels), value in self.merged().items():
+            by_family.setdefault(name, []).append((labels, value))
+        
+        lines = []
+        for name, (kind, help_text, buckets) in FAMILIES.items():
+            samples = by_family.get(name)
+            if not samples:
+                continue
+            
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(samples):
+                if kind != 'histogram':
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                    continue
+                
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), value[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(labels, ("le", bound))} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(value[-1])}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        
+        return '\n'.join(lines) + '\n'
+    
+    def render_response(self):
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return current_app.response_class('No autorizado\n', status=401, mimetype='text/plain')
+        return current_app.response_class(self.render(), mimetype=CONTENT_TYPE)
+    
+    def start_flusher(self):
+        """Write this process's file periodically; started lazily so forked workers get their own thread"""
+        if not self.directory or (self._flusher is not None and self._pid == os.getpid()):
+            return
+        
+        self._pid = os.getpid()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._flusher.start()
+    
+    def _flush_loop(self):
+        while not self._stop.wait(self._interval):
+            self._flush()
+    
+    def _flush(self):
+        try:
+            with self._app.app_context():
+                self.write()
+        except Exception as e:
+            logger.debug('Could not write metrics file: %s', e)
+    
+    def stop(self):
+        if self._flusher is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._flusher = None
+        self._flush()
+    
+    def _after_fork(self):
+        # Values recorded before the fork belong to the parent's file
+        self.registry._lock = threading.Lock()
+        self.registry._reset()
+        self._flusher = None
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+metrics = Metrics()
+
+os.register_at_fork(after_in_child=metrics._after_fork)
+atexit.register(metrics.stop)
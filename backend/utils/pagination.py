@@ -0,0 +1,146 @@
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from flask import current_app, request
+from sqlalchemy import and_, or_
+from sqlalchemy.sql import Select
+from utils.readonly import count_rows, read_rows
+
+def encode_cursor(values):
+    """Encode the sort key of the last row of a page as an opaque cursor token"""
+    payload = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).rstrip(b'=').decode('ascii')
+
+def decode_cursor(token):
+    """Decode a cursor token produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeEncodeError) as e:
+        raise ValueError('Cursor inválido') from e
+    
+    if not isinstance(values, list):
+        raise ValueError('Cursor inválido')
+    
+    return values
+
+def get_limit():
+    """Read the `limit` query parameter, capped at MAX_ITEMS_PER_PAGE"""
+    limit = request.args.get('limit', current_app.config['ITEMS_PER_PAGE'], type=int)
+    return max(1, min(limit, current_app.config['MAX_ITEMS_PER_PAGE']))
+
+def get_per_page():
+    """Read the `per_page` query parameter, capped at MAX_ITEMS_PER_PAGE"""
+    per_page = request.args.get('per_page', current_app.config['ITEMS_PER_PAGE'], type=int)
+    return max(1, min(per_page, current_app.config['MAX_ITEMS_PER_PAGE']))
+
+def cursor_requested():
+    """Whether the client asked for cursor pagination instead of page numbers"""
+    return 'cursor' in request.args
+
+def _dump_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _load_value(column, value):
+    """Turn a decoded cursor value back into the column's type, raising ValueError for tampered values"""
+    if value is None:
+        if not column.nullable:
+            raise ValueError('Cursor inválido')
+        return None
+    if isinstance(value, (list, dict)):
+        raise ValueError('Cursor inválido')
+    
+    python_type = column.type.python_type
+    try:
+        if python_type is datetime or python_type is date:
+            if not isinstance(value, str):
+                raise ValueError('Cursor inválido')
+            return python_type.fromisoformat(value)
+        return python_type(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError('Cursor inválido') from e
+
+def _after(order_by, values, descending):
+    """Build the keyset predicate `(c1, c2, ...) > (v1, v2, ...)` in a portable form"""
+    clauses = []
+    for i, column in enumerate(order_by):
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*[order_by[j] == values[j] for j in range(i)], beyond))
+    return or_(*clauses)
+
+def paginate_keyset(query, order_by, limit, cursor=None, descending=False):
+    """Fetch one page of `query` ordered by the `order_by` columns.
+    
+    `query` is an ORM query or a Core select. The columns must be NOT NULL,
+    since NULL sort keys never satisfy the keyset predicate, and the last
+    one must be unique (normally the primary key). Rows must expose each sort column as
+    an attribute named after the column key. Returns the rows and the
+    cursor of the next page, or None on the last page. Raises ValueError
+    for malformed cursors.
+    """
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(order_by):
+            raise ValueError('Cursor inválido')
+        values = [_load_value(column, value) for column, value in zip(order_by, values)]
+        query = query.filter(_after(order_by, values, descending))
+    
+    ordering = [column.desc() if descending else column for column in order_by]
+    page_query = query.order_by(*ordering).limit(limit + 1)
+    rows = read_rows(page_query) if isinstance(page_query, Select) else page_query.all()
+    
+    if len(rows) <= limit:
+        return rows, None
+    
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([_dump_value(getattr(last, column.key)) for column in order_by])
+
+class CountCache:
+    """Small LRU of recent COUNT(*) results so cursor pages can report totals cheaply"""
+    
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def set(self, key, total, ttl):
+        with self._lock:
+            self._entries[key] = (total, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+count_cache = CountCache()
+
+def cached_total(query):
+    """Return the row count of `query`, reusing a recent count for the same path and filters"""
+    ignored = {'cursor', 'limit', 'include_total', 'page', 'per_page'}
+    key = (request.path, tuple(sorted((k, v) for k, v in request.args.items(multi=True) if k not in ignored)))
+    
+    total = count_cache.get(key)
+    if total is None:
+        total = count_rows(query) if isinstance(query, Select) else query.order_by(None).count()
+        count_cache.set(key, total, current_app.config['COUNT_CACHE_TTL'])
+    
+    return total
+
+def include_total_requested():
+    return request.args.get('include_total', 'false').lower() in ('1', 'true', 'yes')
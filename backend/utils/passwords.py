@@ -0,0 +1,92 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from werkzeug.security import check_password_hash
+from models.user import hash_password, password_hash_settings
+
+class VerifierBusy(Exception):
+    """Raised when too many password operations are already waiting or one took too long"""
+
+class PasswordVerifier:
+    """Bounded executor for password hashing and verification.
+    
+    pbkdf2 releases the GIL, so a few threads run hashes in parallel while
+    PASSWORD_VERIFY_WORKERS caps how many cores a login storm can take from
+    the request workers. At most PASSWORD_VERIFY_QUEUE operations may be
+    running or waiting; beyond that callers get VerifierBusy right away
+    instead of tying up a request thread, and so do callers whose operation
+    does not finish within PASSWORD_VERIFY_TIMEOUT.
+    """
+    
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'completed': 0, 'rejected': 0, 'timed_out': 0}
+    
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+    
+    def _ensure_started(self, config):
+        # A forked worker inherits the executor object but not its threads
+        if self._executor is not None and self._pid == os.getpid():
+            return
+        
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                return
+            
+            self._executor = ThreadPoolExecutor(
+                max_workers=config.get('PASSWORD_VERIFY_WORKERS', 2), thread_name_prefix='password'
+            )
+            self._slots = threading.BoundedSemaphore(config.get('PASSWORD_VERIFY_QUEUE', 64))
+            self._timeout = config.get('PASSWORD_VERIFY_TIMEOUT', 10)
+            self._pid = os.getpid()
+    
+    def _run(self, fn, *args):
+        self._ensure_started(current_app.config)
+        
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise VerifierBusy()
+        
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            result = future.result(timeout=self._timeout)
+        except FutureTimeout:
+            # The hash keeps its slot until it finishes; the caller is answered like a full queue
+            self._count('timed_out')
+            raise VerifierBusy()
+        self._count('completed')
+        return result
+    
+    def verify(self, password_hash, password):
+        """Check a password against its stored hash on the executor"""
+        return self._run(check_password_hash, password_hash, password)
+    
+    def hash(self, password):
+        """Hash a password with the configured parameters on the executor"""
+        method, salt_length = password_hash_settings()
+        return self._run(hash_password, password, method, salt_length)
+    
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+    
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+password_verifier = PasswordVerifier()
@@ -0,0 +1,206 @@
+from datetime import datetime
+from sqlalchemy import select
+from models.attendance import Attendance
+from models.employee import Employee
+from utils.query_budget import allow_queries
+from utils.rollups import is_early_departure, is_late, refresh_daily_rollups, scheduled_end
+from utils.schedule_index import schedule_index
+from utils.sql import upsert
+
+# Keys per IN list when resolving employees and existing attendance
+LOOKUP_CHUNK_SIZE = 500
+
+# Rows per multi-row upsert statement
+WRITE_CHUNK_SIZE = 1000
+
+PUNCH_TYPES = ('in', 'out', None)
+
+def _chunks(values, size):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def parse_punches(raw_punches):
+    """Validate raw punch dicts.
+    
+    Returns (punches, results): valid punches as (index, employee key,
+    timestamp, type) where the key is ('id', value) or ('email', value),
+    and a result slot per raw punch already filled for the invalid ones.
+    """
+    punches = []
+    results = [None] * len(raw_punches)
+    
+    for index, raw in enumerate(raw_punches):
+        if not isinstance(raw, dict):
+            results[index] = {'index': index, 'result': 'error', 'error': 'Formato de marcación inválido'}
+            continue
+        
+        if raw.get('employee_id') is not None:
+            key = ('id', raw['employee_id'])
+        elif raw.get('email'):
+            key = ('email', raw['email'])
+        else:
+            results[index] = {'index': index, 'result': 'error', 'error': 'Se requiere employee_id o email'}
+            continue
+        
+        try:
+            timestamp = datetime.fromisoformat(raw.get('timestamp'))
+        except (TypeError, ValueError):
+            results[index] = {'index': index, 'result': 'error', 'error': 'Fecha y hora inválidas'}
+            continue
+        
+        if raw.get('type') not in PUNCH_TYPES:
+            results[index] = {'index': index, 'result': 'error', 'error': 'El tipo debe ser in u out'}
+            continue
+        
+        if timestamp.tzinfo is not None:
+            # Attendance is stored in the server's naive local time
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        punches.append((index, key, timestamp, raw.get('type')))
+    
+    return punches, results
+
+def resolve_employees(conn, keys):
+    """Map ('id', value) and ('email', value) keys to (employee_id, status) with batched lookups"""
+    employees = Employee.__table__
+    ids = {value for kind, value in keys if kind == 'id' and isinstance(value, int)}
+    emails = {value for kind, value in keys if kind == 'email'}
+    
+    resolved = {}
+    for column, kind, values in ((employees.c.id, 'id', ids), (employees.c.email, 'email', emails)):
+        for chunk in _chunks(values, LOOKUP_CHUNK_SIZE):
+            allow_queries(1)
+            for row in conn.execute(select(
+                employees.c.id, employees.c.email, employees.c.status
+            ).where(column.in_(chunk))):
+                value = row.id if kind == 'id' else row.email
+                resolved[(kind, value)] = (row.id, row.status)
+    
+    return resolved
+
+def load_days(conn, keys):
+    """Load the attendance rows of (employee_id, work_date) keys"""
+    attendance = Attendance.__table__
+    days = {}
+    
+    for chunk in _chunks({employee_id for employee_id, _ in keys}, LOOKUP_CHUNK_SIZE):
+        allow_queries(1)
+        dates = [work_date for employee_id, work_date in keys if employee_id in chunk]
+        for row in conn.execute(select(
+            attendance.c.employee_id, attendance.c.work_date, attendance.c.check_in,
+            attendance.c.check_out, attendance.c.status, attendance.c.notes
+        ).where(
+            attendance.c.employee_id.in_(chunk),
+            attendance.c.work_date.between(min(dates), max(dates))
+        )):
+            if (row.employee_id, row.work_date) in keys:
+                days[(row.employee_id, row.work_date)] = row
+    
+    return days
+
+def pair_day(punches, existing=None, schedule=None):
+    """Fold one employee's punches of one day into an attendance row.
+    
+    `punches` is a list of (index, timestamp, type) sorted by timestamp.
+    Untyped punches count as check-in when they are the first of the day
+    and as check-out when they are the last. An existing check-in always
+    wins, an existing check-out only when it is later. Returns the row
+    values (or None when nothing changes) and the result of each punch.
+    """
+    check_in = existing.check_in if existing else None
+    check_out = existing.check_out if existing else None
+    status = existing.status if existing else 'present'
+    notes = existing.notes if existing else None
+    outcome = {index: 'duplicate' for index, _, _ in punches}
+    
+    if check_in is None:
+        typed = [punch for punch in punches if punch[2] == 'in']
+        untyped = [punch for punch in punches if punch[2] is None]
+        candidates = typed or untyped[:1]
+        if candidates:
+            index, check_in, _ = candidates[0]
+            outcome[index] = 'check_in'
+            if schedule and is_late(check_in, schedule[0]):
+                status = 'late'
+                notes = f'Llegada tardía. Hora programada: {schedule[0].strftime("%H:%M")}'
+    
+    out_candidates = [
+        punch for punch in punches
+        if outcome[punch[0]] != 'check_in' and punch[2] != 'in' and check_in is not None and punch[1] > check_in
+    ]
+    if out_candidates and (check_out is None or out_candidates[-1][1] > check_out):
+        index, check_out, _ = out_candidates[-1]
+        outcome[index] = 'check_out'
+        # Rebuild the early-departure line so a later check-out replaces it instead of stacking
+        notes = '\n'.join(line for line in (notes or '').split('\n') if not line.startswith('Salida temprana.')) or None
+        if schedule and is_early_departure(check_out, scheduled_end(check_in.date(), *schedule)):
+            notes = (notes or '') + '\nSalida temprana. '
+            notes += f'Hora programada: {schedule[1].strftime("%H:%M")}'
+    
+    if check_in is None:
+        # Only check-outs for a day without check-in
+        return None, {index: 'error' for index in outcome}
+    
+    if existing and check_in == existing.check_in and check_out == existing.check_out:
+        return None, outcome
+    
+    return {'check_in': check_in, 'check_out': check_out, 'status': status, 'notes': notes}, outcome
+
+def import_punches(conn, raw_punches):
+    """Pair and store a batch of terminal punches in the caller's transaction.
+    
+    Returns the per-punch results in input order plus summary counts.
+    """
+    punches, results = parse_punches(raw_punches)
+    employees = resolve_employees(conn, {key for _, key, _, _ in punches})
+    
+    days = {}
+    for index, key, timestamp, punch_type in punches:
+        employee = employees.get(key)
+        if employee is None:
+            results[index] = {'index': index, 'result': 'error', 'error': 'Empleado no encontrado'}
+        elif employee[1] != 'active':
+            results[index] = {'index': index, 'result': 'error', 'error': 'Empleado inactivo'}
+        else:
+            days.setdefault((employee[0], timestamp.date()), []).append((index, timestamp, punch_type))
+    
+    existing = load_days(conn, set(days)) if days else {}
+    schedules = schedule_index.mapping({employee_id for employee_id, _ in days})
+    
+    rows = []
+    created = updated = 0
+    for (employee_id, work_date), day_punches in days.items():
+        day_punches.sort(key=lambda punch: punch[1])
+        row, outcome = pair_day(
+            day_punches, existing.get((employee_id, work_date)), schedules.get((employee_id, work_date.weekday()))
+        )
+        
+        for index, result in outcome.items():
+            results[index] = {
+                'index': index, 'result': result, 'employee_id': employee_id, 'work_date': work_date.isoformat()
+            }
+            if result == 'error':
+                results[index]['error'] = 'Salida sin entrada registrada'
+        
+        if row:
+            row.update(employee_id=employee_id, work_date=work_date)
+            rows.append(row)
+            if (employee_id, work_date) in existing:
+                updated += 1
+            else:
+                created += 1
+    
+    statement = upsert(Attendance.__table__, ['employee_id', 'work_date'], ['check_in', 'check_out', 'status', 'notes'], conn)
+    for chunk in _chunks(rows, WRITE_CHUNK_SIZE):
+        allow_queries(1)
+        conn.execute(statement, chunk)
+    
+    refresh_daily_rollups(conn, [(row['employee_id'], row['work_date']) for row in rows])
+    
+    return {
+        'received': len(raw_punches),
+        'created': created,
+        'updated': updated,
+        'rejected': sum(1 for result in results if result['result'] == 'error'),
+        'results': results
+    }
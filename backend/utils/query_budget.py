@@ -0,0 +1,75 @@
+import logging
+import threading
+from contextlib import ContextDecorator
+from flask import current_app, has_app_context
+from utils.query_stats import thread_query_totals
+
+logger = logging.getLogger(__name__)
+
+_granted = threading.local()
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a block runs more SQL statements than its budget allows"""
+
+def budget_mode():
+    """'raise', 'warn' or 'off': QUERY_BUDGET_MODE, else raise under TESTING, warn under DEBUG"""
+    if not has_app_context():
+        return 'off'
+    config = current_app.config
+    mode = config.get('QUERY_BUDGET_MODE')
+    if mode:
+        return mode
+    if config.get('TESTING'):
+        return 'raise'
+    return 'warn' if current_app.debug else 'off'
+
+def allow_queries(count=1):
+    """Add `count` statements to every budget open on this thread.
+    
+    For loops that run one statement per fixed-size chunk of their input:
+    the view's budget covers its constant part and each chunk pays for
+    its own statement.
+    """
+    _granted.total = getattr(_granted, 'total', 0) + count
+
+class query_budget(ContextDecorator):
+    """Declare the most SQL statements a view or block may run.
+    
+    Usable as a decorator or a context manager. Statements are counted on
+    the current thread through the query_stats cursor hooks, so work done
+    by background threads (write-behind batches, password hashing) is not
+    charged, and statements granted with allow_queries() raise the limit.
+    Going over the budget raises QueryBudgetExceeded or logs a warning
+    depending on budget_mode().
+    """
+    
+    def __init__(self, limit, name=None):
+        self.limit = limit
+        self.name = name
+        # One decorator instance serves every request thread
+        self._local = threading.local()
+    
+    def __call__(self, f):
+        self.name = self.name or f.__qualname__
+        return super().__call__(f)
+    
+    def __enter__(self):
+        self._local.__dict__.setdefault('started', []).append(
+            (thread_query_totals()[0], getattr(_granted, 'total', 0))
+        )
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        queries, granted = self._local.started.pop()
+        used = thread_query_totals()[0] - queries
+        limit = self.limit + getattr(_granted, 'total', 0) - granted
+        if exc_type is not None or used <= limit:
+            return False
+        
+        mode = budget_mode()
+        message = f'{self.name or "block"} ran {used} SQL statements, budget is {limit}'
+        if mode == 'raise':
+            raise QueryBudgetExceeded(message)
+        if mode == 'warn':
+            logger.warning('Query budget exceeded: %s', message, extra={'used': used, 'budget': limit})
+        return False
@@ -0,0 +1,205 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_logger = logging.getLogger('sql.slow')
+
+# Plan prefixes per dialect; dialects without one are not explained
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN',
+    'mysql': 'EXPLAIN',
+    'postgresql': 'EXPLAIN'
+}
+
+SORT_KEYS = ('total_ms', 'mean_ms', 'max_ms', 'calls')
+
+# Statements naming any of these columns or tables never have their parameters recorded
+SENSITIVE_NAMES = re.compile(r'\b(password_hash|idempotency_keys|response_body|request_hash)\b', re.IGNORECASE)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+def _normalize(statement):
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _LITERALS.sub('?', statement)
+    return _PLACEHOLDER_LISTS.sub('(?+)', statement)
+
+def _short_repr(value, limit=200):
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+def _params_repr(statement, parameters):
+    if SENSITIVE_NAMES.search(statement):
+        return '<redacted>'
+    return _short_repr(parameters)
+
+class QueryStats:
+    """Per-fingerprint timings of every SQL statement sent through a SQLAlchemy engine.
+    
+    A fingerprint is the statement text with whitespace collapsed, literals
+    replaced by ? and placeholder lists folded, so `IN (?, ?, ?)` and
+    `IN (?, ?)` aggregate together. Each keeps call count, total, min and
+    max duration, rows affected as reported by the driver (SELECT rows only
+    where the driver counts them, e.g. MySQL but not SQLite), and the
+    parameters of its slowest call when QUERY_STATS_PARAMS is on, except for
+    statements touching SENSITIVE_NAMES. Statements slower than SLOW_QUERY_MS
+    are logged to the `sql.slow` logger, and with QUERY_EXPLAIN_ENABLED the
+    first slow SELECT of each fingerprint has its plan captured.
+    """
+    
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = 0
+        self.explain = False
+        self.record_params = False
+        self.max_fingerprints = 1000
+        self._fingerprints = OrderedDict()
+        self._normalized = {}
+        self._lock = threading.Lock()
+        self.evicted = 0
+    
+    def init_app(self, app):
+        self.enabled = app.config.get('QUERY_STATS_ENABLED', True)
+        self.slow_ms = app.config.get('SLOW_QUERY_MS', 200)
+        self.explain = app.config.get('QUERY_EXPLAIN_ENABLED', False)
+        self.record_params = app.config.get('QUERY_STATS_PARAMS', False)
+        self.max_fingerprints = app.config.get('QUERY_STATS_MAX_FINGERPRINTS', 1000)
+    
+    def fingerprint(self, statement):
+        """Normalized form of a statement; results are memoized since the same strings repeat"""
+        fingerprint = self._normalized.get(statement)
+        if fingerprint is None:
+            fingerprint = _normalize(statement)
+            if len(self._normalized) >= self.max_fingerprints * 4:
+                self._normalized.clear()
+            self._normalized[statement] = fingerprint
+        return fingerprint
+    
+    def record(self, statement, parameters, duration_ms, rowcount, executemany=False):
+        """Add one execution to its fingerprint and return whether its plan should be captured"""
+        fingerprint = self.fingerprint(statement)
+        slow = self.slow_ms > 0 and duration_ms >= self.slow_ms
+        
+        with self._lock:
+            entry = self._fingerprints.get(fingerprint)
+            if entry is None:
+                entry = self._fingerprints[fingerprint] = {
+                    'calls': 0, 'total_ms': 0.0, 'min_ms': duration_ms, 'max_ms': 0.0,
+                    'rows': 0, 'slow_calls': 0, 'slowest_params': None, 'plan': None
+                }
+                while len(self._fingerprints) > self.max_fingerprints:
+                    self._fingerprints.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._fingerprints.move_to_end(fingerprint)
+            
+            entry['calls'] += 1
+            entry['total_ms'] += duration_ms
+            entry['min_ms'] = min(entry['min_ms'], duration_ms)
+            if rowcount is not None and rowcount >= 0:
+                entry['rows'] += rowcount
+            if duration_ms >= entry['max_ms']:
+                entry['max_ms'] = duration_ms
+                if self.record_params:
+                    entry['slowest_params'] = _params_repr(statement, parameters)
+            if slow:
+                entry['slow_calls'] += 1
+            needs_plan = slow and self.explain and entry['plan'] is None and not executemany
+        
+        if slow:
+            slow_logger.warning('Slow query (%.1f ms): %s', duration_ms, fingerprint, extra={
+                'duration_ms': round(duration_ms, 3),
+                'rowcount': rowcount,
+                'params': _params_repr(statement, parameters) if self.record_params else None
+            })
+        
+        return needs_plan
+    
+    def set_plan(self, statement, plan):
+        with self._lock:
+            entry = self._fingerprints.get(self.fingerprint(statement))
+            if entry is not None:
+                entry['plan'] = plan
+    
+    def top(self, limit=20, sort='total_ms'):
+        """The `limit` fingerprints with the highest `sort` value, as dicts"""
+        with self._lock:
+            entries = [dict(entry, fingerprint=fingerprint) for fingerprint, entry in self._fingerprints.items()]
+        
+        for entry in entries:
+            entry['mean_ms'] = entry['total_ms'] / entry['calls']
+            for key in ('total_ms', 'mean_ms', 'min_ms', 'max_ms'):
+                entry[key] = round(entry[key], 3)
+        
+        entries.sort(key=lambda entry: entry[sort], reverse=True)
+        return entries[:limit]
+    
+    def stats(self):
+        with self._lock:
+            entries = list(self._fingerprints.values())
+        return {
+            'fingerprints': len(entries),
+            'calls': sum(entry['calls'] for entry in entries),
+            'total_ms': round(sum(entry['total_ms'] for entry in entries), 3),
+            'slow_calls': sum(entry['slow_calls'] for entry in entries),
+            'evicted': self.evicted
+        }
+    
+    def clear(self):
+        with self._lock:
+            self._fingerprints.clear()
+            self._normalized.clear()
+            self.evicted = 0
+
+query_stats = QueryStats()
+
+# Statements run by each thread and the time spent in them, for per-request totals
+_tally = threading.local()
+
+def thread_query_totals():
+    """Statements the current thread has run so far and their total milliseconds"""
+    return getattr(_tally, 'queries', 0), getattr(_tally, 'ms', 0.0)
+
+def _explain(conn, cursor, statement, parameters):
+    """Run the dialect's EXPLAIN for a statement on a fresh DBAPI cursor, bypassing engine events"""
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith('SELECT'):
+        return None
+    
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute(f'{prefix} {statement}', parameters)
+        return [list(row) for row in explain_cursor.fetchall()]
+    except Exception as e:
+        return [f'EXPLAIN failed: {e}']
+    finally:
+        explain_cursor.close()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if not started:
+        return
+    
+    duration_ms = (time.perf_counter() - started.pop()) * 1000
+    _tally.queries = getattr(_tally, 'queries', 0) + 1
+    _tally.ms = getattr(_tally, 'ms', 0.0) + duration_ms
+    
+    if query_stats.enabled and query_stats.record(statement, parameters, duration_ms, cursor.rowcount, executemany):
+        query_stats.set_plan(statement, _explain(conn, cursor, statement, parameters))
+
+@event.listens_for(Engine, 'handle_error')
+def _discard_timer(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_started'):
+        conn.info['query_started'].pop()
@@ -0,0 +1,206 @@
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app
+from sqlalchemy import bindparam, delete, func, select, update
+from models import db
+from models.rate_limit_bucket import RateLimitBucket
+from utils.sql import insert_ignore
+
+# Burst size and tokens regained per second
+Budget = namedtuple('Budget', ['capacity', 'rate'])
+
+def _refill(state, budget, now):
+    if state is None:
+        return float(budget.capacity)
+    tokens, updated_at = state
+    return min(float(budget.capacity), tokens + max(0.0, now - updated_at) * budget.rate)
+
+class MemoryBackend:
+    """Process-local token buckets in a bounded LRU, guarded by one lock"""
+    
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _store(self, key, tokens, now):
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        
+        # Evicting an idle key only forgets failures, it never blocks anyone
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+    
+    def take(self, buckets, now, cost=1):
+        """Spend `cost` tokens from every bucket, or from none when one is short; return the levels seen"""
+        with self._lock:
+            levels = [_refill(self._buckets.get(key), budget, now) for key, budget in buckets]
+            if all(tokens >= cost for tokens in levels):
+                for (key, _), tokens in zip(buckets, levels):
+                    self._store(key, tokens - cost, now)
+            return levels
+    
+    def give_back(self, buckets, now, amount=1):
+        """Return tokens to every bucket; a bucket back at capacity is forgotten"""
+        with self._lock:
+            for key, budget in buckets:
+                tokens = _refill(self._buckets.get(key), budget, now) + amount
+                if tokens >= budget.capacity:
+                    self._buckets.pop(key, None)
+                else:
+                    self._store(key, tokens, now)
+    
+    def __len__(self):
+        return len(self._buckets)
+    
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+class DatabaseBackend:
+    """Token buckets in the rate_limit_buckets table, shared by every worker process.
+    
+    Each change locks the bucket rows with SELECT ... FOR UPDATE, in key
+    order, so concurrent workers serialize instead of overwriting each
+    other's charge.
+    """
+    
+    def _lock_rows(self, conn, keys):
+        table = RateLimitBucket.__table__
+        return {row.bucket_key: (row.tokens, row.updated_at) for row in conn.execute(
+            select(table.c.bucket_key, table.c.tokens, table.c.updated_at)
+            .where(table.c.bucket_key.in_(keys))
+            .order_by(table.c.bucket_key)
+            .with_for_update()
+        )}
+    
+    def _set_tokens(self):
+        table = RateLimitBucket.__table__
+        return update(table).where(table.c.bucket_key == bindparam('key')).values(
+            tokens=bindparam('tokens'), updated_at=bindparam('now')
+        )
+    
+    def take(self, buckets, now, cost=1):
+        table = RateLimitBucket.__table__
+        with db.engine.begin() as conn:
+            # A missing bucket is a full one; creating it first gives FOR UPDATE a row to lock
+            conn.execute(insert_ignore(table, ['bucket_key'], conn), [
+                {'bucket_key': key, 'tokens': float(budget.capacity), 'updated_at': now} for key, budget in buckets
+            ])
+            states = self._lock_rows(conn, sorted(key for key, _ in buckets))
+            levels = [_refill(states.get(key), budget, now) for key, budget in buckets]
+            if all(tokens >= cost for tokens in levels):
+                conn.execute(self._set_tokens(), [
+                    {'key': key, 'tokens': tokens - cost, 'now': now} for (key, _), tokens in zip(buckets, levels)
+                ])
+        return levels
+    
+    def give_back(self, buckets, now, amount=1):
+        table = RateLimitBucket.__table__
+        with db.engine.begin() as conn:
+            states = self._lock_rows(conn, sorted(key for key, _ in buckets))
+            levels = {key: _refill(states[key], budget, now) + amount for key, budget in buckets if key in states}
+            full = [key for key, budget in buckets if key in levels and levels[key] >= budget.capacity]
+            if full:
+                conn.execute(delete(table).where(table.c.bucket_key.in_(full)))
+            refilled = [{'key': key, 'tokens': tokens, 'now': now} for key, tokens in levels.items() if key not in full]
+            if refilled:
+                conn.execute(self._set_tokens(), refilled)
+    
+    def __len__(self):
+        with db.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(RateLimitBucket.__table__)).scalar()
+    
+    def clear(self):
+        with db.engine.begin() as conn:
+            conn.execute(delete(RateLimitBucket.__table__))
+
+class LoginLimiter:
+    """Throttle failed logins per username and per client IP.
+    
+    Each key owns a token bucket and tokens come back at a steady rate.
+    Every attempt reserves one token from each key involved before the
+    user is loaded or a password hashed, so concurrent guesses cannot all
+    pass on the same refill; while any bucket is empty, attempts are
+    rejected. Successful logins give their token back, so people sharing
+    a kiosk IP are only throttled by failures.
+    """
+    
+    def __init__(self):
+        self._backend = None
+        self._backend_name = None
+        self._lock = threading.Lock()
+        self._stats = {'checked': 0, 'rejected': 0, 'failures': 0}
+    
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+    
+    def backend(self):
+        name = current_app.config.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+        if self._backend is None or self._backend_name != name:
+            if name == 'database':
+                self._backend = DatabaseBackend()
+            else:
+                self._backend = MemoryBackend(current_app.config.get('LOGIN_RATE_LIMIT_MAX_KEYS', 100000))
+            self._backend_name = name
+        return self._backend
+    
+    def _budgets(self, username, client_ip):
+        config = current_app.config
+        return [
+            (f'login:user:{username.lower()}', Budget(
+                config.get('LOGIN_USER_BURST', 5), config.get('LOGIN_USER_PER_MINUTE', 1) / 60
+            )),
+            (f'login:ip:{client_ip}', Budget(
+                config.get('LOGIN_IP_BURST', 20), config.get('LOGIN_IP_PER_MINUTE', 10) / 60
+            ))
+        ]
+    
+    def reserve(self, username, client_ip):
+        """Take a token for an attempt; return the seconds to wait instead, or 0 when reserved"""
+        if not current_app.config.get('LOGIN_RATE_LIMIT_ENABLED', True):
+            return 0
+        
+        self._count('checked')
+        budgets = self._budgets(username, client_ip)
+        levels = self.backend().take(budgets, time.time())
+        wait = 0
+        for (_, budget), tokens in zip(budgets, levels):
+            if tokens < 1:
+                wait = max(wait, math.ceil((1 - tokens) / budget.rate) if budget.rate else 60)
+        
+        if wait:
+            self._count('rejected')
+        return wait
+    
+    def refund(self, username, client_ip):
+        """Give back the token of an attempt that did not fail"""
+        if not current_app.config.get('LOGIN_RATE_LIMIT_ENABLED', True):
+            return
+        
+        self.backend().give_back(self._budgets(username, client_ip), time.time())
+    
+    def record_failure(self, username, client_ip):
+        # The reserved token stays spent
+        if current_app.config.get('LOGIN_RATE_LIMIT_ENABLED', True):
+            self._count('failures')
+    
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        # Every rejected attempt is a password hash that never ran
+        stats['hashes_avoided'] = stats['rejected']
+        stats['backend'] = self._backend_name or current_app.config.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+        stats['tracked_keys'] = len(self.backend())
+        return stats
+    
+    def clear(self):
+        if self._backend is not None and self._backend_name == 'memory':
+            self._backend.clear()
+        with self._lock:
+            self._stats = {'checked': 0, 'rejected': 0, 'failures': 0}
+
+login_limiter = LoginLimiter()
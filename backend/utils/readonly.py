@@ -0,0 +1,52 @@
+from collections import namedtuple
+from math import ceil
+from flask import abort
+from sqlalchemy import func, select
+from models import db
+
+Page = namedtuple('Page', ['items', 'total', 'pages', 'page'])
+
+def table_columns(model, *names):
+    """Columns of a model's table, every one of them when no names are given.
+    
+    Selecting table columns instead of the mapped class returns plain rows:
+    nothing is added to the session's identity map or tracked for changes.
+    Build the lists once at import time; SQLAlchemy caches each statement's
+    compiled form by its structure, so rebuilding the same select per
+    request only costs the cache lookup.
+    """
+    table = model.__table__
+    return [table.c[name] for name in names] if names else list(table.c)
+
+def read_rows(statement):
+    """Run a Core select on the session's connection and return its rows"""
+    return db.session.execute(statement).all()
+
+def read_mappings(statement):
+    """Run a Core select and return its rows as read-only mappings keyed by column name"""
+    return db.session.execute(statement).mappings().all()
+
+def count_rows(statement):
+    return db.session.execute(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    ).scalar()
+
+def paginate_rows(statement, page, per_page):
+    """Page-number pagination for a Core select, matching Flask-SQLAlchemy's paginate().
+    
+    Pages past the end abort with 404, and the COUNT is skipped when the
+    first page already holds every row.
+    """
+    if page < 1:
+        abort(404)
+    
+    items = read_rows(statement.limit(per_page).offset((page - 1) * per_page))
+    if not items and page != 1:
+        abort(404)
+    
+    if page == 1 and len(items) < per_page:
+        total = len(items)
+    else:
+        total = count_rows(statement)
+    
+    return Page(items, total, ceil(total / per_page) if total else 0, page)
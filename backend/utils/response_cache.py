@@ -0,0 +1,420 @@
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from flask import Response, current_app, has_app_context, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect
+from models import db
+from models.attendance import Attendance
+from models.team_member import TeamMember
+from models.work_schedule import WorkSchedule
+from utils.identity import current_identity
+
+CachedResponse = namedtuple('CachedResponse', ['status_code', 'mimetype', 'body', 'versions', 'expires_at'])
+
+# Foreign keys whose values also tag a changed row, so per-parent views can depend on them
+SCOPE_COLUMNS = {
+    Attendance: ['employee_id'],
+    TeamMember: ['team_id', 'employee_id'],
+    WorkSchedule: ['employee_id']
+}
+
+def model_tag(model, **columns):
+    """Tag for every row of a model, or for the rows matching the given column values"""
+    if not columns:
+        return model.__name__
+    return model.__name__ + ':' + ','.join(f'{name}={value}' for name, value in sorted(columns.items()))
+
+def row_tags(model, values):
+    """Tags touched by writing one row with the given column values"""
+    tags = {model_tag(model)}
+    if values.get('id') is not None:
+        tags.add(model_tag(model, id=values['id']))
+    for column in SCOPE_COLUMNS.get(model, []):
+        if values.get(column) is not None:
+            tags.add(model_tag(model, **{column: values[column]}))
+    return tags
+
+class MemoryBackend:
+    """Process-local LRU bounded by entry count and total body size.
+    
+    Tag versions come from one process-wide counter, so a version is never
+    reused after clear(). The version map only grows with the rows this
+    process has changed, which the tables themselves bound.
+    """
+    
+    # Other processes cannot bump these versions
+    shared = False
+    
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.generation = uuid.uuid4().hex
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._versions = {}
+        self._clock = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def versions(self, tags):
+        return {tag: self._versions.get(tag, 0) for tag in tags}
+    
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = next(self._clock)
+    
+    def get(self, key):
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+            return cached
+    
+    def set(self, key, cached):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            
+            self._entries[key] = cached
+            self._bytes += len(cached.body)
+            
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.evictions += 1
+    
+    def delete(self, key):
+        with self._lock:
+            cached = self._entries.pop(key, None)
+            if cached is not None:
+                self._bytes -= len(cached.body)
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._versions.clear()
+
+class LocalBackend:
+    """Entries and tag versions in a SQLite file shared by the worker processes of one host.
+    
+    Invalidations made by any worker are seen by all of them, unlike the
+    memory backend whose entries other processes can only outlive until
+    RESPONSE_CACHE_TTL. Eviction drops the oldest stored entries first.
+    """
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            status_code INTEGER NOT NULL,
+            mimetype TEXT NOT NULL,
+            body BLOB NOT NULL,
+            versions TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            stored_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_stored_at ON entries (stored_at);
+        CREATE TABLE IF NOT EXISTS tag_versions (
+            tag TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            token TEXT NOT NULL
+        );
+    '''
+    
+    # Stores between checks of the entry count
+    EVICT_EVERY = 100
+    
+    shared = True
+    
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+    
+    def _connection(self):
+        # Connections are per thread and must not cross a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(self.SCHEMA)
+            conn.execute('INSERT OR IGNORE INTO generation (id, token) VALUES (1, ?)', (uuid.uuid4().hex,))
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+    
+    @property
+    def generation(self):
+        # Versions restart from zero when the store is cleared, the token tells the two eras apart
+        return self._connection().execute('SELECT token FROM generation').fetchone()[0]
+    
+    def versions(self, tags):
+        tags = list(tags)
+        versions = dict.fromkeys(tags, 0)
+        if tags:
+            placeholders = ','.join('?' * len(tags))
+            versions.update(self._connection().execute(
+                f'SELECT tag, version FROM tag_versions WHERE tag IN ({placeholders})', tags
+            ).fetchall())
+        return versions
+    
+    def bump(self, tags):
+        self._connection().executemany(
+            'INSERT INTO tag_versions (tag, version) VALUES (?, 1) '
+            'ON CONFLICT (tag) DO UPDATE SET version = version + 1',
+            [(tag,) for tag in tags]
+        )
+    
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT status_code, mimetype, body, versions, expires_at FROM entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(row[0], row[1], bytes(row[2]), json.loads(row[3]), row[4])
+    
+    def set(self, key, cached):
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO entries (key, status_code, mimetype, body, versions, expires_at, stored_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (key, cached.status_code, cached.mimetype, cached.body, json.dumps(cached.versions),
+             cached.expires_at, time.time())
+        )
+        
+        with self._lock:
+            self._writes += 1
+            check = self._writes % self.EVICT_EVERY == 0
+        if check:
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    'DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY stored_at LIMIT ?)', (excess,)
+                )
+                with self._lock:
+                    self.evictions += excess
+    
+    def delete(self, key):
+        self._connection().execute('DELETE FROM entries WHERE key = ?', (key,))
+    
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+    
+    def clear(self):
+        conn = self._connection()
+        conn.execute('DELETE FROM entries')
+        conn.execute('DELETE FROM tag_versions')
+        conn.execute('UPDATE generation SET token = ?', (uuid.uuid4().hex,))
+
+class ResponseCache:
+    """Cached GET responses invalidated by the tags of the rows they were built from.
+    
+    Each entry records the version of every tag it depends on, read before
+    the view ran. Committing a change to a row bumps the versions of its
+    tags, so entries built from older data stop matching and are dropped
+    on their next lookup. Entries also expire after RESPONSE_CACHE_TTL.
+    """
+    
+    def __init__(self):
+        self._backend = None
+        self._backend_name = None
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stale': 0, 'stores': 0, 'invalidations': 0}
+    
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+    
+    def backend(self):
+        config = current_app.config
+        name = config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        if self._backend is None or self._backend_name != name:
+            if name == 'local':
+                path = config.get('RESPONSE_CACHE_PATH') or os.path.join(tempfile.gettempdir(), 'alich_response_cache.db')
+                self._backend = LocalBackend(path, config.get('RESPONSE_CACHE_MAX_ENTRIES', 10000))
+            else:
+                self._backend = MemoryBackend(
+                    config.get('RESPONSE_CACHE_MAX_ENTRIES', 10000), config.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+                )
+            self._backend_name = name
+        return self._backend
+    
+    def versions(self, tags):
+        return self.backend().versions(tags)
+    
+    def fingerprint(self, tags, *parts):
+        """Digest of the current tag versions, for validators such as ETags.
+        
+        Memory backend versions only track this process's commits, so its
+        fingerprints also roll over every RESPONSE_CACHE_TTL seconds and a
+        client revalidating against another worker gets at most that stale.
+        """
+        backend = self.backend()
+        generation = backend.generation
+        if not backend.shared:
+            generation += f'.{int(time.time() // max(current_app.config.get("RESPONSE_CACHE_TTL", 60), 1))}'
+        
+        digest = hashlib.blake2b(digest_size=12)
+        digest.update(generation.encode())
+        digest.update(json.dumps(sorted(backend.versions(tags).items())).encode())
+        for part in parts:
+            digest.update(b'|' + str(part).encode())
+        return digest.hexdigest()
+    
+    def get(self, key):
+        backend = self.backend()
+        cached = backend.get(key)
+        if cached is None:
+            self._count('misses')
+            return None
+        
+        if cached.expires_at <= time.time() or backend.versions(cached.versions) != cached.versions:
+            backend.delete(key)
+            self._count('stale')
+            self._count('misses')
+            return None
+        
+        self._count('hits')
+        return cached
+    
+    def set(self, key, cached):
+        self.backend().set(key, cached)
+        self._count('stores')
+    
+    def invalidate(self, tags):
+        """Bump the given tags so entries depending on them are rebuilt"""
+        # Session events may fire outside a request; without an app context only a live backend can be bumped
+        backend = self.backend() if has_app_context() else self._backend
+        if backend is not None and tags:
+            backend.bump(tags)
+            self._count('invalidations', len(tags))
+    
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['backend'] = self._backend_name or current_app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        stats['entries'] = len(self.backend())
+        stats['evictions'] = self.backend().evictions
+        return stats
+    
+    def clear(self):
+        if self._backend is not None:
+            self._backend.clear()
+        self._backend = None
+        self._backend_name = None
+        with self._lock:
+            self._stats = {'hits': 0, 'misses': 0, 'stale': 0, 'stores': 0, 'invalidations': 0}
+
+response_cache = ResponseCache()
+
+def invalidate_on_commit(tags):
+    """Invalidate tags once the current session commits, for writes made outside the ORM"""
+    db.session.info.setdefault('cache_invalidations', set()).update(tags)
+
+def cache_scope(scope):
+    """Who a cached response is shared with: a 'user' id, a 'role' or everyone ('global')"""
+    if scope == 'user':
+        return str(get_jwt_identity())
+    if scope == 'role':
+        identity = current_identity()
+        return identity.role if identity else ''
+    return ''
+
+def _cache_key(scope, vary):
+    args = sorted(request.args.items(multi=True))
+    extra = vary() if vary else ''
+    return f'{cache_scope(scope)}|{request.path}|{args}|{extra}'
+
+def cached(tags, scope='role', vary=None):
+    """Serve repeated GETs from the response cache.
+    
+    `tags` lists the tags the response depends on, or is a callable taking
+    the view arguments and returning them. `scope` keys entries per 'role',
+    per 'user' or 'global'ly; apply it after the authorization decorators
+    so only permitted requests reach the cache. `vary` may return extra
+    key material such as the current date. Only 200 responses are stored.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_app.config.get('RESPONSE_CACHE_ENABLED', True):
+                return f(*args, **kwargs)
+            
+            key = _cache_key(scope, vary)
+            hit = response_cache.get(key)
+            if hit is not None:
+                response = Response(hit.body, status=hit.status_code, mimetype=hit.mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            
+            # Read versions before the view queries, so a commit racing with it leaves the entry stale
+            versions = response_cache.versions(tags(**kwargs) if callable(tags) else tags)
+            
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                expires_at = time.time() + current_app.config.get('RESPONSE_CACHE_TTL', 60)
+                response_cache.set(key, CachedResponse(
+                    response.status_code, response.mimetype, response.get_data(), versions, expires_at
+                ))
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        
+        return decorated_function
+    
+    return decorator
+
+def _table_models():
+    return {mapper.local_table: mapper.class_ for mapper in db.Model.registry.mappers}
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_row_changes(session, flush_context):
+    changed = session.info.setdefault('cache_invalidations', set())
+    
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        model = type(obj)
+        changed.update(row_tags(model, {'id': getattr(obj, 'id', None)}))
+        
+        # Old and new foreign key values both tag the row, e.g. a member moved between teams
+        for column in SCOPE_COLUMNS.get(model, []):
+            for value in inspect(obj).attrs[column].history.sum():
+                changed.update(row_tags(model, {column: value}))
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _collect_statement_changes(orm_execute_state):
+    # INSERT/UPDATE/DELETE statements run through the session skip the flush events
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        model = _table_models().get(orm_execute_state.statement.table)
+        if model is not None:
+            orm_execute_state.session.info.setdefault('cache_invalidations', set()).add(model_tag(model))
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_row_changes(session):
+    changed = session.info.pop('cache_invalidations', None)
+    if changed:
+        response_cache.invalidate(changed)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_row_changes(session):
+    session.info.pop('cache_invalidations', None)
@@ -0,0 +1,198 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, case, delete, func, insert, literal, or_, select
+from models.attendance import Attendance
+from models.attendance_daily import AttendanceDaily
+from models.attendance_monthly import AttendanceMonthly
+from utils.schedule_index import schedule_index
+from utils.sql import upsert, upsert_from_select
+
+# Same tolerance check-in and check-out apply to lateness and early departures
+TOLERANCE = timedelta(minutes=10)
+
+DAILY_COLUMNS = ['minutes_worked', 'late', 'early_departure', 'overtime_minutes']
+MONTHLY_COLUMNS = ['days_worked', 'minutes_worked', 'late_days', 'early_departures', 'overtime_minutes']
+
+INSERT_CHUNK_SIZE = 5000
+
+def is_late(check_in, start_time):
+    """More than TOLERANCE after the scheduled start, to the whole second like the timesheet"""
+    return check_in.replace(microsecond=0) > datetime.combine(check_in.date(), start_time) + TOLERANCE
+
+def scheduled_end(work_date, start_time, end_time):
+    """End of a shift starting on `work_date`; a shift ending before it starts ends the next day"""
+    ends_at = datetime.combine(work_date, end_time)
+    return ends_at + timedelta(days=1) if end_time < start_time else ends_at
+
+def is_early_departure(check_out, ends_at):
+    """More than TOLERANCE before the scheduled end, as returned by scheduled_end"""
+    return check_out < ends_at - TOLERANCE
+
+def compute_daily(employee_id, work_date, check_in, check_out, status, schedule=None):
+    """Compute the daily rollup row for one attendance record.
+    
+    `schedule` is the (start_time, end_time) pair for the record's weekday,
+    or None when the employee is not scheduled that day.
+    """
+    minutes_worked = 0
+    if check_in and check_out and check_out > check_in:
+        minutes_worked = int((check_out - check_in).total_seconds() // 60)
+    
+    early_departure = False
+    overtime_minutes = 0
+    if schedule and check_out:
+        ends_at = scheduled_end(work_date, *schedule)
+        early_departure = is_early_departure(check_out, ends_at)
+        scheduled_minutes = int((ends_at - datetime.combine(work_date, schedule[0])).total_seconds() // 60)
+        overtime_minutes = max(0, minutes_worked - scheduled_minutes)
+    
+    return {
+        'employee_id': employee_id,
+        'work_date': work_date,
+        'minutes_worked': minutes_worked,
+        'late': status == 'late',
+        'early_departure': early_departure,
+        'overtime_minutes': overtime_minutes
+    }
+
+def _month_bounds(year, month):
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+def iter_months(start_date, end_date):
+    """Yield (year, month) for every month overlapping the date range"""
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+def refresh_monthly_rollups(conn, months, prune=False):
+    """Recompute monthly rows from the daily rollups.
+    
+    `months` maps (year, month) to a set of employee ids, or to None for
+    every employee. With `prune`, monthly rows left without any daily row
+    are deleted first.
+    """
+    daily = AttendanceDaily.__table__
+    monthly = AttendanceMonthly.__table__
+    
+    for (year, month), employee_ids in months.items():
+        month_start, month_end = _month_bounds(year, month)
+        in_month = and_(daily.c.work_date >= month_start, daily.c.work_date < month_end)
+        if employee_ids is not None:
+            in_month = and_(in_month, daily.c.employee_id.in_(employee_ids))
+        
+        if prune:
+            stale = delete(monthly).where(monthly.c.year == year, monthly.c.month == month)
+            if employee_ids is not None:
+                stale = stale.where(monthly.c.employee_id.in_(employee_ids))
+            conn.execute(stale)
+        
+        totals = select(
+            daily.c.employee_id,
+            literal(year),
+            literal(month),
+            func.count(),
+            func.sum(daily.c.minutes_worked),
+            func.sum(case((daily.c.late, 1), else_=0)),
+            func.sum(case((daily.c.early_departure, 1), else_=0)),
+            func.sum(daily.c.overtime_minutes)
+        ).where(in_month).group_by(daily.c.employee_id)
+        
+        conn.execute(upsert_from_select(
+            monthly,
+            ['employee_id', 'year', 'month'] + MONTHLY_COLUMNS,
+            totals,
+            ['employee_id', 'year', 'month'],
+            MONTHLY_COLUMNS,
+            conn
+        ))
+
+def apply_daily_rollups(conn, rows):
+    """Upsert precomputed daily rows and refresh the months they fall in"""
+    if not rows:
+        return
+    
+    conn.execute(upsert(AttendanceDaily.__table__, ['employee_id', 'work_date'], DAILY_COLUMNS, conn), rows)
+    
+    months = {}
+    for row in rows:
+        months.setdefault((row['work_date'].year, row['work_date'].month), set()).add(row['employee_id'])
+    refresh_monthly_rollups(conn, months)
+
+def refresh_daily_rollups(conn, keys):
+    """Recompute the daily rollups for (employee_id, work_date) keys from the attendance table"""
+    keys = set(keys)
+    if not keys:
+        return
+    
+    attendance = Attendance.__table__
+    daily = AttendanceDaily.__table__
+    employee_ids = {employee_id for employee_id, _ in keys}
+    dates = [work_date for _, work_date in keys]
+    
+    records = conn.execute(select(
+        attendance.c.employee_id, attendance.c.work_date, attendance.c.check_in,
+        attendance.c.check_out, attendance.c.status
+    ).where(
+        attendance.c.employee_id.in_(employee_ids),
+        attendance.c.work_date.between(min(dates), max(dates))
+    )).all()
+    
+    schedules = schedule_index.mapping(employee_ids)
+    rows = [
+        compute_daily(
+            record.employee_id, record.work_date, record.check_in, record.check_out, record.status,
+            schedules.get((record.employee_id, record.work_date.weekday()))
+        )
+        for record in records if (record.employee_id, record.work_date) in keys
+    ]
+    
+    # Days whose attendance record disappeared or moved to another date
+    missing = keys - {(row['employee_id'], row['work_date']) for row in rows}
+    if missing:
+        conn.execute(delete(daily).where(or_(*[
+            and_(daily.c.employee_id == employee_id, daily.c.work_date == work_date)
+            for employee_id, work_date in missing
+        ])))
+    
+    if rows:
+        conn.execute(upsert(daily, ['employee_id', 'work_date'], DAILY_COLUMNS, conn), rows)
+    
+    months = {}
+    for employee_id, work_date in keys:
+        months.setdefault((work_date.year, work_date.month), set()).add(employee_id)
+    refresh_monthly_rollups(conn, months, prune=bool(missing))
+
+def rebuild_rollups(conn, year, month):
+    """Rebuild every daily and monthly rollup of one month from the attendance table.
+    
+    Returns the number of daily rows written.
+    """
+    attendance = Attendance.__table__
+    daily = AttendanceDaily.__table__
+    month_start, month_end = _month_bounds(year, month)
+    
+    conn.execute(delete(daily).where(daily.c.work_date >= month_start, daily.c.work_date < month_end))
+    
+    records = conn.execute(select(
+        attendance.c.employee_id, attendance.c.work_date, attendance.c.check_in,
+        attendance.c.check_out, attendance.c.status
+    ).where(
+        attendance.c.work_date >= month_start, attendance.c.work_date < month_end
+    )).all()
+    
+    schedules = schedule_index.mapping()
+    rows = [
+        compute_daily(
+            record.employee_id, record.work_date, record.check_in, record.check_out, record.status,
+            schedules.get((record.employee_id, record.work_date.weekday()))
+        )
+        for record in records
+    ]
+    
+    for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+        conn.execute(insert(daily), rows[i:i + INSERT_CHUNK_SIZE])
+    
+    refresh_monthly_rollups(conn, {(year, month): None}, prune=True)
+    return len(rows)
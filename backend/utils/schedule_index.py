@@ -0,0 +1,217 @@
+import threading
+import time as clock
+from collections import namedtuple
+from datetime import time
+import numpy as np
+from flask import current_app
+from sqlalchemy import event, inspect, select
+from models import db
+from models.work_schedule import WorkSchedule
+
+# Marks an unscheduled weekday in the minute arrays
+MISSING = -1
+
+_State = namedtuple('_State', ['employee_ids', 'schedule_ids', 'start', 'end', 'loaded_at'])
+
+def _empty_state():
+    return _State(
+        employee_ids=np.empty(0, dtype=np.int64),
+        schedule_ids=np.empty((0, 7), dtype=np.int64),
+        start=np.empty((0, 7), dtype=np.int32),
+        end=np.empty((0, 7), dtype=np.int32),
+        loaded_at=None
+    )
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+def _time(minutes):
+    return time(int(minutes) // 60, int(minutes) % 60)
+
+class ScheduleIndex:
+    """Process-local weekly schedule matrix for O(1) schedule lookups.
+    
+    Holds dense employees x 7 arrays of schedule id and start/end minute of
+    day, one schedule per employee and weekday (the first by id, as the
+    previous `.first()` lookups returned). Readers take a snapshot of the
+    immutable state, writers swap in a new one. The index loads lazily,
+    reloads fully after SCHEDULE_INDEX_TTL seconds so changes made by other
+    worker processes are picked up, and reloads the employees whose
+    schedules this process changed in one query on the next lookup.
+    """
+    
+    def __init__(self):
+        self._state = _empty_state()
+        self._stale = set()
+        self._lock = threading.Lock()
+    
+    def _snapshot(self):
+        state = self._state
+        ttl = current_app.config.get('SCHEDULE_INDEX_TTL', 300)
+        if state.loaded_at is None or (ttl and clock.monotonic() - state.loaded_at > ttl):
+            self.load()
+        elif self._stale:
+            with self._lock:
+                stale, self._stale = self._stale, set()
+            self.refresh_employees(stale)
+        return self._state
+    
+    @staticmethod
+    def _read_rows(employee_ids=None):
+        schedules = WorkSchedule.__table__
+        query = select(
+            schedules.c.id, schedules.c.employee_id, schedules.c.day_of_week,
+            schedules.c.start_time, schedules.c.end_time
+        ).order_by(schedules.c.id)
+        
+        if employee_ids is not None:
+            query = query.where(schedules.c.employee_id.in_(employee_ids))
+        
+        return db.session.execute(query).all()
+    
+    @staticmethod
+    def _build(rows, employee_ids):
+        schedule_ids = np.full((len(employee_ids), 7), MISSING, dtype=np.int64)
+        start = np.full((len(employee_ids), 7), MISSING, dtype=np.int32)
+        end = np.full((len(employee_ids), 7), MISSING, dtype=np.int32)
+        
+        positions = {employee_id: i for i, employee_id in enumerate(employee_ids.tolist())}
+        for row in rows:
+            i = positions[row.employee_id]
+            if schedule_ids[i, row.day_of_week] == MISSING:
+                schedule_ids[i, row.day_of_week] = row.id
+                start[i, row.day_of_week] = _minutes(row.start_time)
+                end[i, row.day_of_week] = _minutes(row.end_time)
+        
+        return schedule_ids, start, end
+    
+    def load(self):
+        """Rebuild the whole index from the work_schedules table"""
+        with self._lock:
+            self._stale.clear()
+            rows = self._read_rows()
+            employee_ids = np.unique(np.array([row.employee_id for row in rows], dtype=np.int64))
+            schedule_ids, start, end = self._build(rows, employee_ids)
+            self._state = _State(employee_ids, schedule_ids, start, end, clock.monotonic())
+    
+    def refresh_employees(self, employee_ids):
+        """Reload the weeks of employees whose schedules changed, with one query"""
+        if self._state.loaded_at is None or not employee_ids:
+            return
+        
+        with self._lock:
+            state = self._state
+            changed = np.unique(np.array(list(employee_ids), dtype=np.int64))
+            schedule_ids, start, end = self._build(self._read_rows(changed.tolist()), changed)
+            
+            # Drop the changed rows, then merge the reloaded ones back in id order
+            kept = ~np.isin(state.employee_ids, changed)
+            new_ids = np.concatenate([state.employee_ids[kept], changed])
+            order = np.argsort(new_ids, kind='stable')
+            self._state = _State(
+                new_ids[order],
+                np.concatenate([state.schedule_ids[kept], schedule_ids])[order],
+                np.concatenate([state.start[kept], start])[order],
+                np.concatenate([state.end[kept], end])[order],
+                state.loaded_at
+            )
+    
+    def invalidate(self, employee_ids):
+        """Mark employees whose schedules changed so the next lookup reloads them"""
+        with self._lock:
+            self._stale.update(employee_ids)
+    
+    def _position(self, state, employee_id):
+        i = int(np.searchsorted(state.employee_ids, employee_id))
+        if i < len(state.employee_ids) and state.employee_ids[i] == employee_id:
+            return i
+        return None
+    
+    def get(self, employee_id, day_of_week):
+        """Return the employee's schedule for a weekday as a detached WorkSchedule, or None"""
+        state = self._snapshot()
+        i = self._position(state, employee_id)
+        if i is None or state.schedule_ids[i, day_of_week] == MISSING:
+            return None
+        
+        schedule = WorkSchedule(
+            employee_id=employee_id,
+            day_of_week=day_of_week,
+            start_time=_time(state.start[i, day_of_week]),
+            end_time=_time(state.end[i, day_of_week])
+        )
+        schedule.id = int(state.schedule_ids[i, day_of_week])
+        return schedule
+    
+    def for_employee(self, employee_id):
+        """Return the employee's weekly schedules ordered by weekday"""
+        schedules = (self.get(employee_id, day_of_week) for day_of_week in range(7))
+        return [schedule for schedule in schedules if schedule]
+    
+    def mapping(self, employee_ids=None):
+        """Map (employee_id, day_of_week) to (start_time, end_time) for the given or all employees"""
+        state = self._snapshot()
+        wanted = None if employee_ids is None else set(employee_ids)
+        
+        result = {}
+        for i, day_of_week in zip(*np.nonzero(state.schedule_ids != MISSING)):
+            employee_id = int(state.employee_ids[i])
+            if wanted is None or employee_id in wanted:
+                result[(employee_id, int(day_of_week))] = (_time(state.start[i, day_of_week]), _time(state.end[i, day_of_week]))
+        return result
+    
+    def matrix(self, employee_ids):
+        """Return start and end minute arrays (len(employee_ids) x 7) for the given sorted ids"""
+        state = self._snapshot()
+        employee_ids = np.asarray(employee_ids, dtype=np.int64)
+        
+        positions = np.searchsorted(state.employee_ids, employee_ids)
+        positions = np.minimum(positions, max(len(state.employee_ids) - 1, 0))
+        found = (state.employee_ids[positions] == employee_ids) if len(state.employee_ids) else np.zeros(len(employee_ids), dtype=bool)
+        
+        start = np.full((len(employee_ids), 7), MISSING, dtype=np.int32)
+        end = np.full((len(employee_ids), 7), MISSING, dtype=np.int32)
+        start[found] = state.start[positions[found]]
+        end[found] = state.end[positions[found]]
+        return start, end
+    
+    def expected_at(self, day_of_week, minute):
+        """Return the ids of employees whose schedule covers the given weekday and minute"""
+        state = self._snapshot()
+        start, end = state.start[:, day_of_week], state.end[:, day_of_week]
+        previous_start, previous_end = state.start[:, day_of_week - 1], state.end[:, day_of_week - 1]
+        
+        # Shifts ending before they start run past midnight into the next weekday
+        same_day = (start <= minute) & (minute < end)
+        starts_tonight = (end < start) & (minute >= start)
+        from_yesterday = (previous_end < previous_start) & (minute < previous_end)
+        mask = (start != MISSING) & (same_day | starts_tonight) | (previous_start != MISSING) & from_yesterday
+        
+        return state.employee_ids[mask]
+    
+    def clear(self):
+        with self._lock:
+            self._state = _empty_state()
+            self._stale.clear()
+
+schedule_index = ScheduleIndex()
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_schedule_changes(session, flush_context):
+    changed = session.info.setdefault('schedule_invalidations', set())
+    
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, WorkSchedule):
+            changed.update(uid for uid in inspect(obj).attrs.employee_id.history.sum() if uid is not None)
+            changed.add(obj.employee_id)
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_schedule_changes(session):
+    # SQL cannot be emitted here, so the employees are reloaded on the next lookup
+    changed = session.info.pop('schedule_invalidations', None)
+    if changed:
+        schedule_index.invalidate(changed)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_schedule_changes(session):
+    session.info.pop('schedule_invalidations', None)
@@ -0,0 +1,266 @@
+import heapq
+import threading
+import time as clock
+import unicodedata
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import and_, event, false, or_, select
+from models import db
+from models.employee import Employee
+from models.team import Team
+
+# Longest n-gram stored; query tokens are looked up by grams of up to this length
+GRAM_SIZE = 3
+
+_State = namedtuple('_State', ['documents', 'grams', 'loaded_at'])
+
+def normalize(value):
+    """Lower-case and strip accents so 'Núñez' is found by 'nunez'"""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+def _grams(text):
+    grams = set()
+    for size in range(1, GRAM_SIZE + 1):
+        grams.update(text[i:i + size] for i in range(len(text) - size + 1))
+    return grams
+
+def _token_grams(token):
+    size = min(len(token), GRAM_SIZE)
+    return {token[i:i + size] for i in range(len(token) - size + 1)}
+
+def _tokens(query):
+    return [token for token in normalize(query).split() if token]
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _field_score(token, value):
+    if value == token:
+        return 4
+    if value.startswith(token):
+        return 3
+    # A word start inside the field, e.g. the domain of an email or a second surname
+    if any(word.startswith(token) for word in value.replace('@', ' ').replace('.', ' ').split()[1:]):
+        return 2
+    if token in value:
+        return 1
+    return 0
+
+class SearchIndex:
+    """Process-local n-gram index over the searchable columns of one model.
+    
+    Every 1-, 2- and 3-gram of the normalized field values maps to the set
+    of row ids containing it. A query token of three or more characters is
+    looked up by intersecting its trigram sets and then verified as a
+    substring, so results match the `ilike('%token%')` filters it replaces;
+    shorter tokens use their own gram directly. Multi-word queries require
+    every word to match some field.
+    
+    Like the schedule index, readers take a snapshot of immutable state and
+    writers swap in a new one. The index loads lazily, reloads fully after
+    SEARCH_INDEX_TTL seconds so changes made by other worker processes are
+    picked up, and reloads single rows after this process commits a change.
+    """
+    
+    def __init__(self, model, fields, display_fields):
+        self.model = model
+        self.fields = fields
+        self.display_fields = display_fields
+        self._state = _State({}, {}, None)
+        self._stale = set()
+        self._lock = threading.Lock()
+    
+    def _snapshot(self):
+        state = self._state
+        ttl = current_app.config.get('SEARCH_INDEX_TTL', 300)
+        if state.loaded_at is None or (ttl and clock.monotonic() - state.loaded_at > ttl):
+            self.load()
+        elif self._stale:
+            with self._lock:
+                stale, self._stale = self._stale, set()
+            self.refresh(stale)
+        return self._state
+    
+    def _read_rows(self, ids=None):
+        table = self.model.__table__
+        columns = ['id'] + [name for name in self.display_fields if name != 'id']
+        query = select(*[table.c[name] for name in columns])
+        if ids is not None:
+            query = query.where(table.c.id.in_(ids))
+        return [dict(row._mapping) for row in db.session.execute(query)]
+    
+    def _document(self, row):
+        return {
+            'row': row,
+            'values': tuple(normalize(row[field]) for field in self.fields)
+        }
+    
+    def load(self):
+        """Rebuild the whole index from the table"""
+        with self._lock:
+            self._stale.clear()
+            documents, grams = {}, {}
+            for row in self._read_rows():
+                document = self._document(row)
+                documents[row['id']] = document
+                for gram in _grams(' '.join(document['values'])):
+                    grams.setdefault(gram, set()).add(row['id'])
+            
+            self._state = _State(documents, grams, clock.monotonic())
+    
+    def refresh(self, ids):
+        """Reload the given rows after they were inserted, updated or deleted"""
+        if self._state.loaded_at is None or not ids:
+            return
+        
+        with self._lock:
+            state = self._state
+            rows = {row['id']: row for row in self._read_rows(list(ids))}
+            documents, grams = dict(state.documents), dict(state.grams)
+            
+            # Posting sets are shared with the previous state, so copy before changing them
+            copied = set()
+            def postings(gram):
+                if gram not in copied:
+                    grams[gram] = set(grams.get(gram, ()))
+                    copied.add(gram)
+                return grams[gram]
+            
+            for row_id in ids:
+                old = documents.pop(row_id, None)
+                if old is not None:
+                    for gram in _grams(' '.join(old['values'])):
+                        postings(gram).discard(row_id)
+                
+                if row_id in rows:
+                    document = self._document(rows[row_id])
+                    documents[row_id] = document
+                    for gram in _grams(' '.join(document['values'])):
+                        postings(gram).add(row_id)
+            
+            for gram in copied:
+                if not grams[gram]:
+                    del grams[gram]
+            
+            self._state = _State(documents, grams, state.loaded_at)
+    
+    def invalidate(self, ids):
+        """Mark rows that changed so the next lookup reloads them"""
+        with self._lock:
+            self._stale.update(ids)
+    
+    def expire(self):
+        """Force a full reload on the next lookup, e.g. after a bulk insert outside the session"""
+        with self._lock:
+            self._state = self._state._replace(loaded_at=None)
+    
+    def _candidates(self, state, token):
+        sets = [state.grams.get(gram) for gram in _token_grams(token)]
+        if not sets or not all(sets):
+            return set()
+        sets.sort(key=len)
+        return set.intersection(*sets)
+    
+    def _matches(self, state, tokens):
+        """Return {id: score} for rows where every token is a substring of some field"""
+        scores = None
+        for token in sorted(tokens, key=len, reverse=True):
+            candidates = self._candidates(state, token)
+            if scores is not None:
+                candidates = candidates & scores.keys()
+            
+            next_scores = {}
+            for row_id in candidates:
+                score = max(_field_score(token, value) for value in state.documents[row_id]['values'])
+                if score:
+                    next_scores[row_id] = (scores[row_id] if scores is not None else 0) + score
+            scores = next_scores
+            if not scores:
+                break
+        
+        return scores or {}
+    
+    def ids(self, query):
+        """Return the ids of every row matching the query"""
+        tokens = _tokens(query)
+        if not tokens:
+            return set()
+        return set(self._matches(self._snapshot(), tokens))
+    
+    def search(self, query, limit=10):
+        """Return up to `limit` matching rows as dicts, best matches first"""
+        tokens = _tokens(query)
+        if not tokens:
+            return []
+        
+        state = self._snapshot()
+        scores = self._matches(state, tokens)
+        
+        # Higher score first, then shorter (closer) values, then id for a stable order
+        best = heapq.nsmallest(limit, scores, key=lambda row_id: (
+            -scores[row_id], sum(len(value) for value in state.documents[row_id]['values']), row_id
+        ))
+        return [dict(state.documents[row_id]['row']) for row_id in best]
+    
+    def clause(self, query):
+        """SQL filter for the rows matching the query, for use in list endpoints.
+        
+        Small match sets become an `id IN (...)` list. When a query matches
+        more than SEARCH_FILTER_MAX_IDS rows the filter falls back to ilike,
+        since such a broad term reads most of the table either way and the
+        IN list would only add to it. The fallback uses the words as typed,
+        with LIKE wildcards escaped, and leaves accent folding to the
+        column collation.
+        """
+        tokens = _tokens(query)
+        if not tokens:
+            return None
+        
+        ids = self.ids(query)
+        if len(ids) <= current_app.config.get('SEARCH_FILTER_MAX_IDS', 1000):
+            return self.model.id.in_(sorted(ids)) if ids else false()
+        
+        columns = [getattr(self.model, field) for field in self.fields]
+        return and_(*[
+            or_(*[column.ilike(f'%{_escape_like(word)}%', escape='\\') for column in columns])
+            for word in query.split()
+        ])
+    
+    def stats(self):
+        state = self._state
+        return {'documents': len(state.documents), 'grams': len(state.grams), 'loaded': state.loaded_at is not None}
+    
+    def clear(self):
+        with self._lock:
+            self._state = _State({}, {}, None)
+            self._stale.clear()
+
+employee_search = SearchIndex(
+    Employee,
+    ['first_name', 'last_name', 'email'],
+    ['id', 'first_name', 'last_name', 'email', 'department', 'position', 'status']
+)
+team_search = SearchIndex(Team, ['name'], ['id', 'name', 'department', 'status'])
+
+_INDEXES = {Employee: employee_search, Team: team_search}
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_search_changes(session, flush_context):
+    changed = session.info.setdefault('search_invalidations', {})
+    
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        index = _INDEXES.get(type(obj))
+        if index is not None and obj.id is not None:
+            changed.setdefault(index, set()).add(obj.id)
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_search_changes(session):
+    # SQL cannot be emitted here, so the rows are reloaded on the next lookup
+    changed = session.info.pop('search_invalidations', None)
+    for index, ids in (changed or {}).items():
+        index.invalidate(ids)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_search_changes(session):
+    session.info.pop('search_invalidations', None)
@@ -0,0 +1,111 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import orjson
+from flask import current_app
+from flask.json.provider import JSONProvider
+from sqlalchemy.engine import Row
+
+# Numpy scalars come out of the schedule index; int dict keys out of grouped counts
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Types whose JSON encoding never contains a comma, so an encoded column can be split on them
+_SPLITTABLE = {int, float, bool, type(None), date, datetime, time}
+_TEXT = {str, type(None)}
+
+def _default(value):
+    """Types orjson does not encode natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, timedelta):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, Row):
+        return dict(value._mapping)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps(value):
+    """Encode a value to JSON bytes the way API responses are encoded"""
+    return orjson.dumps(value, default=_default, option=ORJSON_OPTIONS)
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson.
+    
+    datetime, date and time values are written natively in ISO 8601, which
+    is what the models' isoformat() calls already produce. Keys keep their
+    insertion order instead of being sorted.
+    """
+    
+    mimetype = 'application/json'
+    
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if self._app.debug else 0)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=option) + b'\n', mimetype=self.mimetype
+        )
+
+class RowEncoder:
+    """Columnar encoder from result rows straight to JSON bytes, with no dict per row.
+    
+    `fields` names the output keys; each is read from the row column of the
+    same name unless `computed` maps it to a function that receives every
+    column as {name: tuple of values} and returns the values for all rows,
+    e.g. a duration from the check_in and check_out columns. Computed keys
+    are written after the plain ones.
+    
+    Rows are transposed once. A column whose encoded values cannot contain
+    a comma (numbers, dates, times, None, and strings without commas) is
+    encoded in a single orjson call and split; other columns are encoded
+    value by value. The values are then spliced into a byte template
+    compiled from the keys.
+    """
+    
+    def __init__(self, fields, computed=None):
+        self.computed = computed or {}
+        self.plain = [name for name in fields if name not in self.computed]
+        self.fields = self.plain + [name for name in fields if name in self.computed]
+        self._template = b'{' + b','.join(dumps(name) + b':%b' for name in self.fields) + b'}'
+    
+    @staticmethod
+    def _encode_column(values):
+        types = set(map(type, values))
+        if types <= _SPLITTABLE or (types <= _TEXT and ',' not in '\0'.join(filter(None, values))):
+            return dumps(values)[1:-1].split(b',')
+        return [dumps(value) for value in values]
+    
+    def _encoded_rows(self, rows):
+        rows = rows if isinstance(rows, list) else list(rows)
+        if not rows:
+            return []
+        
+        names = rows[0]._fields
+        transposed = dict(zip(names, zip(*rows)))
+        columns = [transposed[name] for name in self.plain]
+        columns.extend(tuple(self.computed[name](transposed)) for name in self.fields[len(self.plain):])
+        
+        template = self._template
+        return [template % values for values in zip(*map(self._encode_column, columns))]
+    
+    def encode_list(self, rows):
+        """Encode rows as one JSON array"""
+        return b'[' + b','.join(self._encoded_rows(rows)) + b']'
+    
+    def encode_lines(self, rows):
+        """Encode rows as newline-delimited JSON"""
+        encoded = self._encoded_rows(rows)
+        return b'\n'.join(encoded) + b'\n' if encoded else b''
+
+def json_response(payload, status=200, **encoded):
+    """Build a JSON response from a payload dict plus members already encoded as JSON bytes"""
+    body = dumps(payload)
+    if encoded:
+        members = b','.join(dumps(key) + b':' + value for key, value in encoded.items())
+        body = body[:-1] + (b',' if len(body) > 2 else b'') + members + b'}'
+    return current_app.response_class(body + b'\n', status=status, mimetype='application/json')
@@ -0,0 +1,76 @@
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+# MySQL warnings INSERT IGNORE may raise for a duplicate unique key (ER_DUP_KEY, ER_DUP_ENTRY)
+MYSQL_DUPLICATE_WARNINGS = {1022, 1062}
+
+def insert_ignore(table, index_elements, bind):
+    """Build an INSERT that silently skips rows violating the given unique key.
+    
+    The statement's rowcount is 0 when the row already existed, which lets
+    callers detect the conflict without a prior SELECT. Other errors (NOT
+    NULL, foreign keys, truncation) still raise.
+    """
+    dialect = bind.dialect.name
+    
+    if dialect == 'mysql':
+        # IGNORE downgrades every error to a warning; _check_ignored_errors raises the non-duplicate ones again.
+        # ON DUPLICATE KEY UPDATE is not an option: with CLIENT_FOUND_ROWS a no-op update still counts as a row.
+        return mysql.insert(table).prefix_with('IGNORE').execution_options(insert_ignore=True)
+    if dialect == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    
+    raise NotImplementedError(f'insert_ignore is not supported for dialect {dialect}')
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _check_ignored_errors(conn, cursor, statement, parameters, context, executemany):
+    if context is None or not context.execution_options.get('insert_ignore') or conn.dialect.name != 'mysql':
+        return
+    
+    # A second cursor keeps the INSERT's rowcount intact; warnings belong to the session
+    warnings_cursor = cursor.connection.cursor()
+    try:
+        warnings_cursor.execute('SHOW WARNINGS')
+        errors = [row for row in warnings_cursor.fetchall() if row[1] not in MYSQL_DUPLICATE_WARNINGS]
+    finally:
+        warnings_cursor.close()
+    
+    if errors:
+        raise IntegrityError(statement, parameters, Exception(f'{errors[0][1]}: {errors[0][2]}'))
+
+def _upsert_dialect_insert(table, bind):
+    dialect = bind.dialect.name
+    
+    if dialect == 'mysql':
+        return mysql.insert(table)
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    
+    raise NotImplementedError(f'upsert is not supported for dialect {dialect}')
+
+def _on_conflict_update(statement, index_elements, update_columns):
+    if isinstance(statement, mysql.Insert):
+        return statement.on_duplicate_key_update({column: statement.inserted[column] for column in update_columns})
+    
+    return statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: statement.excluded[column] for column in update_columns}
+    )
+
+def upsert(table, index_elements, update_columns, bind):
+    """Build an INSERT that updates `update_columns` when the unique key already exists.
+    
+    Execute it with a list of parameter dicts for a multi-row upsert.
+    """
+    return _on_conflict_update(_upsert_dialect_insert(table, bind), index_elements, update_columns)
+
+def upsert_from_select(table, columns, select_statement, index_elements, update_columns, bind):
+    """Build an INSERT ... SELECT that updates `update_columns` on unique key conflicts"""
+    statement = _upsert_dialect_insert(table, bind).from_select(columns, select_statement)
+    return _on_conflict_update(statement, index_elements, update_columns)
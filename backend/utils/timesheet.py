@@ -0,0 +1,161 @@
+from collections import namedtuple
+import numpy as np
+from sqlalchemy import select
+from models.attendance import Attendance
+from models.employee import Employee
+from utils.rollups import TOLERANCE
+from utils.schedule_index import schedule_index
+
+# Seconds of tolerance before a check-in counts as late or a check-out as early, as in utils.rollups
+TOLERANCE_SECONDS = int(TOLERANCE.total_seconds())
+
+# Marks a missing check-out or an unscheduled weekday in the integer arrays
+MISSING = -1
+
+TimesheetInputs = namedtuple('TimesheetInputs', [
+    'employee_ids',    # sorted unique employee ids, one per timesheet row
+    'employee_index',  # per punch: row in employee_ids
+    'check_in',        # per punch: epoch seconds
+    'check_out',       # per punch: epoch seconds or MISSING
+    'day_start',       # per punch: epoch seconds of midnight of the work date
+    'weekday',         # per punch: 0=Monday, 6=Sunday
+    'schedule_start',  # employees x 7: scheduled start minute of day or MISSING
+    'schedule_end'     # employees x 7: scheduled end minute of day or MISSING
+])
+
+TIMESHEET_FIELDS = [
+    'days_worked', 'minutes_worked', 'late_days', 'lateness_minutes',
+    'early_departures', 'early_departure_minutes', 'overtime_minutes'
+]
+
+def _epoch_seconds(values):
+    return np.array(values, dtype='datetime64[s]').astype(np.int64)
+
+def schedule_matrix(rows, employee_ids):
+    """Build dense employees x 7 start and end minute-of-day arrays.
+    
+    `rows` yields (employee_id, day_of_week, start_time, end_time) ordered
+    by schedule id; the first schedule of each day wins. Without `rows` the
+    arrays come from the in-memory schedule index.
+    """
+    if rows is None:
+        return schedule_index.matrix(employee_ids)
+    
+    start = np.full((len(employee_ids), 7), MISSING, dtype=np.int32)
+    end = np.full((len(employee_ids), 7), MISSING, dtype=np.int32)
+    
+    for employee_id, day_of_week, start_time, end_time in rows:
+        index = np.searchsorted(employee_ids, employee_id)
+        if index < len(employee_ids) and employee_ids[index] == employee_id and start[index, day_of_week] == MISSING:
+            start[index, day_of_week] = start_time.hour * 60 + start_time.minute
+            end[index, day_of_week] = end_time.hour * 60 + end_time.minute
+    
+    return start, end
+
+def build_inputs(punches, schedules=None):
+    """Convert punch and schedule rows into the columnar timesheet inputs.
+    
+    `punches` yields (employee_id, work_date, check_in, check_out) and
+    `schedules` yields (employee_id, day_of_week, start_time, end_time), or
+    is None to read them from the schedule index.
+    """
+    employee_column, work_dates, check_ins, check_outs = list(zip(*punches)) or [(), (), (), ()]
+    
+    raw_ids = np.array(employee_column, dtype=np.int64)
+    employee_ids, employee_index = np.unique(raw_ids, return_inverse=True)
+    
+    days = np.array(work_dates, dtype='datetime64[D]')
+    has_out = np.array([value is not None for value in check_outs], dtype=bool)
+    check_out = np.full(len(check_outs), MISSING, dtype=np.int64)
+    check_out[has_out] = _epoch_seconds([value for value in check_outs if value is not None])
+    
+    start, end = schedule_matrix(schedules, employee_ids)
+    
+    return TimesheetInputs(
+        employee_ids=employee_ids,
+        employee_index=employee_index.astype(np.int64),
+        check_in=_epoch_seconds(check_ins),
+        check_out=check_out,
+        day_start=days.astype('datetime64[s]').astype(np.int64),
+        # 1970-01-01 was a Thursday
+        weekday=((days.astype(np.int64) + 3) % 7).astype(np.int64),
+        schedule_start=start,
+        schedule_end=end
+    )
+
+def compute_timesheet(inputs):
+    """Compute per-employee totals for every punch in one vectorized pass.
+    
+    Returns a dict of arrays aligned with `inputs.employee_ids`.
+    """
+    count = len(inputs.employee_ids)
+    index = inputs.employee_index
+    
+    start = inputs.schedule_start[index, inputs.weekday]
+    end = inputs.schedule_end[index, inputs.weekday]
+    # Shifts ending before they start end the next day, like utils.rollups.scheduled_end;
+    # check-outs are measured from midnight of the work date, so one after midnight lines up
+    end = np.where(end < start, end + 1440, end)
+    scheduled = start != MISSING
+    has_out = inputs.check_out != MISSING
+    
+    worked = np.where(has_out, (inputs.check_out - inputs.check_in) // 60, 0).clip(min=0)
+    in_second = inputs.check_in - inputs.day_start
+    out_second = inputs.check_out - inputs.day_start
+    
+    # Compared in seconds like utils.rollups.is_late; reported in whole minutes
+    lateness = np.where(scheduled, in_second - start * 60, 0)
+    late = lateness > TOLERANCE_SECONDS
+    
+    early_seconds = np.where(scheduled & has_out, end * 60 - out_second, 0)
+    early = early_seconds > TOLERANCE_SECONDS
+    
+    overtime = np.where(scheduled & has_out, worked - (end - start), 0).clip(min=0)
+    
+    def total(values):
+        return np.bincount(index, weights=values, minlength=count).astype(np.int64)
+    
+    return {
+        'days_worked': np.bincount(index, minlength=count).astype(np.int64),
+        'minutes_worked': total(worked),
+        'late_days': total(late),
+        'lateness_minutes': total(np.where(late, lateness // 60, 0)),
+        'early_departures': total(early),
+        'early_departure_minutes': total(np.where(early, -(-early_seconds // 60), 0)),
+        'overtime_minutes': total(overtime)
+    }
+
+def load_inputs(conn, start_date, end_date, department=None):
+    """Load the punches of a date range into timesheet inputs, schedules come from the index"""
+    attendance = Attendance.__table__
+    employees = Employee.__table__
+    
+    punches = select(
+        attendance.c.employee_id, attendance.c.work_date, attendance.c.check_in, attendance.c.check_out
+    ).where(
+        attendance.c.work_date >= start_date,
+        attendance.c.work_date <= end_date,
+        attendance.c.check_in.isnot(None)
+    )
+    
+    if department:
+        punches = punches.where(attendance.c.employee_id.in_(
+            select(employees.c.id).where(employees.c.department == department)
+        ))
+    
+    return build_inputs(conn.execute(punches).all())
+
+def build_timesheet(conn, start_date, end_date, department=None):
+    """Return one timesheet row per employee with punches in the date range"""
+    inputs = load_inputs(conn, start_date, end_date, department)
+    totals = compute_timesheet(inputs)
+    
+    columns = {field: totals[field].tolist() for field in TIMESHEET_FIELDS}
+    rows = []
+    for i, employee_id in enumerate(inputs.employee_ids.tolist()):
+        row = {'employee_id': employee_id}
+        row.update({field: columns[field][i] for field in TIMESHEET_FIELDS})
+        row['hours_worked'] = round(row['minutes_worked'] / 60, 2)
+        rows.append(row)
+    
+    return rows
@@ -0,0 +1,190 @@
+import csv
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from models.employee import Employee
+from models.user import User, hash_password, password_hash_settings
+from utils.query_budget import allow_queries
+
+REQUIRED_FIELDS = ['username', 'password', 'role', 'first_name', 'last_name', 'email']
+ROLES = ('admin', 'employee')
+
+# Rows per IN list and per multi-row INSERT
+CHUNK_SIZE = 500
+
+# Below this many passwords the pool start-up costs more than it saves
+MIN_PARALLEL_HASHES = 32
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def _chunks(values, size):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def parse_import(content, import_format):
+    """Parse a CSV document or a JSON list of objects into row dicts"""
+    if import_format == 'csv':
+        return [dict(row) for row in csv.DictReader(io.StringIO(content))]
+    
+    rows = json.loads(content)
+    if isinstance(rows, dict):
+        rows = rows.get('users')
+    if not isinstance(rows, list):
+        raise ValueError('Se esperaba una lista de usuarios')
+    return rows
+
+def validate_user(row):
+    """Return the error message for an invalid user payload, or None; shared by register and the import"""
+    if not isinstance(row, dict):
+        return 'Formato de fila inválido'
+    
+    for field in REQUIRED_FIELDS:
+        if not str(row.get(field) or '').strip():
+            return f'Se requiere el campo {field}'
+    
+    if row['role'] not in ROLES:
+        return 'El rol debe ser admin o employee'
+    
+    if row.get('hire_date'):
+        try:
+            datetime.strptime(row['hire_date'], '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return 'La fecha de contratación debe tener formato YYYY-MM-DD'
+    
+    return None
+
+def _existing(conn, column, values):
+    found = set()
+    for chunk in _chunks(sorted(values), CHUNK_SIZE):
+        allow_queries(1)
+        found.update(value for value, in conn.execute(select(column).where(column.in_(chunk))))
+    return found
+
+def _process_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Spawned workers do not inherit the server's threads, locks or connections
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+def hash_passwords(passwords, workers=None):
+    """Hash passwords across a process pool, or inline for small batches or a single worker"""
+    # Pool processes have no app context, so resolve the configured parameters here
+    method, salt_length = password_hash_settings()
+    hasher = partial(hash_password, method=method, salt_length=salt_length)
+    
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(passwords) < MIN_PARALLEL_HASHES:
+        return [hasher(password) for password in passwords]
+    
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(_process_pool(workers).map(hasher, passwords, chunksize=chunksize))
+
+def _insert_rows(conn, entries, now):
+    """Insert (number, row, password_hash) entries with their employees inside one savepoint"""
+    users = User.__table__
+    employees = Employee.__table__
+    
+    # Savepoint, users insert, id read-back, employees insert and release
+    allow_queries(5)
+    with conn.begin_nested():
+        conn.execute(insert(users), [
+            {'username': row['username'], 'password_hash': password_hash, 'role': row['role'], 'created_at': now}
+            for _, row, password_hash in entries
+        ])
+        
+        # MySQL has no RETURNING, so read the new ids back by username
+        user_ids = dict(conn.execute(select(users.c.username, users.c.id).where(
+            users.c.username.in_([row['username'] for _, row, _ in entries])
+        )).all())
+        
+        conn.execute(insert(employees), [{
+            'user_id': user_ids[row['username']],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'email': row['email'],
+            'phone': row.get('phone') or None,
+            'department': row.get('department') or None,
+            'position': row.get('position') or None,
+            'hire_date': datetime.strptime(row['hire_date'], '%Y-%m-%d').date() if row.get('hire_date') else now.date(),
+            'status': 'active'
+        } for _, row, _ in entries])
+
+def import_users(conn, rows, workers=None):
+    """Create users with their employee records in the caller's transaction.
+    
+    Rows failing validation, repeating a username or email of an earlier
+    row, or clashing with existing users are skipped and reported, also
+    when a concurrent request creates the clashing user mid-import. Returns
+    the summary with one error entry per skipped row (1-based row numbers).
+    """
+    users = User.__table__
+    employees = Employee.__table__
+    errors = []
+    
+    valid, usernames, emails = [], set(), set()
+    for number, row in enumerate(rows, start=1):
+        error = validate_user(row)
+        if not error and row['username'] in usernames:
+            error = 'Nombre de usuario repetido en la importación'
+        elif not error and row['email'] in emails:
+            error = 'Correo electrónico repetido en la importación'
+        
+        if error:
+            username = row.get('username') if isinstance(row, dict) else None
+            errors.append({'row': number, 'username': username, 'error': error})
+            continue
+        
+        usernames.add(row['username'])
+        emails.add(row['email'])
+        valid.append((number, row))
+    
+    taken_usernames = _existing(conn, users.c.username, usernames)
+    taken_emails = _existing(conn, employees.c.email, emails)
+    
+    accepted = []
+    for number, row in valid:
+        if row['username'] in taken_usernames:
+            errors.append({'row': number, 'username': row['username'], 'error': 'El nombre de usuario ya existe'})
+        elif row['email'] in taken_emails:
+            errors.append({'row': number, 'username': row['username'], 'error': 'El correo electrónico ya está registrado'})
+        else:
+            accepted.append((number, row))
+    
+    hashes = hash_passwords([row['password'] for _, row in accepted], workers)
+    now = datetime.utcnow()
+    
+    created = 0
+    for chunk in _chunks([(number, row, password_hash) for (number, row), password_hash in zip(accepted, hashes)], CHUNK_SIZE):
+        try:
+            _insert_rows(conn, chunk, now)
+            created += len(chunk)
+        except IntegrityError:
+            # Another request took one of these usernames or emails after the check above; keep the rest
+            for entry in chunk:
+                try:
+                    _insert_rows(conn, [entry], now)
+                    created += 1
+                except IntegrityError:
+                    errors.append({'row': entry[0], 'username': entry[1]['username'], 'error': 'El nombre de usuario o el correo electrónico ya existe'})
+    
+    errors.sort(key=lambda error: error['row'])
+    return {
+        'received': len(rows),
+        'created': created,
+        'failed': len(errors),
+        'errors': errors
+    }
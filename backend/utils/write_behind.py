@@ -0,0 +1,245 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from sqlalchemy import select, update
+from models import db
+from models.attendance import Attendance
+from utils.response_cache import model_tag, response_cache
+from utils.rollups import apply_daily_rollups, compute_daily
+from utils.sql import insert_ignore
+
+PendingWrite = namedtuple('PendingWrite', ['kind', 'values', 'schedule', 'future'])
+
+class QueueFull(Exception):
+    """Raised when the write-behind queue cannot take more work"""
+
+_STOP = object()
+
+def _same_second(a, b):
+    # MySQL DATETIME columns drop microseconds
+    return a.replace(microsecond=0) == b.replace(microsecond=0)
+
+def _stored_days(conn, keys):
+    """Map (employee_id, work_date) keys to their stored attendance id and check-in"""
+    table = Attendance.__table__
+    return {(row.employee_id, row.work_date): row for row in conn.execute(select(
+        table.c.id, table.c.employee_id, table.c.work_date, table.c.check_in
+    ).where(
+        table.c.employee_id.in_({employee_id for employee_id, _ in keys}),
+        table.c.work_date.in_({work_date for _, work_date in keys})
+    ))}
+
+def write_attendance_batch(conn, items):
+    """Apply a batch of check-ins and check-outs in the caller's transaction.
+    
+    Returns one result per item: the new attendance id (or None when the
+    employee already checked in that day) for check-ins, and whether the
+    record was updated for check-outs.
+    """
+    table = Attendance.__table__
+    results = [None] * len(items)
+    rollups = {}
+    
+    # Only the first check-in per employee and day in the batch can win
+    check_ins, seen = [], set()
+    for i, item in enumerate(items):
+        key = (item.values['employee_id'], item.values['work_date'])
+        if item.kind == 'check_in' and key not in seen:
+            seen.add(key)
+            check_ins.append(i)
+    
+    if check_ins:
+        existing = _stored_days(conn, seen)
+        check_ins = [i for i in check_ins if (items[i].values['employee_id'], items[i].values['work_date']) not in existing]
+    
+    if check_ins:
+        conn.execute(insert_ignore(table, ['employee_id', 'work_date'], conn), [items[i].values for i in check_ins])
+        stored = _stored_days(conn, seen)
+        
+        for i in check_ins:
+            values = items[i].values
+            key = (values['employee_id'], values['work_date'])
+            row = stored.get(key)
+            # Another process may have inserted the day between the two reads
+            if row is not None and _same_second(row.check_in, values['check_in']):
+                results[i] = row.id
+                rollups[key] = compute_daily(
+                    values['employee_id'], values['work_date'], values['check_in'], None, values['status'],
+                    items[i].schedule
+                )
+    
+    for i, item in enumerate(items):
+        if item.kind != 'check_out':
+            continue
+        
+        values = item.values
+        result = conn.execute(update(table).where(
+            table.c.id == values['id'],
+            table.c.check_out.is_(None)
+        ).values(check_out=values['check_out'], notes=values['notes']))
+        
+        results[i] = result.rowcount == 1
+        if results[i]:
+            key = (values['employee_id'], values['work_date'])
+            rollups[key] = compute_daily(
+                values['employee_id'], values['work_date'], values['check_in'], values['check_out'],
+                values['status'], item.schedule
+            )
+    
+    apply_daily_rollups(conn, list(rollups.values()))
+    return results
+
+class GroupCommitQueue:
+    """Bounded in-process queue whose writer thread commits attendance writes in batches.
+    
+    Callers submit a write and wait on the returned future, which resolves
+    once the batch holding it has committed. A batch is flushed when it
+    reaches WRITE_BEHIND_BATCH_SIZE items or WRITE_BEHIND_MAX_DELAY_MS after
+    its first item arrived. When the queue is full, submit raises QueueFull
+    instead of blocking so callers can shed load. A batch that fails is
+    retried item by item, so only the offending write's future fails.
+    """
+    
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._reset_stats()
+    
+    def _reset_stats(self):
+        self._stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'committed': 0,
+            'failed': 0,
+            'batch_retries': 0,
+            'batches': 0,
+            'last_batch_size': 0,
+            'max_batch_size': 0,
+            'last_commit_ms': 0.0
+        }
+    
+    def _ensure_started(self, app):
+        # A forked worker inherits the queue object but not the writer thread
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            
+            self._app = app
+            self._batch_size = app.config.get('WRITE_BEHIND_BATCH_SIZE', 500)
+            self._max_delay = app.config.get('WRITE_BEHIND_MAX_DELAY_MS', 5) / 1000
+            self._queue = queue.Queue(maxsize=app.config.get('WRITE_BEHIND_QUEUE_SIZE', 10000))
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='attendance-write-behind', daemon=True)
+            self._thread.start()
+    
+    def submit(self, app, kind, values, schedule=None):
+        """Queue a 'check_in' or 'check_out' write and return a future for its result"""
+        self._ensure_started(app)
+        
+        item = PendingWrite(kind, values, schedule, Future())
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._count('rejected')
+            raise QueueFull()
+        
+        self._count('submitted')
+        return item.future
+    
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+    
+    def _record_batch(self, size, started):
+        with self._lock:
+            self._stats['committed'] += size
+            self._stats['batches'] += 1
+            self._stats['last_batch_size'] = size
+            self._stats['max_batch_size'] = max(self._stats['max_batch_size'], size)
+            self._stats['last_commit_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is _STOP:
+            return None
+        
+        batch = [item]
+        deadline = time.monotonic() + self._max_delay
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Commit what was collected, then stop on the next round
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._commit(batch)
+    
+    def _write(self, batch):
+        with self._app.app_context():
+            with db.engine.begin() as conn:
+                results = write_attendance_batch(conn, batch)
+            response_cache.invalidate([model_tag(Attendance)])
+        return results
+    
+    def _commit(self, batch):
+        started = time.perf_counter()
+        try:
+            results = self._write(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self._count('failed')
+                batch[0].future.set_exception(e)
+                return
+            # One bad item must not fail everyone else's write: retry them one by one
+            self._count('batch_retries')
+            for item in batch:
+                self._commit([item])
+            return
+        
+        self._record_batch(len(batch), started)
+        for item, result in zip(batch, results):
+            item.future.set_result(result)
+    
+    def stats(self):
+        """Return queue depth and batching counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['depth'] = self._queue.qsize() if self._queue else 0
+        stats['capacity'] = self._queue.maxsize if self._queue else 0
+        stats['avg_batch_size'] = round(stats['committed'] / stats['batches'], 2) if stats['batches'] else 0
+        return stats
+    
+    def stop(self, timeout=5):
+        """Commit everything already queued and stop the writer thread"""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid():
+            return
+        
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+write_behind = GroupCommitQueue()
+
+atexit.register(write_behind.stop)
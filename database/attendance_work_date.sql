@@ -0,0 +1,18 @@
+-- Migrate existing attendance tables to one record per employee and working day
+
+ALTER TABLE attendance ADD COLUMN work_date DATE NULL AFTER employee_id;
+
+UPDATE attendance SET work_date = DATE(check_in);
+
+-- Keep the earliest record when concurrent check-ins created duplicates
+DELETE duplicate FROM attendance duplicate
+JOIN attendance original
+    ON original.employee_id = duplicate.employee_id
+    AND original.work_date = duplicate.work_date
+    AND original.id < duplicate.id;
+
+ALTER TABLE attendance
+    MODIFY work_date DATE NOT NULL,
+    ADD UNIQUE KEY unique_employee_work_date (employee_id, work_date);
+
+CREATE INDEX idx_attendance_work_date ON attendance(work_date);
@@ -0,0 +1,15 @@
+-- Responses remembered per Idempotency-Key so retried POSTs are answered without redoing the work
+CREATE TABLE idempotency_keys (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    scope VARCHAR(100) NOT NULL,
+    `key` VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status_code INT NOT NULL,  -- 0 while the first request is still running
+    response_body MEDIUMTEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at DATETIME NOT NULL,
+    UNIQUE KEY unique_idempotency_scope_key (scope, `key`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Expired keys are purged by expires_at
+CREATE INDEX idx_idempotency_keys_expires ON idempotency_keys(expires_at);
@@ -0,0 +1,6 @@
+-- Token buckets shared by every worker when LOGIN_RATE_LIMIT_BACKEND=database
+CREATE TABLE rate_limit_buckets (
+    bucket_key VARCHAR(200) PRIMARY KEY,
+    tokens DOUBLE NOT NULL,
+    updated_at DOUBLE NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,33 @@
+-- Per-employee daily attendance rollup, maintained on check-in, check-out and edits
+CREATE TABLE attendance_daily (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    employee_id INT NOT NULL,
+    work_date DATE NOT NULL,
+    minutes_worked INT NOT NULL DEFAULT 0,
+    late BOOLEAN NOT NULL DEFAULT FALSE,
+    early_departure BOOLEAN NOT NULL DEFAULT FALSE,
+    overtime_minutes INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (employee_id) REFERENCES employees(id),
+    UNIQUE KEY unique_daily_employee_date (employee_id, work_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Per-employee monthly totals aggregated from attendance_daily
+CREATE TABLE attendance_monthly (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    employee_id INT NOT NULL,
+    year INT NOT NULL,
+    month INT NOT NULL CHECK (month BETWEEN 1 AND 12),
+    days_worked INT NOT NULL DEFAULT 0,
+    minutes_worked INT NOT NULL DEFAULT 0,
+    late_days INT NOT NULL DEFAULT 0,
+    early_departures INT NOT NULL DEFAULT 0,
+    overtime_minutes INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (employee_id) REFERENCES employees(id),
+    UNIQUE KEY unique_monthly_employee_month (employee_id, year, month)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Create indexes for common queries
+CREATE INDEX idx_attendance_daily_date ON attendance_daily(work_date);
+CREATE INDEX idx_attendance_monthly_period ON attendance_monthly(year, month);
+
+-- Backfill existing history with: flask rollups rebuild --start YYYY-MM-DD --end YYYY-MM-DD
@@ -36,11 +36,13 @@ CREATE TABLE work_schedules (
 CREATE TABLE attendance (
     id INT AUTO_INCREMENT PRIMARY KEY,
     employee_id INT NOT NULL,
+    work_date DATE NOT NULL,
     check_in TIMESTAMP NULL,
     check_out TIMESTAMP NULL,
     status VARCHAR(20) DEFAULT 'present',
     notes TEXT,
-    FOREIGN KEY (employee_id) REFERENCES employees(id)
+    FOREIGN KEY (employee_id) REFERENCES employees(id),
+    UNIQUE KEY unique_employee_work_date (employee_id, work_date)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Create Absences table
@@ -68,6 +70,9 @@ CREATE TABLE holidays (
 -- Create index for common queries
 CREATE INDEX idx_attendance_employee ON attendance(employee_id);
 CREATE INDEX idx_attendance_date ON attendance(check_in);
+CREATE INDEX idx_attendance_work_date ON attendance(work_date);
+CREATE INDEX idx_attendance_employee_check_in ON attendance(employee_id, check_in, id);
+CREATE INDEX idx_employees_last_name ON employees(last_name, id);
 CREATE INDEX idx_work_schedules_employee ON work_schedules(employee_id);
 CREATE INDEX idx_absences_employee ON absences(employee_id);
 CREATE INDEX idx_absences_date ON absences(start_date);
\ No newline at end of file
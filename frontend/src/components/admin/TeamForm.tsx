@@ -20,6 +20,9 @@ import { useLanguage } from '../../contexts/LanguageContext';
 import teamService, { Team } from '../../services/teamService';
 import axios from 'axios';
 
+// Milliseconds the employee picker waits after the last keystroke before searching
+const SEARCH_DEBOUNCE_MS = 300;
+
 interface TeamFormProps {
   open: boolean;
   onClose: () => void;
@@ -47,6 +50,7 @@ const TeamForm = ({ open, onClose, onSuccess, team }: TeamFormProps) => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [employees, setEmployees] = useState<Employee[]>([]);
+  const [searchQuery, setSearchQuery] = useState('');
   const [selectedMembers, setSelectedMembers] = useState<TeamMemberInput[]>([]);
   const [formData, setFormData] = useState<Team>({
     name: '',
@@ -71,25 +75,44 @@ const TeamForm = ({ open, onClose, onSuccess, team }: TeamFormProps) => {
       });
     }
     
-    // Reset selected members
+    // Reset selected members and picker options
     setSelectedMembers([]);
-    
-    // Fetch employees for member selection
-    fetchEmployees();
+    setEmployees([]);
+    setSearchQuery('');
   }, [team, open]);
 
-  const fetchEmployees = async () => {
+  // Ask the typeahead endpoint once the admin pauses typing instead of downloading every employee
+  const fetchEmployees = async (query: string, signal: AbortSignal) => {
     try {
       const token = localStorage.getItem('token');
-      const response = await axios.get('http://localhost:5001/api/employees/', {
-        headers: { Authorization: `Bearer ${token}` }
+      const response = await axios.get('http://localhost:5001/api/employees/search', {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { q: query, limit: 20 },
+        signal
       });
+      
       setEmployees(response.data.employees);
     } catch (err: any) {
+      if (axios.isCancel(err)) return;
       console.error('Error fetching employees:', err);
     }
   };
 
+  // A newer query cancels the pending one, so a slow answer can't overwrite a fresher list
+  useEffect(() => {
+    if (!searchQuery.trim()) {
+      setEmployees([]);
+      return;
+    }
+    
+    const controller = new AbortController();
+    const timer = setTimeout(() => fetchEmployees(searchQuery, controller.signal), SEARCH_DEBOUNCE_MS);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchQuery]);
+
   const handleChange = (e: React.ChangeEvent<HTMLInputElement | { name?: string; value: unknown }>) => {
     const { name, value } = e.target;
     setFormData(prev => ({
@@ -204,6 +227,8 @@ const TeamForm = ({ open, onClose, onSuccess, team }: TeamFormProps) => {
                   <Autocomplete
                     options={employees}
                     getOptionLabel={(option) => `${option.first_name} ${option.last_name}`}
+                    filterOptions={(options) => options}
+                    onInputChange={(_, value) => setSearchQuery(value)}
                     renderInput={(params) => (
                       <TextField
                         {...params}
@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useState, useEffect } from 'react';
 import {
   Box,
   Button,
@@ -27,6 +27,9 @@ import { useLanguage } from '../../contexts/LanguageContext';
 import teamService, { TeamWithMembers, TeamMember } from '../../services/teamService';
 import axios from 'axios';
 
+// Milliseconds the employee picker waits after the last keystroke before searching
+const SEARCH_DEBOUNCE_MS = 300;
+
 interface TeamMembersDialogProps {
   open: boolean;
   onClose: () => void;
@@ -48,23 +51,20 @@ const TeamMembersDialog = ({ open, onClose, team, onMemberUpdate }: TeamMembersD
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [employees, setEmployees] = useState<Employee[]>([]);
+  const [searchQuery, setSearchQuery] = useState('');
   const [selectedEmployee, setSelectedEmployee] = useState<Employee | null>(null);
   const [selectedRole, setSelectedRole] = useState('member');
   const [editingMember, setEditingMember] = useState<TeamMember | null>(null);
   const [editRole, setEditRole] = useState('');
 
-  // Fetch employees when dialog opens
-  useState(() => {
-    if (open) {
-      fetchEmployees();
-    }
-  });
-
-  const fetchEmployees = async () => {
+  // Ask the typeahead endpoint once the admin pauses typing instead of downloading every employee
+  const fetchEmployees = async (query: string, signal: AbortSignal) => {
     try {
       const token = localStorage.getItem('token');
-      const response = await axios.get('http://localhost:5001/api/employees/', {
-        headers: { Authorization: `Bearer ${token}` }
+      const response = await axios.get('http://localhost:5001/api/employees/search', {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { q: query, limit: 20 },
+        signal
       });
       
       // Filter out employees who are already team members
@@ -75,11 +75,27 @@ const TeamMembersDialog = ({ open, onClose, team, onMemberUpdate }: TeamMembersD
       
       setEmployees(availableEmployees);
     } catch (err: any) {
+      if (axios.isCancel(err)) return;
       console.error('Error fetching employees:', err);
       setError(err.response?.data?.message || 'Failed to load employees');
     }
   };
 
+  // A newer query cancels the pending one, so a slow answer can't overwrite a fresher list
+  useEffect(() => {
+    if (!searchQuery.trim()) {
+      setEmployees([]);
+      return;
+    }
+    
+    const controller = new AbortController();
+    const timer = setTimeout(() => fetchEmployees(searchQuery, controller.signal), SEARCH_DEBOUNCE_MS);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchQuery]);
+
   const handleAddMember = async () => {
     if (!selectedEmployee) return;
     
@@ -165,6 +181,8 @@ const TeamMembersDialog = ({ open, onClose, team, onMemberUpdate }: TeamMembersD
             <Autocomplete
               options={employees}
               getOptionLabel={(option) => `${option.first_name} ${option.last_name}`}
+              filterOptions={(options) => options}
+              onInputChange={(_, value) => setSearchQuery(value)}
               renderInput={(params) => (
                 <TextField
                   {...params}